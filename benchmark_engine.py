@@ -0,0 +1,397 @@
+# Imports
+import argparse
+import builtins
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import sys
+import time
+from contextlib import redirect_stdout
+from functools import partial
+
+from spaceships import (
+    AI_MODE_DENSITY,
+    AI_MODE_RANDOM,
+    BATTLEFIELD_MAX_SIZE,
+    BATTLEFIELD_MIN_SIZE,
+    MAGENTA_WHITE_STYLE,
+    RED_WHITE_STYLE,
+    FrameRenderer,
+    SpaceShipsGame,
+    get_number_of_ships,
+)
+
+# Constants
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json"
+)
+DEFAULT_THRESHOLD = 0.5
+# Benchmarks below a microsecond per call vary more between runs, they
+# count as regressions beyond this threshold instead
+FAST_BENCHMARK_SECONDS = 1e-6
+FAST_BENCHMARK_THRESHOLD = 1.0
+DEFAULT_PASSES = 5
+DEFAULT_REPEAT = 3
+# Timed batches grow until they take this long, so timer resolution and
+# short interruptions are small against every timing
+MIN_BATCH_SECONDS = 0.001
+
+
+def new_game(size, seed, ai_mode=AI_MODE_RANDOM):
+    """
+    Creates a seeded game that renders into memory instead of the console.
+
+    Args:
+        size (int): Size of the battlefield
+        seed (int): Seed of the game
+        ai_mode (str): How the computer picks its targets
+
+    Returns:
+        SpaceShipsGame: The new game
+    """
+    return SpaceShipsGame(
+        size,
+        get_number_of_ships(size),
+        "bench",
+        ai_mode,
+        FrameRenderer(io.StringIO(), use_cursor=False),
+        seed=seed,
+    )
+
+
+def shuffled_targets(size, seed):
+    """
+    All target inputs of a battlefield in a seeded random order.
+
+    Args:
+        size (int): Size of the battlefield
+        seed (int): Seed of the order
+
+    Returns:
+        list of str: Target inputs like 'A1'
+    """
+    targets = [
+        string.ascii_uppercase[col] + str(row + 1)
+        for row in range(size)
+        for col in range(size)
+    ]
+    random.Random(seed).shuffle(targets)
+    return targets
+
+
+def time_batches(prepare, repeat):
+    """
+    Times batches of calls. The first batch of one call is doubled until a
+    batch takes at least MIN_BATCH_SECONDS, all batches then have that
+    size. Preparing a batch, e.g. creating fresh games, is not timed.
+
+    Args:
+        prepare (callable): Takes the number of calls and returns a
+            function running them, which returns the number of calls made
+        repeat (int): Number of timed batches
+
+    Returns:
+        list of float: Seconds per call of each batch
+    """
+    number = 1
+    while True:
+        run = prepare(number)
+        start = time.perf_counter()
+        calls = run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_BATCH_SECONDS:
+            break
+        number *= 2
+
+    timings = [elapsed / calls]
+    for _ in range(repeat - 1):
+        run = prepare(number)
+        start = time.perf_counter()
+        calls = run()
+        timings.append((time.perf_counter() - start) / calls)
+    return timings
+
+
+def repeat_calls(function):
+    """
+    Batches for time_batches() that call a function again and again.
+
+    Args:
+        function (callable): Called without arguments
+
+    Returns:
+        callable: Takes the number of calls and returns the batch
+    """
+
+    def prepare(number):
+        def run():
+            for _ in range(number):
+                function()
+            return number
+
+        return run
+
+    return prepare
+
+
+def bench_init(size, repeat):
+    """
+    Seconds to create a game, including the placement of both fleets.
+    """
+    seeds = iter(range(10**9))
+    return time_batches(
+        repeat_calls(lambda: new_game(size, next(seeds))), repeat
+    )
+
+
+def bench_fire_missile(size, repeat):
+    """
+    Seconds per fire_missile() call, firing on every cell of fresh games.
+    """
+    targets = [(row, col) for row in range(size) for col in range(size)]
+
+    def prepare(number):
+        games = [new_game(size, seed) for seed in range(number)]
+
+        def run():
+            for game in games:
+                battlefield = game.computer_battlefield
+                for target in targets:
+                    game.fire_missile(battlefield, target)
+            return number * len(targets)
+
+        return run
+
+    return time_batches(prepare, repeat)
+
+
+def bench_computer_turn(size, ai_mode, repeat):
+    """
+    Seconds per computer_turn() call, playing computer turns on fresh games
+    until the computer has won.
+    """
+
+    def prepare(number):
+        games = [new_game(size, seed, ai_mode) for seed in range(number)]
+
+        def run():
+            turns = 0
+            for game in games:
+                while not game.get_winner():
+                    game.computer_turn()
+                    turns += 1
+            return turns
+
+        return run
+
+    return time_batches(prepare, repeat)
+
+
+def bench_print_battlefield(size, repeat):
+    """
+    Seconds per print_battlefield() call, with the output captured.
+    """
+    game = new_game(size, 0)
+    for target in shuffled_targets(size, 0)[: size * 2]:
+        game.submit_target(target)
+    output = io.StringIO()
+
+    def print_battlefield():
+        game.print_battlefield(
+            game.computer_battlefield, RED_WHITE_STYLE, True, "Enemy"
+        )
+        output.seek(0)
+        output.truncate()
+
+    with redirect_stdout(output):
+        return time_batches(repeat_calls(print_battlefield), repeat)
+
+
+def bench_turn_summary(size, repeat):
+    """
+    Seconds per generate_turn_summary() call, with the output captured.
+    """
+    game = new_game(size, 0)
+    for target in shuffled_targets(size, 0)[:3]:
+        game.submit_target(target)
+    output = io.StringIO()
+
+    def generate_turn_summary():
+        game.generate_turn_summary(MAGENTA_WHITE_STYLE)
+        output.seek(0)
+        output.truncate()
+
+    with redirect_stdout(output):
+        return time_batches(repeat_calls(generate_turn_summary), repeat)
+
+
+def play_scripted_game(size, seed):
+    """
+    Plays a whole game through the console flow of play_game(), with
+    scripted input and the output captured.
+
+    Args:
+        size (int): Size of the battlefield
+        seed (int): Seed of the game and of the user's targets
+    """
+    game = new_game(size, seed)
+    targets = iter(shuffled_targets(size, seed))
+    original_input = builtins.input
+    builtins.input = lambda prompt="": next(targets)
+    try:
+        with redirect_stdout(io.StringIO()):
+            game.play_game()
+    finally:
+        builtins.input = original_input
+
+
+def bench_game(size, repeat):
+    """
+    Seconds per scripted game played end-to-end.
+    """
+    seeds = iter(range(10**9))
+    return time_batches(
+        repeat_calls(lambda: play_scripted_game(size, next(seeds))), repeat
+    )
+
+
+def get_benchmarks():
+    """
+    Every benchmark for every battlefield size.
+
+    Returns:
+        dict: Functions taking the number of timed batches and returning
+            the seconds per call of each batch, keyed by
+            '<benchmark>/<size>'
+    """
+    benchmarks = {}
+    for size in range(BATTLEFIELD_MIN_SIZE, BATTLEFIELD_MAX_SIZE + 1):
+        benchmarks[f"init/{size}"] = partial(bench_init, size)
+        benchmarks[f"fire_missile/{size}"] = partial(bench_fire_missile, size)
+        for ai_mode in (AI_MODE_RANDOM, AI_MODE_DENSITY):
+            benchmarks[f"computer_turn_{ai_mode}/{size}"] = partial(
+                bench_computer_turn, size, ai_mode
+            )
+        benchmarks[f"print_battlefield/{size}"] = partial(
+            bench_print_battlefield, size
+        )
+        benchmarks[f"generate_turn_summary/{size}"] = partial(
+            bench_turn_summary, size
+        )
+        benchmarks[f"game/{size}"] = partial(bench_game, size)
+    return benchmarks
+
+
+def run_benchmarks(names=None, passes=DEFAULT_PASSES, repeat=DEFAULT_REPEAT):
+    """
+    Runs the suite several times and keeps the median time per call of
+    all batches of each benchmark. Spreading the batches of a benchmark
+    over separate passes keeps a slow spell of the machine from skewing a
+    single benchmark, the median ignores the batches it slowed down.
+
+    Args:
+        names (iterable of str): Benchmarks to run, all if None
+        passes (int): Number of times the suite is run
+        repeat (int): Number of timed batches per benchmark and pass
+
+    Returns:
+        dict: Seconds per call, keyed by '<benchmark>/<size>'
+    """
+    benchmarks = get_benchmarks()
+    names = list(benchmarks if names is None else names)
+    timings = {name: [] for name in names}
+    for _ in range(passes):
+        for name in names:
+            timings[name].extend(benchmarks[name](repeat))
+    return {
+        name: statistics.median(seconds) for name, seconds in timings.items()
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results against a baseline. Benchmarks taking less than
+    FAST_BENCHMARK_SECONDS per call in the baseline are allowed a slowdown
+    of at least FAST_BENCHMARK_THRESHOLD.
+
+    Args:
+        results (dict): Seconds per call, keyed by benchmark name
+        baseline (dict): Seconds per call of the baseline
+        threshold (float): Allowed slowdown, 0.5 allows 50% slower
+
+    Returns:
+        list of str: Names of the benchmarks that regressed
+    """
+    regressions = []
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name]
+        allowed = threshold
+        if baseline[name] < FAST_BENCHMARK_SECONDS:
+            allowed = max(threshold, FAST_BENCHMARK_THRESHOLD)
+        marker = ""
+        if ratio > 1 + allowed:
+            regressions.append(name)
+            marker = "  REGRESSION"
+        print(
+            f"{name:32s} {seconds * 1e6:12.2f} us  x{ratio:5.2f}{marker}"
+        )
+    return regressions
+
+
+def main():
+    """
+    Runs the benchmark suite from the command line. Exits with status 1 when
+    a benchmark is slower than the baseline by more than the threshold.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the hot paths of the SpaceShips engine."
+    )
+    parser.add_argument("--passes", type=int, default=DEFAULT_PASSES)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--output", help="write the results as JSON here")
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="store the results as the new baseline",
+    )
+    args = parser.parse_args()
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": run_benchmarks(passes=args.passes, repeat=args.repeat),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2, sort_keys=True)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    regressions = compare(report["results"], baseline, args.threshold)
+    if regressions:
+        # Measured again to tell a real regression from a noisy measurement
+        print(f"Measuring {len(regressions)} benchmarks again...")
+        remeasured = run_benchmarks(regressions, args.passes, args.repeat)
+        regressions = compare(remeasured, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} benchmarks regressed: {regressions}")
+        sys.exit(1)
+    print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
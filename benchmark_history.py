@@ -0,0 +1,134 @@
+# Imports
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from spaceships import (
+    BATTLEFIELD_MAX_SIZE,
+    BATTLEFIELD_MIN_SIZE,
+    NUMBER_OF_DEFAULT_SHIP_SEGMENTS,
+    HistoryStore,
+    get_number_of_ships,
+)
+
+# Constants
+DEFAULT_NUMBER_OF_GAMES = 1_000_000
+DEFAULT_NUMBER_OF_PLAYERS = 200_000
+DEFAULT_NUMBER_OF_QUERIES = 200
+
+
+def fill_history(store, games, players, seed):
+    """
+    Queues random results of finished games on the regular battlefield
+    sizes and waits until the store has written them.
+
+    Args:
+        store (HistoryStore): The store to fill
+        games (int): Number of games
+        players (int): Number of distinct players
+        seed (int): Seed of the results
+
+    Returns:
+        float: Games written per second
+    """
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for _ in range(games):
+        size = rng.randint(BATTLEFIELD_MIN_SIZE, BATTLEFIELD_MAX_SIZE)
+        number_of_ships = get_number_of_ships(size)
+        segments = number_of_ships * NUMBER_OF_DEFAULT_SHIP_SEGMENTS
+        won = rng.random() < 0.5
+        # Rows as queued by HistoryStore.record()
+        store.results.put(
+            (
+                f"p{rng.randrange(players)}",
+                size,
+                number_of_ships,
+                rng.randint(segments // 3 + 1, size * size // 3 + 1),
+                segments if won else rng.randrange(segments),
+                rng.randrange(segments) if won else segments,
+                "user" if won else "computer",
+                time.time(),
+            )
+        )
+    store.get_connection()
+    return games / (time.perf_counter() - start)
+
+
+def time_queries(query, arguments):
+    """
+    Times a query of the store once per set of arguments.
+
+    Args:
+        query (callable): The query
+        arguments (list of tuples): Arguments of each call
+
+    Returns:
+        list of float: Milliseconds per call
+    """
+    timings = []
+    for call_arguments in arguments:
+        start = time.perf_counter()
+        query(*call_arguments)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    """
+    Fills a temporary history with random games from the command line and
+    prints how fast they are written and how long the leaderboard queries
+    of the end screen take.
+    """
+    parser = argparse.ArgumentParser(
+        description="Measures the SpaceShips game history and leaderboard."
+    )
+    parser.add_argument("--games", type=int, default=DEFAULT_NUMBER_OF_GAMES)
+    parser.add_argument(
+        "--players", type=int, default=DEFAULT_NUMBER_OF_PLAYERS
+    )
+    parser.add_argument(
+        "--queries", type=int, default=DEFAULT_NUMBER_OF_QUERIES
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(os.path.join(directory, "history.db"))
+        try:
+            rate = fill_history(store, args.games, args.players, args.seed)
+            print(f"{args.games:,} games written, {rate:,.0f} games/s")
+
+            rng = random.Random(args.seed + 1)
+            sizes = range(BATTLEFIELD_MIN_SIZE, BATTLEFIELD_MAX_SIZE + 1)
+            players = [
+                (f"p{rng.randrange(args.players)}", rng.choice(sizes))
+                for _ in range(args.queries)
+            ]
+            for name, query, arguments in (
+                ("rank", store.get_rank, players),
+                (
+                    "leaderboard",
+                    store.get_leaderboard,
+                    [(rng.choice(sizes),) for _ in range(args.queries)],
+                ),
+                (
+                    "player stats",
+                    store.get_player_stats,
+                    [(username,) for username, _ in players],
+                ),
+            ):
+                timings = time_queries(query, arguments)
+                print(
+                    f"{name}: median {statistics.median(timings):.3f} ms, "
+                    + f"max {max(timings):.3f} ms"
+                )
+        finally:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
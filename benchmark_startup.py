@@ -0,0 +1,137 @@
+# Imports
+import argparse
+import os
+import pty
+import select
+import socket
+import statistics
+import sys
+import time
+from functools import partial
+
+# Constants
+DEFAULT_NUMBER_OF_RUNS = 20
+FIRST_PROMPT = b"What's your name captain?"
+PROMPT_TIMEOUT = 10
+# Medians above these fail the benchmark, in milliseconds
+STARTUP_MAX_MEDIAN_MS = 60
+LAUNCHER_MAX_MEDIAN_MS = 10
+
+
+def time_to_first_prompt(script):
+    """
+    Spawns the game in a pseudo-terminal, the same way the web terminal does,
+    and measures the time until the first prompt is shown.
+
+    Args:
+        script (str): Path of the game script to run
+
+    Returns:
+        float: Seconds from spawning the process to the first prompt
+
+    Raises:
+        RuntimeError: If the prompt does not appear within PROMPT_TIMEOUT.
+    """
+    start = time.perf_counter()
+    pid, fd = pty.fork()
+    if pid == 0:
+        os.execvp(sys.executable, [sys.executable, script])
+
+    output = b""
+    try:
+        while FIRST_PROMPT not in output:
+            if time.perf_counter() - start > PROMPT_TIMEOUT:
+                raise RuntimeError("The game did not show its first prompt.")
+            ready, _, _ = select.select([fd], [], [], 0.1)
+            if ready:
+                output += os.read(fd, 4096)
+        return time.perf_counter() - start
+    finally:
+        os.kill(pid, 9)
+        os.waitpid(pid, 0)
+        os.close(fd)
+
+
+def time_to_first_prompt_launched(path):
+    """
+    Starts a session on a running launcher, see launcher.py, and measures
+    the time until the first prompt is shown.
+
+    Args:
+        path (str): Path of the launcher's Unix socket
+
+    Returns:
+        float: Seconds from connecting to the first prompt
+
+    Raises:
+        RuntimeError: If the prompt does not appear within PROMPT_TIMEOUT.
+    """
+    start = time.perf_counter()
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.settimeout(PROMPT_TIMEOUT)
+    with connection:
+        connection.connect(path)
+        connection.sendall(b"{}\n")
+        output = b""
+        while FIRST_PROMPT not in output:
+            try:
+                data = connection.recv(4096)
+            except socket.timeout:
+                data = b""
+            if not data:
+                raise RuntimeError("The game did not show its first prompt.")
+            output += data
+        return time.perf_counter() - start
+
+
+def main():
+    """
+    Runs the startup benchmark from the command line and prints the time to
+    first prompt in milliseconds. Exits with status 1 when the median is
+    above the limit.
+    """
+    parser = argparse.ArgumentParser(
+        description="Measures the time until run.py shows its first prompt."
+    )
+    parser.add_argument("--runs", type=int, default=DEFAULT_NUMBER_OF_RUNS)
+    parser.add_argument(
+        "--script",
+        default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "run.py"
+        ),
+    )
+    parser.add_argument(
+        "--launcher",
+        help="measure sessions of the launcher listening on this socket",
+    )
+    parser.add_argument(
+        "--max-median",
+        type=float,
+        help="fail above this median in ms, by default "
+        + f"{STARTUP_MAX_MEDIAN_MS} or {LAUNCHER_MAX_MEDIAN_MS} for the "
+        + "launcher",
+    )
+    args = parser.parse_args()
+
+    if args.launcher:
+        measure = partial(time_to_first_prompt_launched, args.launcher)
+        max_median = args.max_median or LAUNCHER_MAX_MEDIAN_MS
+    else:
+        measure = partial(time_to_first_prompt, args.script)
+        max_median = args.max_median or STARTUP_MAX_MEDIAN_MS
+    # The first run warms up the disk cache and is not counted
+    measure()
+    timings = [measure() * 1000 for _ in range(args.runs)]
+    print(
+        f"time to first prompt over {args.runs} runs: "
+        + f"min {min(timings):.1f} ms, "
+        + f"median {statistics.median(timings):.1f} ms, "
+        + f"max {max(timings):.1f} ms"
+    )
+    if statistics.median(timings) > max_median:
+        print(f"REGRESSION: the median is above {max_median:.1f} ms")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# Imports
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from spaceships import (
+    BATTLEFIELD_MAX_SIZE,
+    BATTLEFIELD_MIN_SIZE,
+    NUMBER_OF_MISSILES,
+    OPENING_BOOK_ENTRY,
+    OPENING_BOOK_HEADER,
+    OPENING_BOOK_MAGIC,
+    OPENING_BOOK_PATH,
+    OPENING_BOOK_SCALE,
+    OPENING_BOOK_VERSION,
+    count_fleet_occupancy,
+    get_canonical_shots,
+    get_number_of_ships,
+)
+
+# Constants
+DEFAULT_DEPTH = NUMBER_OF_MISSILES
+# Deeper books where the expert AI's uncached exact counts outlast the
+# share of COMPUTER_TIME_BUDGET of a shot
+SOLVER_DEPTHS = {5: 6, 6: 12}
+
+
+def get_hit_chances(size, number_of_ships, hits, misses):
+    """
+    Hit probabilities of a canonical position as stored in the book.
+
+    Args:
+        size (int): Size of the targeted battlefield
+        number_of_ships (int): Number of spaceships of the fleet
+        hits (int): Canonical bitmask of the cells hit so far
+        misses (int): Canonical bitmask of the cells missed so far
+
+    Returns:
+        tuple of int: Hit probability of each cell in units of
+            1/OPENING_BOOK_SCALE, row-major
+    """
+    occupancy, fleets = count_fleet_occupancy(
+        size, number_of_ships, hits, misses
+    )
+    return tuple(
+        (count * OPENING_BOOK_SCALE + fleets // 2) // fleets
+        for count in occupancy
+    )
+
+
+def get_next_positions(size, hits, misses, chances):
+    """
+    The positions the expert AI can reach with its next shot: a hit or a
+    miss on any of the untargeted cells with the highest probability.
+
+    Args:
+        size (int): Size of the targeted battlefield
+        hits (int): Bitmask of the cells hit so far
+        misses (int): Bitmask of the cells missed so far
+        chances (tuple of int): Hit probabilities of the position
+
+    Returns:
+        set of tuples: Canonical (hits, misses) of the next positions
+    """
+    fired = hits | misses
+    best = max(
+        chance
+        for cell, chance in enumerate(chances)
+        if not fired >> cell & 1
+    )
+    positions = set()
+    for cell, chance in enumerate(chances):
+        if fired >> cell & 1 or chance != best:
+            continue
+        bit = 1 << cell
+        if chance:
+            positions.add(get_canonical_shots(size, hits | bit, misses)[1:])
+        if chance < OPENING_BOOK_SCALE:
+            positions.add(get_canonical_shots(size, hits, misses | bit)[1:])
+    return positions
+
+
+def build_table(size, depth, pool):
+    """
+    Computes the hit probabilities of every position the expert AI can
+    reach within its first shots on a battlefield, a level of shots at a
+    time with the positions of a level spread over the pool.
+
+    Args:
+        size (int): Size of the targeted battlefield
+        depth (int): Number of shots covered by the book
+        pool (concurrent.futures.Executor): Computes the positions
+
+    Returns:
+        dict: Hit probabilities keyed by canonical (hits, misses)
+    """
+    number_of_ships = get_number_of_ships(size)
+    table = {}
+    level = {(0, 0)}
+    for shot in range(depth):
+        keys = sorted(level)
+        results = list(
+            pool.map(
+                get_hit_chances,
+                [size] * len(keys),
+                [number_of_ships] * len(keys),
+                [hits for hits, _ in keys],
+                [misses for _, misses in keys],
+            )
+        )
+        table.update(zip(keys, results))
+        if shot == depth - 1:
+            break
+        level = set()
+        for (hits, misses), chances in zip(keys, results):
+            level |= get_next_positions(size, hits, misses, chances)
+        level -= table.keys()
+    return table
+
+
+def format_opening_book(tables):
+    """
+    Encodes tables in the layout read by OpeningBook.
+
+    Args:
+        tables (dict): Per (size, number_of_ships), the hit probabilities
+            keyed by canonical (hits, misses), see build_table()
+
+    Returns:
+        bytes: The opening book
+    """
+    header = OPENING_BOOK_HEADER.pack(
+        OPENING_BOOK_MAGIC, OPENING_BOOK_VERSION, len(tables)
+    )
+    offset = len(header) + len(tables) * OPENING_BOOK_ENTRY.size
+    entries = []
+    sections = []
+    for (size, number_of_ships), table in sorted(tables.items()):
+        mask_length = (size * size + 7) // 8
+        section = b"".join(
+            hits.to_bytes(mask_length, "big")
+            + misses.to_bytes(mask_length, "big")
+            + b"".join(
+                chance.to_bytes(2, "big") for chance in table[hits, misses]
+            )
+            for hits, misses in sorted(table)
+        )
+        entries.append(
+            OPENING_BOOK_ENTRY.pack(size, number_of_ships, len(table), offset)
+        )
+        sections.append(section)
+        offset += len(section)
+    return header + b"".join(entries) + b"".join(sections)
+
+
+def main():
+    """
+    Builds the opening book from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Precomputes the opening shots of the expert AI."
+    )
+    parser.add_argument("--min-size", type=int, default=BATTLEFIELD_MIN_SIZE)
+    parser.add_argument("--max-size", type=int, default=BATTLEFIELD_MAX_SIZE)
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=None,
+        help="number of opening shots covered on every size, by default "
+        + f"{DEFAULT_DEPTH} or the size's entry in SOLVER_DEPTHS",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=OPENING_BOOK_PATH)
+    args = parser.parse_args()
+
+    tables = {}
+    with ProcessPoolExecutor(args.workers or os.cpu_count() or 1) as pool:
+        for size in range(args.min_size, args.max_size + 1):
+            start = time.perf_counter()
+            depth = args.depth or SOLVER_DEPTHS.get(size, DEFAULT_DEPTH)
+            table = build_table(size, depth, pool)
+            tables[size, get_number_of_ships(size)] = table
+            print(
+                f"{size}x{size}: {len(table)} positions in "
+                + f"{time.perf_counter() - start:.1f} s"
+            )
+
+    data = format_opening_book(tables)
+    with open(args.output, "wb") as book_file:
+        book_file.write(data)
+    print(f"{len(data)} bytes written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# Imports
+import argparse
+import io
+import random
+import sys
+import tracemalloc
+
+from spaceships import (
+    BATTLEFIELD_MAX_SIZE,
+    BATTLEFIELD_MIN_SIZE,
+    COMPUTER_AI_MODE,
+    LARGE_BATTLEFIELD_MAX_SIZE,
+    LARGE_BATTLEFIELD_MIN_SIZE,
+    NUMBER_OF_MISSILES,
+    FrameRenderer,
+    SpaceShipsGame,
+    format_target,
+    get_number_of_ships,
+)
+
+# Constants
+DEFAULT_NUMBER_OF_GAMES = 20
+LARGE_GAME_TURNS = 100
+# Maximum bytes a finished game of COMPUTER_AI_MODE may hold on to, per
+# battlefield size, about a quarter above the measured sizes. The expert
+# AI's solver cache is shared between games and not counted here.
+GAME_MEMORY_LIMITS = {
+    4: 7_000,
+    5: 7_000,
+    6: 7_000,
+    7: 7_000,
+    8: 7_500,
+    9: 8_000,
+    10: 8_500,
+    LARGE_BATTLEFIELD_MIN_SIZE: 85_000,
+    LARGE_BATTLEFIELD_MAX_SIZE: 250_000,
+}
+
+
+def play_game(size, seed, ai_mode):
+    """
+    Plays a seeded game through the step API. Games on the regular sizes
+    are played until they are won, large games for LARGE_GAME_TURNS turns.
+
+    Args:
+        size (int): Size of the battlefield
+        seed (int): Seed of the game and of the user's targets
+        ai_mode (str): How the computer picks its targets
+
+    Returns:
+        SpaceShipsGame: The played game
+    """
+    game = SpaceShipsGame(
+        size,
+        get_number_of_ships(size),
+        "memory",
+        ai_mode,
+        FrameRenderer(io.StringIO(), use_cursor=False),
+        seed=seed,
+    )
+    rng = random.Random(seed)
+    if size > BATTLEFIELD_MAX_SIZE:
+        cells = rng.sample(
+            range(size * size), LARGE_GAME_TURNS * NUMBER_OF_MISSILES
+        )
+    else:
+        cells = list(range(size * size))
+        rng.shuffle(cells)
+    for cell in cells:
+        game.submit_target(format_target(*divmod(cell, size)))
+        if game.get_winner():
+            break
+    return game
+
+
+def measure_game_memory(size, games, ai_mode):
+    """
+    Bytes held per live game, measured with tracemalloc over a number of
+    games kept alive at once. Caches shared between games are warmed up by
+    a first game that is not counted.
+
+    Args:
+        size (int): Size of the battlefield
+        games (int): Number of games measured
+        ai_mode (str): How the computer picks its targets
+
+    Returns:
+        float: Mean bytes per game
+    """
+    play_game(size, -1, ai_mode)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        played = [play_game(size, seed, ai_mode) for seed in range(games)]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    allocated = sum(
+        stat.size_diff for stat in after.compare_to(before, "filename")
+    )
+    del played
+    return allocated / games
+
+
+def main():
+    """
+    Measures the memory of finished games for every battlefield size from
+    the command line. Exits with status 1 when a size exceeds its limit in
+    GAME_MEMORY_LIMITS.
+    """
+    parser = argparse.ArgumentParser(
+        description="Checks the memory held by a SpaceShips game."
+    )
+    parser.add_argument(
+        "--games", type=int, default=DEFAULT_NUMBER_OF_GAMES
+    )
+    parser.add_argument("--ai-mode", default=COMPUTER_AI_MODE)
+    args = parser.parse_args()
+
+    sizes = list(range(BATTLEFIELD_MIN_SIZE, BATTLEFIELD_MAX_SIZE + 1))
+    sizes += [LARGE_BATTLEFIELD_MIN_SIZE, LARGE_BATTLEFIELD_MAX_SIZE]
+    exceeded = []
+    for size in sizes:
+        games = args.games if size <= BATTLEFIELD_MAX_SIZE else 2
+        allocated = measure_game_memory(size, games, args.ai_mode)
+        limit = GAME_MEMORY_LIMITS[size]
+        marker = ""
+        if allocated > limit:
+            exceeded.append(size)
+            marker = "  OVER LIMIT"
+        print(
+            f"{size:4d}x{size:<4d} {allocated:12,.0f} bytes per game"
+            + f"  (limit {limit:,}){marker}"
+        )
+    if exceeded:
+        print(f"Sizes over their memory limit: {exceeded}")
+        sys.exit(1)
+    print("All games within their memory limits.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,123 @@
 const Pty = require('node-pty');
 const fs = require('fs');
+const net = require('net');
+const os = require('os');
+const path = require('path');
+const childProcess = require('child_process');
+
+// Games are forked by launcher.py from a warmed up interpreter, set
+// SPACESHIPS_LAUNCHER=off to spawn a new interpreter per connection instead
+const LAUNCHER_PATH = path.join(os.tmpdir(), 'spaceships-launcher.sock');
+var launcher = null;
 
 exports.install = function () {
 
     ROUTE('/');
     WEBSOCKET('/', socket, ['raw']);
 
+    if (process.env.SPACESHIPS_LAUNCHER !== 'off') {
+        startLauncher();
+    }
+
 };
 
-function socket() {
+function startLauncher() {
+    launcher = childProcess.spawn('python3', ['launcher.py', '--unix', LAUNCHER_PATH], {
+        cwd: process.env.PWD,
+        stdio: 'inherit'
+    });
 
-    this.encodedecode = false;
-    this.autodestroy();
+    launcher.on('exit', function (code, signal) {
+        launcher = null;
+        console.log("Launcher exited");
+    });
+}
 
-    this.on('open', function (client) {
+// Spawn terminal
+function spawnTerminal(client, session) {
+    // Pass the browser's session id on, so an interrupted game can be resumed
+    var env = Object.assign({}, process.env);
+    if (session) {
+        env.SPACESHIPS_SESSION_ID = session;
+    }
+
+    client.tty = Pty.spawn('python3', ['run.py'], {
+        name: 'xterm-color',
+        cols: 80,
+        rows: 24,
+        cwd: process.env.PWD,
+        env: env
+    });
+
+    client.tty.on('exit', function (code, signal) {
+        client.tty = null;
+        client.close();
+        console.log("Process killed");
+    });
+
+    client.tty.on('data', function (data) {
+        client.send(data);
+    });
+}
+
+// Take a pre-forked game from the launcher, the terminal is spawned as
+// before when the launcher cannot be reached
+function attachLauncher(client, session) {
+    var connected = false;
+    var connection = net.createConnection(LAUNCHER_PATH);
+    connection.setEncoding('utf8');
+
+    client.tty = {
+        write: function (data) {
+            connection.write(data);
+        },
+        kill: function () {
+            connection.destroy();
+        }
+    };
 
-        // Spawn terminal
-        client.tty = Pty.spawn('python3', ['run.py'], {
-            name: 'xterm-color',
-            cols: 80,
-            rows: 24,
-            cwd: process.env.PWD,
-            env: process.env
-        });
+    connection.on('connect', function () {
+        connected = true;
+        connection.write(JSON.stringify({ session: session, rows: 24, cols: 80 }) + '\n');
+    });
 
-        client.tty.on('exit', function (code, signal) {
+    connection.on('error', function (err) {
+        if (!connected) {
+            console.log("Launcher unavailable: " + err.message);
+            spawnTerminal(client, session);
+        }
+    });
+
+    connection.on('close', function () {
+        if (connected && client.tty) {
             client.tty = null;
             client.close();
             console.log("Process killed");
-        });
+        }
+    });
 
-        client.tty.on('data', function (data) {
-            client.send(data);
-        });
+    connection.on('data', function (data) {
+        client.send(data);
+    });
+}
+
+function socket() {
+
+    this.encodedecode = false;
+    this.autodestroy();
+
+    this.on('open', function (client) {
+
+        var session = null;
+        if (client.query.session && /^[A-Za-z0-9_-]{1,64}$/.test(client.query.session)) {
+            session = client.query.session;
+        }
+
+        if (launcher) {
+            attachLauncher(client, session);
+        } else {
+            spawnTerminal(client, session);
+        }
 
     });
 
@@ -0,0 +1,372 @@
+# Imports
+import argparse
+import fcntl
+import gc
+import json
+import os
+import select
+import signal
+import socket
+import struct
+import sys
+import tempfile
+import termios
+import threading
+import traceback
+
+from spaceships import (
+    BATTLEFIELD_MAX_SIZE,
+    BATTLEFIELD_MIN_SIZE,
+    SESSION_ID_PATTERN,
+    SESSION_ID_VARIABLE,
+    get_cell_placements,
+    get_opening_book,
+    get_placement_masks,
+    get_sampler_pool,
+    get_spaceship_placements,
+    get_title,
+)
+from spaceships import main as run_game
+
+# Constants
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "spaceships-launcher.sock")
+POOL_SIZE = 4
+MAX_SESSIONS = 200
+REAP_INTERVAL = 1.0
+HEADER_LIMIT = 4096
+RELAY_CHUNK_SIZE = 65536
+TERMINAL_ROWS = 24
+TERMINAL_COLS = 80
+TERMINAL_MAX_SIZE = 1000
+SERVER_FULL_MESSAGE = "All battle stations are taken, try again later.\r\n"
+
+
+def warm_up():
+    """
+    Loads everything the games of all children share, before the first
+    child is forked: the game module, the title and the placement
+    tables of the regular battlefield sizes. The loaded objects are then
+    moved out of the garbage collector's reach, so collections in the
+    children do not touch, and copy, the shared pages.
+    """
+    get_title()
+    get_opening_book()
+    for size in range(BATTLEFIELD_MIN_SIZE, BATTLEFIELD_MAX_SIZE + 1):
+        get_spaceship_placements(size)
+        get_placement_masks(size)
+        get_cell_placements(size)
+    gc.collect()
+    gc.freeze()
+
+
+def read_header(connection):
+    """
+    Reads the JSON line a session starts with, e.g.
+    {"session": "abc", "rows": 24, "cols": 80}. Every key is optional.
+
+    Args:
+        connection (socket.socket): The session's connection
+
+    Returns:
+        dict: The header, empty if the line is not a JSON object
+        bytes: Data received after the header, typed ahead by the player
+    """
+    data = b""
+    while b"\n" not in data and len(data) < HEADER_LIMIT:
+        chunk = connection.recv(HEADER_LIMIT)
+        if not chunk:
+            break
+        data += chunk
+    line, _, rest = data.partition(b"\n")
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = {}
+    return header if isinstance(header, dict) else {}, rest
+
+
+def get_terminal_size(header, key, default):
+    """
+    A dimension of the terminal from the session header.
+
+    Args:
+        header (dict): The session header, see read_header()
+        key (str): 'rows' or 'cols'
+        default (int): Used when the header has no valid value
+
+    Returns:
+        int: The dimension
+    """
+    value = header.get(key)
+    if isinstance(value, int) and 0 < value <= TERMINAL_MAX_SIZE:
+        return value
+    return default
+
+
+def relay_terminal(master, connection, typed_ahead):
+    """
+    Copies the game's output from the pty to the connection and the
+    player's input the other way, until either side closes. When the
+    player disconnects the game is hung up, as when a terminal is closed.
+
+    Args:
+        master (int): Master side of the session's pty
+        connection (socket.socket): The session's connection
+        typed_ahead (bytes): Input received with the header
+    """
+    if typed_ahead:
+        os.write(master, typed_ahead)
+    while True:
+        ready, _, _ = select.select([master, connection], [], [])
+        if master in ready:
+            try:
+                output = os.read(master, RELAY_CHUNK_SIZE)
+            except OSError:
+                # The game closed its end of the pty
+                output = b""
+            if not output:
+                break
+            connection.sendall(output)
+        if connection in ready:
+            data = connection.recv(RELAY_CHUNK_SIZE)
+            if not data:
+                os.kill(os.getpid(), signal.SIGHUP)
+                break
+            os.write(master, data)
+    connection.close()
+
+
+def run_session(control):
+    """
+    Waits in a pre-forked child for the launcher to hand over a session,
+    then plays the game on a new pty attached to the session's
+    connection. A relay thread copies between the pty and the connection.
+
+    Args:
+        control (socket.socket): The child's end of its control socket,
+            the session's connection is received on it
+    """
+    try:
+        _, fds, _, _ = socket.recv_fds(control, 1, 1)
+    finally:
+        control.close()
+    if not fds:
+        # The launcher shut down before handing over a session
+        return
+    connection = socket.socket(fileno=fds[0])
+    header, typed_ahead = read_header(connection)
+
+    master, slave = os.openpty()
+    fcntl.ioctl(
+        slave,
+        termios.TIOCSWINSZ,
+        struct.pack(
+            "HHHH",
+            get_terminal_size(header, "rows", TERMINAL_ROWS),
+            get_terminal_size(header, "cols", TERMINAL_COLS),
+            0,
+            0,
+        ),
+    )
+    os.setsid()
+    fcntl.ioctl(slave, termios.TIOCSCTTY, 0)
+    for fd in (0, 1, 2):
+        os.dup2(slave, fd)
+    os.close(slave)
+    sys.stdin = open(0, encoding="utf-8", closefd=False)
+    sys.stdout = open(1, "w", encoding="utf-8", buffering=1, closefd=False)
+    sys.stderr = open(2, "w", encoding="utf-8", buffering=1, closefd=False)
+
+    session_id = header.get("session")
+    if isinstance(session_id, str) and SESSION_ID_PATTERN.fullmatch(
+        session_id
+    ):
+        os.environ[SESSION_ID_VARIABLE] = session_id
+    else:
+        os.environ.pop(SESSION_ID_VARIABLE, None)
+
+    relay = threading.Thread(
+        target=relay_terminal,
+        args=(master, connection, typed_ahead),
+        daemon=True,
+    )
+    relay.start()
+    try:
+        run_game()
+    finally:
+        # The sampling workers of the posterior AI hold the pty open too
+        if get_sampler_pool.cache_info().currsize:
+            get_sampler_pool().shutdown(cancel_futures=True)
+        # Closing the pty lets the relay send the last output and finish
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for fd in (0, 1, 2):
+            os.close(fd)
+        relay.join()
+
+
+class Launcher:
+    """
+    Starts a game process per session without starting an interpreter: a
+    pool of children forked from the warmed up launcher waits for
+    sessions, and every connection to the launcher's Unix socket is handed
+    to one of them. Children share the launcher's loaded modules and
+    tables copy-on-write. The pool is refilled after every hand over, and
+    children are reaped as they exit.
+
+    Args:
+        path (str): Path of the Unix socket to listen on
+        pool_size (int): Number of children kept waiting for a session
+        max_sessions (int): Maximum number of concurrent sessions, further
+            connections are turned away
+
+    Attributes:
+        path (str): Path of the Unix socket.
+        pool_size (int): Number of children kept waiting for a session.
+        max_sessions (int): Maximum number of concurrent sessions.
+        listener (socket.socket): Accepts the connections of new sessions.
+        pool (dict): Control socket per process id of the waiting children.
+        sessions (set): Process ids of the children playing a session.
+    """
+
+    def __init__(self, path, pool_size=POOL_SIZE, max_sessions=MAX_SESSIONS):
+        self.path = path
+        self.pool_size = pool_size
+        self.max_sessions = max_sessions
+        self.pool = {}
+        self.sessions = set()
+        if os.path.exists(path):
+            os.unlink(path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(path)
+        self.listener.listen()
+        self.listener.settimeout(REAP_INTERVAL)
+
+    def fork_child(self):
+        """
+        Forks a child that waits for a session, see run_session().
+        """
+        control, child_control = socket.socketpair()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                control.close()
+                self.listener.close()
+                for other_control in self.pool.values():
+                    other_control.close()
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                run_session(child_control)
+            except SystemExit as error:
+                code = error.code if isinstance(error.code, int) else 1
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        child_control.close()
+        self.pool[pid] = control
+
+    def fill_pool(self):
+        """
+        Forks children until pool_size children wait for a session.
+        """
+        while len(self.pool) < self.pool_size:
+            self.fork_child()
+
+    def reap(self):
+        """
+        Collects the exit status of every child that has exited, waiting
+        children that died are dropped from the pool.
+        """
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            self.sessions.discard(pid)
+            control = self.pool.pop(pid, None)
+            if control:
+                control.close()
+
+    def hand_over(self, connection):
+        """
+        Passes a connection to a waiting child, or turns it away when the
+        launcher is full.
+
+        Args:
+            connection (socket.socket): Connection of the new session
+        """
+        if len(self.sessions) >= self.max_sessions:
+            connection.sendall(SERVER_FULL_MESSAGE.encode())
+            return
+        while True:
+            if not self.pool:
+                self.fork_child()
+            pid, control = self.pool.popitem()
+            try:
+                socket.send_fds(control, [b"s"], [connection.fileno()])
+            except OSError:
+                # The child died since it was forked, try the next one
+                continue
+            finally:
+                control.close()
+            self.sessions.add(pid)
+            return
+
+    def serve(self):
+        """
+        Accepts sessions until interrupted.
+        """
+        self.fill_pool()
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except socket.timeout:
+                connection = None
+            if connection:
+                with connection:
+                    self.hand_over(connection)
+            self.reap()
+            self.fill_pool()
+
+    def close(self):
+        """
+        Stops listening. Waiting children exit once their control socket is
+        closed, children playing a session finish their game.
+        """
+        self.listener.close()
+        for control in self.pool.values():
+            control.close()
+        self.pool.clear()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def main():
+    """
+    Starts the launcher from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Starts a pre-forked SpaceShips game per session."
+    )
+    parser.add_argument("--unix", default=DEFAULT_PATH)
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE)
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    args = parser.parse_args()
+
+    warm_up()
+    launcher = Launcher(args.unix, args.pool_size, args.max_sessions)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        launcher.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        launcher.close()
+
+
+if __name__ == "__main__":
+    main()
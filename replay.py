@@ -0,0 +1,452 @@
+# Imports
+import argparse
+import json
+import time
+from array import array
+from functools import lru_cache
+
+from spaceships import (
+    CELL_EMPTY,
+    CELL_HIT,
+    CELL_MISS,
+    CELL_SHIP,
+    CELL_STATE_MASK,
+    CELL_STATES,
+    EVENT_COMPUTER,
+    EVENT_HIT,
+    EVENT_LOG_VERSION,
+    EVENT_SAMPLES,
+    NUMBER_OF_MISSILES,
+    TARGETING_STRATEGIES,
+    FrameRenderer,
+    SpaceShipsGame,
+    SparseBattlefield,
+    encode_event,
+    encode_samples,
+)
+
+# Constants
+# Maps an encoded cell to the digit "1" if it was fired on, else "0"
+FIRED_DIGITS = bytes(
+    ord("1" if cell & CELL_STATE_MASK in (CELL_HIT, CELL_MISS) else "0")
+    for cell in range(256)
+)
+# The state of a cell before a logged miss and before a logged hit
+UNFIRED_STATES = (CELL_EMPTY, CELL_SHIP)
+# Maps an unfired encoded cell to the cell after a missile hit it
+FIRED_CELLS = bytes(
+    cell ^ CELL_SHIP ^ CELL_HIT
+    if cell & CELL_STATE_MASK == CELL_SHIP
+    else cell | CELL_MISS
+    for cell in range(256)
+)
+# Lines with a cell or sample count below this are kept by EventCodes
+EVENT_CODES_MAX_VALUE = 4096
+# Cells and sample counts from here on do not fit in a 32 bit event
+EVENT_MAX_VALUE = 1 << 29
+
+
+class ReplayDivergence(Exception):
+    """
+    Raised when a replayed game does not match its event log.
+
+    Args:
+        line_number (int): Line of the event log where the replay diverged
+        message (str): What did not match
+    """
+
+    def __init__(self, line_number, message):
+        super().__init__(f"line {line_number}: {message}")
+        self.line_number = line_number
+
+
+def restore_turn_data(game):
+    """
+    Rebuilds the attempts and hit counters of both players from the cells
+    of the battlefields they fired on. The attempt bitsets of regular
+    battlefields are read from the cell buffers in a single pass.
+
+    Args:
+        game (SpaceShipsGame): The replayed game
+    """
+    for battlefield, turn_data in (
+        (game.computer_battlefield, game.user_turn_data),
+        (game.user_battlefield, game.computer_turn_data),
+    ):
+        if isinstance(battlefield, SparseBattlefield):
+            turn_data.previous_attempts.update(
+                divmod(index, game.size) for index in battlefield.shots
+            )
+            turn_data.total_hits = sum(
+                1 for state in battlefield.shots.values() if state == CELL_HIT
+            )
+            continue
+        # Bit n of the bitset is the n-th digit from the right
+        digits = battlefield.cells.translate(FIRED_DIGITS)
+        turn_data.previous_attempts.mask = int(digits[::-1], 2)
+        turn_data.total_hits = battlefield.cells.translate(CELL_STATES).count(
+            CELL_HIT
+        )
+
+
+class EventCodes(dict):
+    """
+    The events of the event log lines seen so far, keyed by line, see
+    format_event(). A line is parsed when it is first looked up, so the
+    lines of a log are decoded with one lookup each. Lines with values up
+    to EVENT_CODES_MAX_VALUE are kept, the lines of the regular
+    battlefields and of most sample counts, which bounds the size of the
+    cache.
+
+    Raises:
+        ValueError: When a line that is not an event is looked up.
+    """
+
+    def __missing__(self, line):
+        fields = line.split()
+        if len(fields) == 2 and fields[0] == "s" and fields[1].isdigit():
+            value = int(fields[1])
+            event = encode_samples(value)
+        elif (
+            len(fields) == 3
+            and fields[0] in ("u", "c")
+            and fields[1].isdigit()
+            and fields[2] in ("hit", "miss")
+        ):
+            value = int(fields[1])
+            event = encode_event(fields[0], value, fields[2])
+        else:
+            raise ValueError(f"{line!r} is not an event")
+        if value >= EVENT_MAX_VALUE:
+            raise ValueError(f"{line!r} is out of range")
+        if value < EVENT_CODES_MAX_VALUE:
+            self[line] = event
+        return event
+
+
+@lru_cache(maxsize=None)
+def get_event_codes():
+    """
+    The events of the lines decoded so far, shared by every replay.
+
+    Returns:
+        EventCodes: The cache
+    """
+    return EventCodes()
+
+
+def decode_events(lines):
+    """
+    Decodes the lines of an event log into their events.
+
+    Args:
+        lines (list of str): The lines of the event log after the header,
+            without the final state
+
+    Returns:
+        array of int: The events, see encode_event() and encode_samples()
+
+    Raises:
+        ReplayDivergence: If a line is not an event.
+    """
+    codes = get_event_codes()
+    try:
+        return array("L", map(codes.__getitem__, lines))
+    except ValueError:
+        for index, line in enumerate(lines):
+            try:
+                codes[line]
+            except ValueError as error:
+                raise ReplayDivergence(index + 2, str(error)) from None
+        raise
+
+
+def apply_events(game, events, index, verify_ai):
+    """
+    Applies the logged missiles straight to the cell buffers of the
+    battlefields and extends the event log with them, the same as
+    SpaceShipsGame.fire_missile() without its per-call overhead, and
+    checks every result against the fleets. Large battlefields have no
+    cell buffer and are fired upon through their cell states. The
+    computer's AI is not consulted or updated.
+
+    Args:
+        game (SpaceShipsGame): The replayed game
+        events (array of int): The events of the log, see decode_events()
+        index (int): Position of the first event to apply
+        verify_ai (bool): Stops at the computer's turns, for
+            replay_computer_turn(), instead of applying them
+
+    Returns:
+        int: Position of the computer turn applying stopped at, the number
+            of events once all are applied
+
+    Raises:
+        ReplayDivergence: If a missile misses the battlefield, a cell is
+            fired on twice or a result differs from the log.
+    """
+    start = index
+    area = game.size * game.size
+    # Indexed by the EVENT_COMPUTER bit of an event
+    battlefields = (game.computer_battlefield, None, game.user_battlefield)
+    buffers = [
+        getattr(battlefield, "cells", None) for battlefield in battlefields
+    ]
+    stop = EVENT_SAMPLES | EVENT_COMPUTER if verify_ai else 0
+    for index in range(start, len(events)):
+        event = events[index]
+        if event & stop:
+            break
+        if event & EVENT_SAMPLES:
+            continue
+        cell = event >> 3
+        cells = buffers[event & EVENT_COMPUTER]
+        if cells is None:
+            battlefield = battlefields[event & EVENT_COMPUTER]
+            target = divmod(cell, game.size)
+            state = battlefield.state(*target) if cell < area else None
+        else:
+            state = cells[cell] & CELL_STATE_MASK if cell < area else None
+        if state != UNFIRED_STATES[event & EVENT_HIT]:
+            logged = "hit" if event & EVENT_HIT else "miss"
+            if state is None:
+                message = f"cell {cell} is off the battlefield"
+            elif state in (CELL_HIT, CELL_MISS):
+                message = f"cell {cell} fired on twice"
+            else:
+                result = "hit" if state == CELL_SHIP else "miss"
+                message = f"cell {cell} was a {result}, log has {logged}"
+            raise ReplayDivergence(index + 2, message)
+        if cells is None:
+            battlefield.set_state(
+                *target, CELL_HIT if state == CELL_SHIP else CELL_MISS
+            )
+        else:
+            cells[cell] = FIRED_CELLS[cells[cell]]
+    else:
+        index = len(events)
+    game.event_log.extend(events[start:index])
+    return index
+
+
+def read_computer_turn(events, index):
+    """
+    Reads the shots of a computer turn from the event log, each with the
+    fleets sampled for its target.
+
+    Args:
+        events (array of int): The events of the log, see decode_events()
+        index (int): Position of the turn's first event
+
+    Returns:
+        list of tuples: Per shot the line number, the cell fired on, the
+            logged result and the sample counts of the target, None if the
+            computer did not sample for it
+        int: Position of the event after the turn
+
+    Raises:
+        ReplayDivergence: If samples are not followed by a computer shot.
+    """
+    shots = []
+    while index < len(events) and len(shots) < NUMBER_OF_MISSILES:
+        sample_counts = []
+        while index < len(events) and events[index] & EVENT_SAMPLES:
+            sample_counts.append(events[index] >> 3)
+            index += 1
+        if index == len(events) or not events[index] & EVENT_COMPUTER:
+            if sample_counts:
+                raise ReplayDivergence(
+                    index + 2, "samples are not followed by a computer shot"
+                )
+            break
+        event = events[index]
+        shots.append(
+            (
+                index + 2,
+                event >> 3,
+                "hit" if event & EVENT_HIT else "miss",
+                tuple(sample_counts) or None,
+            )
+        )
+        index += 1
+    return shots, index
+
+
+def replay_computer_turn(game, logged_shots):
+    """
+    Plays a computer turn with the game's targeting AI and checks its shots
+    against the log. AIs sampling against deadlines draw the logged
+    numbers of fleets instead, so they pick the same targets.
+
+    Args:
+        game (SpaceShipsGame): The replayed game
+        logged_shots (list of tuples): The turn, see read_computer_turn()
+
+    Raises:
+        ReplayDivergence: If the computer fires on other cells or a
+            different number of missiles.
+    """
+    game.computer_targeting.plan_samples(
+        sample_counts for _, _, _, sample_counts in logged_shots
+    )
+    shots = game.computer_turn(time_budget=None)
+    for (line_number, cell, logged, _), ((row, col), result) in zip(
+        logged_shots, shots
+    ):
+        if row * game.size + col != cell:
+            raise ReplayDivergence(
+                line_number,
+                f"computer fired on cell {row * game.size + col}, "
+                + f"log has {cell}",
+            )
+        if result != logged:
+            raise ReplayDivergence(
+                line_number, f"cell {cell} was a {result}, log has {logged}"
+            )
+    if len(shots) != len(logged_shots):
+        raise ReplayDivergence(
+            logged_shots[-1][0],
+            f"computer fired {len(shots)} missiles, "
+            + f"log has {len(logged_shots)}",
+        )
+
+
+def replay_event_log(log, verify_ai=False):
+    """
+    Rebuilds a game from its event log without rendering. The fleets are
+    placed as logged and the missiles of both players are applied as
+    logged, see apply_events(), checking every result against the
+    fleets and the final state digest and winner against the log. The
+    computer's AI is not brought up to date with its shots.
+
+    With verify_ai, the fleets are placed again from the logged seed and
+    the computer's shots are picked again by its targeting AI, only the
+    user's shots are taken from the log, and every fleet and missile is
+    checked against the log as well. Games resumed from a snapshot start
+    from the logged fleets, and the shots restoring the snapshot are
+    applied as logged.
+
+    Args:
+        log (str): The event log, see SpaceShipsGame.format_event_log()
+        verify_ai (bool): Derives the fleets and the computer's shots again
+
+    Returns:
+        SpaceShipsGame: The rebuilt game
+
+    Raises:
+        ReplayDivergence: If the replay does not match the log.
+    """
+    lines = log.splitlines()
+    header = json.loads(lines[0])
+    if header["version"] != EVENT_LOG_VERSION:
+        raise ReplayDivergence(1, f"unsupported version {header['version']}")
+    if header["ai_mode"] not in TARGETING_STRATEGIES:
+        raise ReplayDivergence(1, f"unknown AI mode {header['ai_mode']!r}")
+    if len(lines) < 2 or not lines[-1].startswith("state "):
+        raise ReplayDivergence(len(lines), "log has no final state")
+    events = decode_events(lines[1:-1])
+
+    restored = header.get("restored_events")
+    game = SpaceShipsGame(
+        header["size"],
+        header["number_of_ships"],
+        header["username"],
+        header["ai_mode"],
+        FrameRenderer(use_cursor=False),
+        header["fleets"] if restored is not None or not verify_ai else None,
+        header["seed"],
+    )
+    game.restored_events = restored
+
+    if not verify_ai:
+        apply_events(game, events, 0, verify_ai)
+    else:
+        fleets = [
+            list(game.user_battlefield.ship_placements),
+            list(game.computer_battlefield.ship_placements),
+        ]
+        if fleets != header["fleets"]:
+            raise ReplayDivergence(1, "fleets differ from the seed")
+        battlefields = {
+            0: game.computer_battlefield,
+            EVENT_COMPUTER: game.user_battlefield,
+        }
+        for index in range(restored or 0):
+            event = events[index]
+            logged = "hit" if event & EVENT_HIT else "miss"
+            result = game.restore_shot(
+                battlefields[event & EVENT_COMPUTER],
+                divmod(event >> 3, game.size),
+            )
+            if result != logged:
+                raise ReplayDivergence(
+                    index + 2,
+                    f"cell {event >> 3} was a {result}, log has {logged}",
+                )
+        index = apply_events(game, events, restored or 0, verify_ai)
+        while index < len(events):
+            logged_shots, index = read_computer_turn(events, index)
+            replay_computer_turn(game, logged_shots)
+            index = apply_events(game, events, index, verify_ai)
+
+    fields = lines[-1].split()
+    if len(fields) != 3 or not fields[2].isdigit():
+        raise ReplayDivergence(len(lines), "final state is malformed")
+    restore_turn_data(game)
+    winner = game.get_winner()
+    if str(winner) != fields[1]:
+        raise ReplayDivergence(
+            len(lines), f"winner is {winner}, log has {fields[1]}"
+        )
+    if game.get_state_digest() != int(fields[2]):
+        raise ReplayDivergence(len(lines), "final state differs")
+    return game
+
+
+def main():
+    """
+    Replays event logs from the command line and reports, per log and for
+    all logs, whether they replay cleanly and how fast.
+    """
+    parser = argparse.ArgumentParser(
+        description="Replays SpaceShips event logs and verifies them."
+    )
+    parser.add_argument("logs", nargs="+", help="event log files")
+    parser.add_argument(
+        "--verify-ai",
+        action="store_true",
+        help="place the fleets and pick the computer's shots again",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    total_events = 0
+    total_elapsed = 0
+    for path in args.logs:
+        with open(path, encoding="utf-8") as log_file:
+            log = log_file.read()
+        start = time.perf_counter()
+        try:
+            game = replay_event_log(log, args.verify_ai)
+        except ReplayDivergence as error:
+            print(f"{path}: DIVERGED at {error}")
+            failed = True
+            continue
+        elapsed = (time.perf_counter() - start) * 1000
+        events = len(game.event_log)
+        total_events += events
+        total_elapsed += elapsed
+        print(
+            f"{path}: OK, {events} events in {elapsed:.3f} ms "
+            + f"({events / elapsed:.0f} events/ms), winner {game.get_winner()}"
+        )
+    if total_elapsed:
+        print(
+            f"{total_events} events in {total_elapsed:.3f} ms "
+            + f"({total_events / total_elapsed:.0f} events/ms)"
+        )
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,699 @@
+# Imports
+import argparse
+import asyncio
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from colorama import Style
+
+from spaceships import (
+    GAME_SIZE_PROMPT,
+    MAGENTA_CYAN_STYLE,
+    MAGENTA_WHITE_STYLE,
+    PLAY_AGAIN_PROMPT,
+    TARGET_PROMPT,
+    USERNAME_PROMPT,
+    FrameRenderer,
+    PhaseStats,
+    SpaceShipsGame,
+    coalesce_styles,
+    format_rank,
+    format_rules,
+    get_game_size_error,
+    get_number_of_ships,
+    get_title,
+    get_username_error,
+    open_history,
+    save_event_log,
+)
+
+# Constants
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8001
+MAX_SESSIONS = 200
+IDLE_TIMEOUT = 300
+SERVER_FULL_MESSAGE = "All battle stations are taken, try again later.\n"
+IDLE_MESSAGE = "\n\nNo orders received for too long, session closed.\n"
+SPECTATE_COMMAND = "/watch"
+SPECTATE_HINT = (
+    f"Enter {SPECTATE_COMMAND} instead of a username to watch a running game."
+)
+# Bytes queued per spectator before older frames are dropped
+SPECTATOR_BUFFER_LIMIT = 64 * 1024
+
+
+class SessionClosed(Exception):
+    """
+    Raised when a player disconnects or stays idle longer than allowed.
+    """
+
+
+class Spectator:
+    """
+    A connection watching a game. Broadcast data is queued per spectator
+    and written as fast as the connection takes it. When more than
+    SPECTATOR_BUFFER_LIMIT bytes are queued, everything before the latest
+    frame is dropped, so a slow spectator skips ahead instead of holding
+    on to every frame.
+
+    Args:
+        writer (asyncio.StreamWriter): Writer of the spectator's connection
+
+    Attributes:
+        writer (asyncio.StreamWriter): Writer of the spectator's connection.
+        queue (collections.deque): Queued (data, is_frame) pairs.
+        queued_bytes (int): Bytes in the queue.
+        dropped_frames (int): Frames dropped so far.
+        ready (asyncio.Event): Set when data is queued or the game ended.
+        closed (bool): Whether the watched game has ended.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.queue = deque()
+        self.queued_bytes = 0
+        self.dropped_frames = 0
+        self.ready = asyncio.Event()
+        self.closed = False
+
+    def offer(self, data, is_frame):
+        """
+        Queues broadcast data, dropping to the latest frame when the queue
+        is over its limit.
+
+        Args:
+            data (bytes): The data, shared between all spectators
+            is_frame (bool): Whether the data is a complete frame
+        """
+        self.queue.append((data, is_frame))
+        self.queued_bytes += len(data)
+        if self.queued_bytes > SPECTATOR_BUFFER_LIMIT:
+            latest_frame = max(
+                (
+                    index
+                    for index, (_, frame) in enumerate(self.queue)
+                    if frame
+                ),
+                default=len(self.queue) - 1,
+            )
+            for _ in range(latest_frame):
+                dropped, frame = self.queue.popleft()
+                self.queued_bytes -= len(dropped)
+                self.dropped_frames += frame
+        self.ready.set()
+
+    def close(self):
+        """
+        Ends the spectator's writes once the queue is sent.
+        """
+        self.closed = True
+        self.ready.set()
+
+    async def run(self):
+        """
+        Writes the queued data until the watched game has ended.
+        """
+        while self.queue or not self.closed:
+            await self.ready.wait()
+            self.ready.clear()
+            if self.queue:
+                self.writer.write(b"".join(data for data, _ in self.queue))
+                self.queue.clear()
+                self.queued_bytes = 0
+                await self.writer.drain()
+
+
+class Broadcast:
+    """
+    Fans the output of a game out to its spectators. Every frame is
+    rendered and encoded once for the player, the same bytes are queued
+    for each spectator.
+
+    Args:
+        username (str): Name of the player
+        size (int): Size of the battlefields
+
+    Attributes:
+        username (str): Name of the player.
+        size (int): Size of the battlefields.
+        spectators (set): The Spectator objects watching the game.
+        latest_frame (bytes): The last frame, shown to new spectators.
+    """
+
+    def __init__(self, username, size):
+        self.username = username
+        self.size = size
+        self.spectators = set()
+        self.latest_frame = None
+
+    def publish(self, data, is_frame=False):
+        """
+        Queues data for every spectator.
+
+        Args:
+            data (bytes): The encoded data
+            is_frame (bool): Whether the data is a complete frame
+        """
+        if is_frame:
+            self.latest_frame = data
+        for spectator in self.spectators:
+            spectator.offer(data, is_frame)
+
+    def add(self, spectator):
+        """
+        Starts sending the game to a spectator, beginning with the latest
+        frame.
+
+        Args:
+            spectator (Spectator): The new spectator
+        """
+        self.spectators.add(spectator)
+        if self.latest_frame:
+            spectator.offer(self.latest_frame, True)
+
+    def remove(self, spectator):
+        """
+        Stops sending the game to a spectator.
+
+        Args:
+            spectator (Spectator): The spectator
+        """
+        self.spectators.discard(spectator)
+
+    def close(self):
+        """
+        Ends the broadcast for all spectators, the game is over.
+        """
+        for spectator in self.spectators:
+            spectator.close()
+
+
+class SessionStream:
+    """
+    File-like wrapper around a stream writer, so a FrameRenderer can draw
+    into a session. Writes are buffered by the writer until drained. Each
+    write of the renderer is a frame, which is passed on to the broadcast
+    of the session's game.
+
+    Args:
+        writer (asyncio.StreamWriter): Writer of the player's connection
+
+    Attributes:
+        writer (asyncio.StreamWriter): Writer of the player's connection.
+        broadcast (Broadcast): Receives the frames, None without one.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.broadcast = None
+
+    def write(self, data):
+        data = data.encode()
+        self.writer.write(data)
+        if self.broadcast:
+            self.broadcast.publish(data, is_frame=True)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+class GameSession:
+    """
+    Plays the console game with a single player over a stream connection,
+    following the same flow as main() in spaceships.py.
+
+    Args:
+        reader (asyncio.StreamReader): Reader of the player's connection
+        writer (asyncio.StreamWriter): Writer of the player's connection
+        title (str): The ASCII art title shown when the session starts
+        idle_timeout (float): Seconds to wait for input before the session
+            is closed
+        stats (PhaseStats): Shared by all sessions of the server, no
+            instrumentation if None
+        broadcasts (dict): Broadcast of the running game per session id,
+            shared by all sessions of the server, no spectators if None
+        session_id (int): Identifies the session's game to spectators
+        history (HistoryStore): Shared by all sessions of the server, no
+            history if None
+        history_executor (concurrent.futures.Executor): The single thread
+            reading the history, which holds its SQLite connection
+
+    Attributes:
+        reader (asyncio.StreamReader): Reader of the player's connection
+        writer (asyncio.StreamWriter): Writer of the player's connection
+        title (str): The ASCII art title shown when the session starts
+        idle_timeout (float): Seconds to wait for input before the session
+            is closed
+        stream (SessionStream): The renderer's view of the connection
+        renderer (FrameRenderer): Draws the battlefields into the session
+        stats (PhaseStats): Records the latencies of the session's games
+        broadcasts (dict): Broadcast of the running game per session id.
+        session_id (int): Identifies the session's game to spectators.
+        history (HistoryStore): Records the finished games.
+        history_executor (concurrent.futures.Executor): Reads the history.
+    """
+
+    def __init__(
+        self,
+        reader,
+        writer,
+        title,
+        idle_timeout=IDLE_TIMEOUT,
+        stats=None,
+        broadcasts=None,
+        session_id=0,
+        history=None,
+        history_executor=None,
+    ):
+        self.reader = reader
+        self.writer = writer
+        self.title = title
+        self.idle_timeout = idle_timeout
+        self.stats = stats
+        self.broadcasts = broadcasts
+        self.session_id = session_id
+        self.history = history
+        self.history_executor = history_executor
+        self.stream = SessionStream(writer)
+        self.renderer = FrameRenderer(
+            self.stream, use_cursor=False, stats=stats
+        )
+
+    async def send(self, text="", end="\n"):
+        """
+        Sends text to the player, like print() does on the console.
+
+        Args:
+            text (str): The text to send
+            end (str): Appended after the text
+        """
+        self.writer.write((text + end).encode())
+        await self.writer.drain()
+
+    async def prompt(self, text):
+        """
+        Sends a prompt and waits for the player's answer, like input() does
+        on the console.
+
+        Args:
+            text (str): The prompt to send
+
+        Returns:
+            str: The line entered by the player, without line ending
+
+        Raises:
+            SessionClosed: If the player disconnects or stays idle too long.
+        """
+        await self.send(text, end="")
+        if self.stats:
+            start = time.perf_counter()
+        try:
+            line = await asyncio.wait_for(
+                self.reader.readline(), self.idle_timeout
+            )
+        except asyncio.TimeoutError:
+            await self.send(IDLE_MESSAGE)
+            raise SessionClosed()
+        if self.stats:
+            self.stats.record("input_wait", time.perf_counter() - start)
+        if not line:
+            raise SessionClosed()
+        return line.decode(errors="replace").rstrip("\r\n")
+
+    async def publish(self, text):
+        """
+        Sends text to the player and the spectators of the running game.
+
+        Args:
+            text (str): The text to send, followed by a line break
+        """
+        data = (text + "\n").encode()
+        self.writer.write(data)
+        if self.stream.broadcast:
+            self.stream.broadcast.publish(data)
+        await self.writer.drain()
+
+    async def spectate(self, argument):
+        """
+        Watches the running game of another session until it ends or the
+        spectator presses Enter. Without a valid session id the running
+        games are listed instead.
+
+        Args:
+            argument (str): Session id of the game to watch
+
+        Raises:
+            SessionClosed: If the spectator disconnects.
+        """
+        broadcast = None
+        if argument.isdigit():
+            broadcast = self.broadcasts.get(int(argument))
+        if broadcast is None:
+            games = [
+                f"  {SPECTATE_COMMAND} {session_id}: "
+                + f"{game.username.upper()}, {game.size}x{game.size}, "
+                + f"{len(game.spectators)} watching"
+                for session_id, game in sorted(self.broadcasts.items())
+            ]
+            await self.send(
+                "\n".join(["Running games:"] + games)
+                if games
+                else "No games are running right now."
+            )
+            return
+
+        await self.send(
+            f"Watching {broadcast.username.upper()}'s game, "
+            + "press Enter to stop."
+        )
+        spectator = Spectator(self.writer)
+        broadcast.add(spectator)
+        sender = asyncio.ensure_future(spectator.run())
+        stop = asyncio.ensure_future(self.reader.readline())
+        try:
+            done, _ = await asyncio.wait(
+                {sender, stop}, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            broadcast.remove(spectator)
+            sender.cancel()
+            stop.cancel()
+            if self.stats:
+                self.stats.count(
+                    "spectator_frames_dropped", spectator.dropped_frames
+                )
+        if stop in done and not stop.result():
+            raise SessionClosed()
+        if sender in done:
+            if sender.exception():
+                raise SessionClosed()
+            await self.send("\nThe game has ended.")
+
+    async def get_valid_username(self, style):
+        """
+        Prompts until the player enters a valid username. Entering
+        SPECTATE_COMMAND watches a running game instead, see spectate().
+
+        Args:
+            style (str): Style string for coloring the output
+
+        Returns:
+            str: The validated username
+        """
+        while True:
+            username = await self.prompt(
+                style + USERNAME_PROMPT + Style.RESET_ALL
+            )
+            if self.broadcasts is not None and username.startswith(
+                SPECTATE_COMMAND
+            ):
+                await self.spectate(username[len(SPECTATE_COMMAND):].strip())
+                continue
+            error = get_username_error(username)
+            if not error:
+                return username
+            await self.send(error)
+
+    async def get_valid_game_size(self):
+        """
+        Prompts until the player enters a valid battlefield size.
+
+        Returns:
+            int: The validated size of the battlefield
+            int: Number of spaceships participating for each player
+        """
+        while True:
+            size_input = await self.prompt(GAME_SIZE_PROMPT)
+            error = get_game_size_error(size_input)
+            if not error:
+                size = int(size_input)
+                return size, get_number_of_ships(size)
+            await self.send(error)
+
+    async def play_round(self, game):
+        """
+        Plays a single round, see SpaceShipsGame.play_round().
+
+        Args:
+            game (SpaceShipsGame): The game being played
+        """
+        if self.stats:
+            start = time.perf_counter()
+            game.draw_battlefields()
+            self.stats.record("render", time.perf_counter() - start)
+        else:
+            game.draw_battlefields()
+        await self.send("\nUser's turn to fire!")
+
+        while True:
+            volley_input = await self.prompt(TARGET_PROMPT)
+            # The computer's turn uses its whole time budget or waits for
+            # the sampler pool, the other sessions go on meanwhile
+            outcome = await asyncio.to_thread(game.submit_volley, volley_input)
+            if outcome["error"]:
+                if self.stats:
+                    self.stats.count("invalid_targets")
+                await self.send(outcome["error"])
+            elif outcome["viewport_moved"]:
+                game.draw_battlefields()
+            elif outcome["turn_over"]:
+                break
+
+        if outcome["winner"] == "user":
+            await self.publish("All enemy ships have been hit!")
+            return
+
+        await self.send("\nComputer's turn to fire!")
+        if outcome["winner"] == "computer":
+            await self.publish("All your ships have been hit! Computer wins!")
+
+        summary = game.format_turn_summary(MAGENTA_WHITE_STYLE)
+        await self.publish(
+            coalesce_styles(summary) if self.renderer.coalesce else summary
+        )
+
+    async def record_game(self, game):
+        """
+        Records a finished game in the history and shows the player's rank,
+        like main() in spaceships.py.
+
+        Args:
+            game (SpaceShipsGame): The finished game
+        """
+        if not self.history:
+            return
+        start = time.perf_counter()
+        self.history.record(game)
+        rank = await asyncio.get_running_loop().run_in_executor(
+            self.history_executor,
+            self.history.get_rank,
+            game.username,
+            game.size,
+        )
+        if self.stats:
+            self.stats.record("leaderboard", time.perf_counter() - start)
+        if not self.history.failed:
+            await self.send(format_rank(game.size, rank))
+
+    async def run(self):
+        """
+        Runs the session until the player quits, disconnects or idles out.
+        """
+        await self.send(
+            MAGENTA_CYAN_STYLE + "\n" + "\n" + "\n" + self.title
+            + Style.RESET_ALL
+        )
+        if self.broadcasts is not None:
+            await self.send(SPECTATE_HINT)
+
+        play_again = True
+        while play_again:
+            username = await self.get_valid_username(MAGENTA_WHITE_STYLE)
+            await self.send(format_rules(MAGENTA_WHITE_STYLE, username))
+            size, number_of_ships = await self.get_valid_game_size()
+            game = SpaceShipsGame(
+                size,
+                number_of_ships,
+                username,
+                renderer=self.renderer,
+                stats=self.stats,
+            )
+            if self.broadcasts is not None:
+                self.stream.broadcast = Broadcast(username, size)
+                self.broadcasts[self.session_id] = self.stream.broadcast
+            try:
+                while not game.get_winner():
+                    await self.play_round(game)
+                await self.publish(
+                    game.format_winner_message(MAGENTA_WHITE_STYLE)
+                )
+                await self.record_game(game)
+            finally:
+                if self.stream.broadcast:
+                    self.stream.broadcast.close()
+                    del self.broadcasts[self.session_id]
+                    self.stream.broadcast = None
+                await asyncio.to_thread(save_event_log, game)
+
+            response = (await self.prompt(PLAY_AGAIN_PROMPT)).lower()
+            play_again = response == "yes"
+
+            if play_again:
+                await self.send("\nStarting a new game...\n")
+            else:
+                await self.send(
+                    "\nThank you for playing! See you next time.\n"
+                )
+
+
+class GameServer:
+    """
+    Hosts many game sessions in a single process, one asyncio task per
+    connected player.
+
+    Args:
+        max_sessions (int): Maximum number of concurrent sessions, further
+            connections are turned away
+        idle_timeout (float): Seconds a session may wait for input
+        stats (PhaseStats): Records the latencies of all sessions, no
+            instrumentation if None
+        history (HistoryStore): Records the games of all sessions, no
+            history if None
+
+    Attributes:
+        max_sessions (int): Maximum number of concurrent sessions.
+        idle_timeout (float): Seconds a session may wait for input.
+        title (str): The ASCII art title, loaded once for all sessions.
+        sessions (set): The running GameSession objects.
+        stats (PhaseStats): Records the latencies of all sessions.
+        broadcasts (dict): Broadcast of every running game per session id,
+            for spectators.
+        session_ids (itertools.count): Numbers the sessions.
+        history (HistoryStore): Records the games of all sessions.
+        history_executor (concurrent.futures.ThreadPoolExecutor): The
+            single thread reading the history, SQLite connections stay on
+            the thread that opened them.
+    """
+
+    def __init__(
+        self,
+        max_sessions=MAX_SESSIONS,
+        idle_timeout=IDLE_TIMEOUT,
+        stats=None,
+        history=None,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.title = get_title()
+        self.sessions = set()
+        self.stats = stats
+        self.broadcasts = {}
+        self.session_ids = itertools.count(1)
+        self.history = history
+        self.history_executor = ThreadPoolExecutor(1)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Runs a session for a new connection, or turns it away when the
+        server is full.
+
+        Args:
+            reader (asyncio.StreamReader): Reader of the new connection
+            writer (asyncio.StreamWriter): Writer of the new connection
+        """
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(SERVER_FULL_MESSAGE.encode())
+        else:
+            session = GameSession(
+                reader,
+                writer,
+                self.title,
+                self.idle_timeout,
+                self.stats,
+                self.broadcasts,
+                next(self.session_ids),
+                self.history,
+                self.history_executor,
+            )
+            self.sessions.add(session)
+            try:
+                await session.run()
+            except (SessionClosed, ConnectionError):
+                pass
+            finally:
+                self.sessions.discard(session)
+
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        """
+        Accepts connections until cancelled.
+
+        Args:
+            host (str): Interface to listen on for TCP connections
+            port (int): Port to listen on for TCP connections
+            path (str): Listen on this Unix socket instead of TCP if given
+        """
+        if path:
+            server = await asyncio.start_unix_server(
+                self.handle_connection, path
+            )
+        else:
+            server = await asyncio.start_server(
+                self.handle_connection, host, port
+            )
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        """
+        Closes the history once the server has stopped, on the thread that
+        reads it.
+        """
+        if self.history:
+            self.history_executor.submit(self.history.close).result()
+        self.history_executor.shutdown()
+
+
+def main():
+    """
+    Starts the game server from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Hosts many SpaceShips sessions in one process."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="path of a Unix socket to listen on")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT)
+    parser.add_argument(
+        "--stats-file", help="write phase latencies here on shutdown"
+    )
+    args = parser.parse_args()
+
+    stats = PhaseStats() if args.stats_file else None
+    server = GameServer(
+        args.max_sessions, args.idle_timeout, stats, open_history()
+    )
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if stats:
+            stats.dump(args.stats_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# Imports
+import argparse
+from functools import lru_cache
+
+import numpy as np
+
+from spaceships import (
+    BATTLEFIELD_MAX_SIZE,
+    BATTLEFIELD_MIN_SIZE,
+    NUMBER_OF_MISSILES,
+    get_number_of_ships,
+    get_spaceship_placements,
+)
+
+# Constants
+DEFAULT_NUMBER_OF_GAMES = 10000
+
+
+@lru_cache(maxsize=None)
+def get_placement_array(size):
+    """
+    Dense masks of every legal 'L' spaceship placement on a battlefield,
+    index-aligned with get_spaceship_placements().
+
+    Args:
+        size (int): Size of the square battlefield
+
+    Returns:
+        numpy.ndarray: Bool array of shape (placements, size * size), one
+            flattened battlefield mask per placement
+    """
+    placements = get_spaceship_placements(size)
+    masks = np.zeros((len(placements), size * size), dtype=bool)
+    for index, coords in enumerate(placements):
+        masks[index, [r * size + c for r, c in coords]] = True
+    masks.flags.writeable = False
+    return masks
+
+
+def place_fleets(size, number_of_ships, games, rng):
+    """
+    Places a full fleet on each of a stack of battlefields. Every spaceship
+    is drawn uniformly from the placements that do not overlap the ships
+    already placed, which matches the rejection sampling of the game.
+
+    Args:
+        size (int): Size of the square battlefields
+        number_of_ships (int): Number of spaceships per battlefield
+        games (int): Number of battlefields to place fleets on
+        rng (numpy.random.Generator): Source of randomness
+
+    Returns:
+        numpy.ndarray: Bool array of shape (games, size, size), True where a
+            spaceship segment is placed
+    """
+    masks = get_placement_array(size)
+    # Float matmul runs on BLAS, integer matmul does not
+    masks_t = masks.T.astype(np.float32)
+    occupied = np.zeros((games, size * size), dtype=bool)
+    pending = np.arange(games)
+
+    while len(pending):
+        fleets = np.zeros((len(pending), size * size), dtype=bool)
+        stuck = np.zeros(len(pending), dtype=bool)
+        for _ in range(number_of_ships):
+            overlaps = fleets.astype(np.float32) @ masks_t
+            scores = rng.random(overlaps.shape)
+            scores[overlaps > 0] = -1.0
+            choice = scores.argmax(axis=1)
+            stuck |= scores[np.arange(len(pending)), choice] < 0
+            fleets |= masks[choice]
+        occupied[pending[~stuck]] = fleets[~stuck]
+        # Fleets that ran out of free placements are placed again
+        pending = pending[stuck]
+
+    return occupied.reshape(games, size, size)
+
+
+def turns_to_destroy(fleets, rng):
+    """
+    Fires missiles on a stack of battlefields in random order, like
+    SpaceShipsGame.computer_turn, and counts the turns needed to hit every
+    spaceship segment.
+
+    Args:
+        fleets (numpy.ndarray): Bool array of shape (games, size, size)
+        rng (numpy.random.Generator): Source of randomness
+
+    Returns:
+        numpy.ndarray: Int array of shape (games,), the turn in which the
+            last spaceship segment of each battlefield is hit
+    """
+    games = len(fleets)
+    flat = fleets.reshape(games, -1)
+    # A random permutation gives the shot number each cell is fired on
+    shot_order = np.argsort(rng.random(flat.shape), axis=1)
+    last_shot = np.where(flat, shot_order, -1).max(axis=1)
+    return last_shot // NUMBER_OF_MISSILES + 1
+
+
+def simulate_games(size, games, rng):
+    """
+    Simulates a batch of games on one battlefield size. Both sides fire at
+    random, the user fires first in every round.
+
+    Args:
+        size (int): Size of the square battlefields
+        games (int): Number of games to simulate
+        rng (numpy.random.Generator): Source of randomness
+
+    Returns:
+        dict: Summary of the batch, with the user's win rate, the mean number
+            of turns and the distribution of turns to win, where index n
+            holds the number of games that ended in turn n
+    """
+    number_of_ships = get_number_of_ships(size)
+    user_turns = turns_to_destroy(
+        place_fleets(size, number_of_ships, games, rng), rng
+    )
+    computer_turns = turns_to_destroy(
+        place_fleets(size, number_of_ships, games, rng), rng
+    )
+    user_wins = user_turns <= computer_turns
+    turns = np.minimum(user_turns, computer_turns)
+
+    return {
+        "size": size,
+        "number_of_ships": number_of_ships,
+        "games": games,
+        "user_win_rate": float(user_wins.mean()),
+        "mean_turns": float(turns.mean()),
+        "turns_to_win": np.bincount(turns),
+    }
+
+
+def simulate(sizes, games, seed=None):
+    """
+    Simulates a batch of games for every given battlefield size.
+
+    Args:
+        sizes (iterable of int): Battlefield sizes to simulate
+        games (int): Number of games per battlefield size
+        seed (int): Seed for the random generator, random if None
+
+    Returns:
+        list of dict: One summary per size, see simulate_games()
+    """
+    rng = np.random.default_rng(seed)
+    return [simulate_games(size, games, rng) for size in sizes]
+
+
+def main():
+    """
+    Runs the simulator from the command line and prints a summary per size.
+    """
+    parser = argparse.ArgumentParser(
+        description="Batch self-play simulator for SpaceShips."
+    )
+    parser.add_argument(
+        "--games", type=int, default=DEFAULT_NUMBER_OF_GAMES
+    )
+    parser.add_argument("--min-size", type=int, default=BATTLEFIELD_MIN_SIZE)
+    parser.add_argument("--max-size", type=int, default=BATTLEFIELD_MAX_SIZE)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    results = simulate(
+        range(args.min_size, args.max_size + 1), args.games, args.seed
+    )
+    print("size  ships  user win rate  mean turns  turns to win")
+    for result in results:
+        turns = result["turns_to_win"]
+        first, last = np.flatnonzero(turns)[[0, -1]]
+        print(
+            f"{result['size']:4d}  {result['number_of_ships']:5d}"
+            + f"  {result['user_win_rate']:13.3f}"
+            + f"  {result['mean_turns']:10.2f}  {first}-{last}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4999 @@
+# Imports
+import os
+import random
+import re
+import string
+import sys
+import math
+import struct
+import time
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from colorama import Back, Fore, Style
+
+# Constants
+MAGENTA_CYAN_STYLE = Fore.CYAN + Style.BRIGHT + Back.MAGENTA
+MAGENTA_WHITE_STYLE = Fore.WHITE + Style.BRIGHT + Back.MAGENTA
+BLUE_WHITE_STYLE = Fore.WHITE + Back.BLUE
+RED_WHITE_STYLE = Fore.WHITE + Back.RED
+GREEN_WHITE_STYLE = Fore.WHITE + Back.GREEN
+NUMBER_OF_DEFAULT_SHIPS = 3
+NUMBER_OF_MISSILES = NUMBER_OF_DEFAULT_SHIPS
+NUMBER_OF_DEFAULT_SHIP_SEGMENTS = 3
+BATTLEFIELD_MIN_SIZE = 4
+BATTLEFIELD_MAX_SIZE = 10
+LARGE_BATTLEFIELD_MIN_SIZE = 100
+LARGE_BATTLEFIELD_MAX_SIZE = 1000
+LARGE_PLACEMENT_DRAWS = 1000
+VIEWPORT_SIZE = 10
+VIEWPORT_COMMAND = "@"
+HIDE_COMPUTER_SHIPS = True
+USERNAME_LENGTH_FLOOR = 3
+USERNAME_LENGTH_CEIL = 8
+L_SHIP = "\u255a"
+CELL_EMPTY = 0
+CELL_SHIP = 1
+CELL_HIT = 2
+CELL_MISS = 3
+CELL_STATE_MASK = 0b11
+CELL_SHIP_ID_SHIFT = 2
+# Maps an encoded cell to its state code
+CELL_STATES = bytes(cell & CELL_STATE_MASK for cell in range(256))
+CELL_SYMBOLS = {CELL_EMPTY: "-", CELL_SHIP: "o", CELL_HIT: "x", CELL_MISS: "*"}
+AI_MODE_RANDOM = "random"
+AI_MODE_DENSITY = "density"
+AI_MODE_POSTERIOR = "posterior"
+AI_MODE_EXPERT = "expert"
+AI_MODE_ANYTIME = "anytime"
+COMPUTER_AI_MODE = AI_MODE_RANDOM
+PLACEMENT_MODE_RANDOM = "random"
+PLACEMENT_MODE_SPREAD = "spread"
+COMPUTER_PLACEMENT_MODE = PLACEMENT_MODE_RANDOM
+DENSITY_HIT_WEIGHT = 10
+POSTERIOR_SAMPLE_BUDGET = 20000
+POSTERIOR_FILL_DRAWS = 20
+COMPUTER_TIME_BUDGET = 0.02
+# Seconds per target of the searching AIs when they are asked for a target
+# without a deadline, computer_turn() always passes its own deadlines
+TARGET_TIME_BUDGET = COMPUTER_TIME_BUDGET / NUMBER_OF_MISSILES
+ANYTIME_SAMPLE_BUDGET = 20000
+ANYTIME_MIN_SAMPLES = 16
+EXACT_SOLVER_MAX_SIZE = 6
+EXACT_CACHE_SIZE = 4096
+USE_CURSOR_RENDERING = True
+COALESCE_STYLES = True
+RENDER_MESSAGE_ROWS = 6
+RENDER_MIN_MESSAGE_ROWS = 2
+COALESCE_CACHE_SIZE = 1024
+TITLE_FONT = "computer"
+TITLE_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "assets",
+    f"title_{TITLE_FONT}.txt",
+)
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+# Escapes in terminal output, split off the text between them
+ESCAPE_SPLIT = re.compile(r"(\x1b\[[0-9;]*[A-Za-z]|\x1b[78])")
+# Escapes other than SGR, e.g. moving the cursor or erasing
+CONTROL_ESCAPE = re.compile(r"\x1b(\[[0-9;]*[A-Za-ln-z]|[78])")
+# Escapes that only move the cursor, unlike erasing they ignore the style
+CURSOR_COMMANDS = "ABCDEFGHdfr"
+# Normal intensity, default foreground and background, the state after a
+# reset
+SGR_DEFAULT = ("22", "39", "49")
+# Style of a terminal whose attributes the output has not set yet
+SGR_UNSET = (None, None, None)
+TARGET_PATTERN = re.compile(r"([A-Z]+)([0-9]+)")
+VOLLEY_SEPARATOR = re.compile(r"[\s,]+")
+USERNAME_PROMPT = (
+    "\n\nWhat's your name captain?, enter a username with a length "
+    + f"between {USERNAME_LENGTH_FLOOR} "
+    + f"and {USERNAME_LENGTH_CEIL} chars:  "
+)
+GAME_SIZE_PROMPT = (
+    "Enter the size of the battlefield, size should be between"
+    + f" {BATTLEFIELD_MIN_SIZE} and {BATTLEFIELD_MAX_SIZE}\n"
+    + f"(or {LARGE_BATTLEFIELD_MIN_SIZE} to {LARGE_BATTLEFIELD_MAX_SIZE}"
+    + " for a large battlefield): "
+)
+TARGET_PROMPT = "Enter target coordinates (e.g., A1 or A1 B3 C4): "
+PLAY_AGAIN_PROMPT = "\nWould you like to play another round? (yes/no): "
+RESUME_PROMPT = "\nYour last game was interrupted, resume it? (yes/no): "
+SNAPSHOT_MAGIC = b"SSG"
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct("!3sBBBBBHIB")
+SNAPSHOT_AI_MODES = (
+    AI_MODE_RANDOM,
+    AI_MODE_DENSITY,
+    AI_MODE_POSTERIOR,
+    AI_MODE_EXPERT,
+    AI_MODE_ANYTIME,
+)
+SNAPSHOT_DIR_VARIABLE = "SPACESHIPS_SNAPSHOT_DIR"
+SESSION_ID_VARIABLE = "SPACESHIPS_SESSION_ID"
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+OPENING_BOOK_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "assets", "opening_book.bin"
+)
+OPENING_BOOK_MAGIC = b"SSO"
+OPENING_BOOK_VERSION = 1
+OPENING_BOOK_HEADER = struct.Struct("!3sBB")
+OPENING_BOOK_ENTRY = struct.Struct("!BBII")
+OPENING_BOOK_SCALE = 65535
+PROTOCOL_VARIABLE = "SPACESHIPS_PROTOCOL"
+PROTOCOL_JSON_LINES = "jsonl"
+PROTOCOL_VERSION = 1
+EVENT_LOG_VERSION = 2
+EVENT_SAMPLES = 0b100
+EVENT_COMPUTER = 0b10
+EVENT_HIT = 0b01
+EVENT_LOG_DIR_VARIABLE = "SPACESHIPS_EVENT_LOG_DIR"
+STATS_FILE_VARIABLE = "SPACESHIPS_STATS_FILE"
+STATS_HISTOGRAM_BUCKETS = 32
+HISTORY_PATH_VARIABLE = "SPACESHIPS_HISTORY_DB"
+DATA_HOME_VARIABLE = "XDG_DATA_HOME"
+HISTORY_BATCH_SIZE = 4096
+HISTORY_BUSY_TIMEOUT = 5.0
+HISTORY_CACHE_KIB = 16384
+LEADERBOARD_SIZE = 10
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL COLLATE NOCASE,
+    size INTEGER NOT NULL,
+    number_of_ships INTEGER NOT NULL,
+    number_of_turns INTEGER NOT NULL,
+    user_hits INTEGER NOT NULL,
+    computer_hits INTEGER NOT NULL,
+    winner TEXT NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_by_user ON games (username, finished_at);
+CREATE TABLE IF NOT EXISTS players (
+    username TEXT NOT NULL COLLATE NOCASE,
+    size INTEGER NOT NULL,
+    games INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    best_turns INTEGER,
+    PRIMARY KEY (username, size)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS players_by_size
+    ON players (size, best_turns, wins DESC);
+CREATE TABLE IF NOT EXISTS rank_counts (
+    size INTEGER NOT NULL,
+    best_turns INTEGER NOT NULL,
+    players INTEGER NOT NULL,
+    PRIMARY KEY (size, best_turns)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS count_first_win
+AFTER INSERT ON players WHEN new.best_turns IS NOT NULL
+BEGIN
+    INSERT INTO rank_counts VALUES (new.size, new.best_turns, 1)
+        ON CONFLICT DO UPDATE SET players = players + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS count_faster_win
+AFTER UPDATE OF best_turns ON players
+WHEN new.best_turns IS NOT old.best_turns
+BEGIN
+    UPDATE rank_counts SET players = players - 1
+        WHERE size = old.size AND best_turns = old.best_turns;
+    INSERT INTO rank_counts VALUES (new.size, new.best_turns, 1)
+        ON CONFLICT DO UPDATE SET players = players + 1;
+END;
+"""
+
+
+def spaceship_coordinates(size, row, col, orientation):
+    """
+    Generates the coordinates of an 'L' shaped spaceship with its corner at
+    (row, col), if it fits on a battlefield of the given size.
+
+    Args:
+        size (int): Size of the square battlefield
+        row (int): The row coord. of the spaceship's corner
+        col (int): The column coord. of the spaceship's corner
+        orientation (int): Orientation of the spaceship, from 1 to 4
+
+    Returns:
+        list of tuples: All segment coordinates of the spaceship, None if the
+            spaceship does not fit on the battlefield
+    """
+    if orientation == 1 and row < size - 1 and col < size - 1:
+        return [(row, col), (row + 1, col), (row, col + 1)]
+    elif orientation == 2 and row < size - 1 and col > 0:
+        return [(row, col), (row + 1, col), (row, col - 1)]
+    elif orientation == 3 and row > 0 and col > 0:
+        return [(row, col), (row - 1, col), (row, col - 1)]
+    elif orientation == 4 and row > 0 and col < size - 1:
+        return [(row, col), (row - 1, col), (row, col + 1)]
+    return None
+
+
+def get_number_of_ships(size):
+    """
+    Number of spaceships each player gets, grows with the battlefield size.
+
+    Args:
+        size (int): Size of the square battlefield
+
+    Returns:
+        int: Number of spaceships participating for each player
+    """
+    return size - (BATTLEFIELD_MIN_SIZE - NUMBER_OF_DEFAULT_SHIPS)
+
+
+def is_large_battlefield(size):
+    """
+    Whether a battlefield size is played in the large battlefield mode,
+    with sparse battlefields and a viewport.
+
+    Args:
+        size (int): Size of the square battlefield
+
+    Returns:
+        bool: True for sizes above BATTLEFIELD_MAX_SIZE
+    """
+    return size > BATTLEFIELD_MAX_SIZE
+
+
+@lru_cache(maxsize=None)
+def get_column_label(col):
+    """
+    Label of a column, A to Z followed by AA, AB and so on.
+
+    Args:
+        col (int): Index of the column
+
+    Returns:
+        str: The column label
+    """
+    label = ""
+    col += 1
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        label = string.ascii_uppercase[remainder] + label
+    return label
+
+
+@lru_cache(maxsize=COALESCE_CACHE_SIZE)
+def get_row_label(style, row, width):
+    """
+    Styled index of a battlefield row, followed by the left border.
+
+    Args:
+        style (str): Style string for coloring the index
+        row (int): Index of the row
+        width (int): Width of the index
+
+    Returns:
+        str: The row label segment
+    """
+    return style + f"{row + 1:{width}d}" + " " + Style.RESET_ALL + "|"
+
+
+def get_column_index(label):
+    """
+    Index of a column label, see get_column_label().
+
+    Args:
+        label (str): The upper-case column label
+
+    Returns:
+        int: Index of the column
+    """
+    col = 0
+    for letter in label:
+        col = col * 26 + string.ascii_uppercase.index(letter) + 1
+    return col - 1
+
+
+def format_target(row, col):
+    """
+    Formats coordinates the way the user enters them, e.g. 'A1'.
+
+    Args:
+        row (int): Row index of the target
+        col (int): Column index of the target
+
+    Returns:
+        str: The target coordinates
+    """
+    return get_column_label(col) + str(row + 1)
+
+
+def encode_event(player, cell, result):
+    """
+    Packs a missile fired into a single integer of the event log: the cell
+    shifted left by three bits, with EVENT_COMPUTER set for the computer's
+    missiles and EVENT_HIT for hits.
+
+    Args:
+        player (str): 'u' for the user or 'c' for the computer
+        cell (int): The cell fired on, row * size + col
+        result (str): 'hit' or 'miss'
+
+    Returns:
+        int: The event
+    """
+    return (
+        cell << 3
+        | (EVENT_COMPUTER if player == "c" else 0)
+        | (EVENT_HIT if result == "hit" else 0)
+    )
+
+
+def encode_samples(count):
+    """
+    Packs the number of fleets a worker sampled for the computer's next
+    target into a single integer of the event log, see
+    TargetingStrategy.sample_counts.
+
+    Args:
+        count (int): Number of consistent fleets sampled
+
+    Returns:
+        int: The event
+    """
+    return count << 3 | EVENT_SAMPLES
+
+
+def format_event(event):
+    """
+    Formats an event of the event log as a line of the log file,
+    '<player> <cell> <result>' for missiles and 's <count>' for samples.
+
+    Args:
+        event (int): The event, see encode_event() and encode_samples()
+
+    Returns:
+        str: The line
+    """
+    if event & EVENT_SAMPLES:
+        return f"s {event >> 3}"
+    player = "c" if event & EVENT_COMPUTER else "u"
+    result = "hit" if event & EVENT_HIT else "miss"
+    return f"{player} {event >> 3} {result}"
+
+
+@lru_cache(maxsize=None)
+def get_spaceship_placements(size):
+    """
+    Enumerates every legal 'L' spaceship placement on a battlefield. The
+    result is cached per size and shared between games.
+
+    Args:
+        size (int): Size of the square battlefield
+
+    Returns:
+        tuple of tuples: The segment coordinates of every placement
+    """
+    return tuple(
+        tuple(coords)
+        for row in range(size)
+        for col in range(size)
+        for orientation in range(1, 5)
+        if (coords := spaceship_coordinates(size, row, col, orientation))
+    )
+
+
+@lru_cache(maxsize=None)
+def get_cell_placements(size):
+    """
+    Indices of the spaceship placements covering each cell, row-major.
+    Index-aligned with get_spaceship_placements() and cached per size.
+
+    Args:
+        size (int): Size of the square battlefield
+
+    Returns:
+        tuple of tuples: The placement indices of every cell
+    """
+    cell_placements = [[] for _ in range(size * size)]
+    for index, coords in enumerate(get_spaceship_placements(size)):
+        for row, col in coords:
+            cell_placements[row * size + col].append(index)
+    return tuple(tuple(indices) for indices in cell_placements)
+
+
+@lru_cache(maxsize=None)
+def get_placement_masks(size):
+    """
+    Bitmasks of every legal spaceship placement, bit (row * size + col) is
+    set for each segment. Index-aligned with get_spaceship_placements() and
+    cached per size.
+
+    Args:
+        size (int): Size of the square battlefield
+
+    Returns:
+        tuple of int: One bitmask per placement
+    """
+    return tuple(
+        sum(1 << (row * size + col) for row, col in coords)
+        for coords in get_spaceship_placements(size)
+    )
+
+
+@lru_cache(maxsize=None)
+def get_placement_halo_masks(size):
+    """
+    Bitmasks of the cells around every legal spaceship placement, the
+    eight neighbours of each segment that are not part of the placement.
+    Index-aligned with get_spaceship_placements() and cached per size.
+
+    Args:
+        size (int): Size of the square battlefield
+
+    Returns:
+        tuple of int: One bitmask per placement
+    """
+    halos = []
+    for coords, mask in zip(
+        get_spaceship_placements(size), get_placement_masks(size)
+    ):
+        halo = 0
+        for row, col in coords:
+            for r in range(max(row - 1, 0), min(row + 2, size)):
+                for c in range(max(col - 1, 0), min(col + 2, size)):
+                    halo |= 1 << (r * size + c)
+        halos.append(halo & ~mask)
+    return tuple(halos)
+
+
+class AttemptSet:
+    """
+    Interface of the sets of cells (row, col) a player has fired on, see
+    create_attempt_set(). Cells are iterated in row-major order.
+
+    Args:
+        size (int): Size of the targeted battlefield
+
+    Attributes:
+        size (int): Size of the targeted battlefield.
+    """
+
+    __slots__ = ("size",)
+
+    def __init__(self, size):
+        self.size = size
+
+    def add(self, target):
+        """
+        Adds a cell.
+
+        Args:
+            target (tuple of int): Coordinates (row, col).
+        """
+        raise NotImplementedError
+
+    def update(self, targets):
+        """
+        Adds several cells.
+
+        Args:
+            targets (iterable of tuples): Coordinates (row, col).
+        """
+        for target in targets:
+            self.add(target)
+
+    def clear(self):
+        """
+        Removes all cells.
+        """
+        raise NotImplementedError
+
+
+class BitsetAttemptSet(AttemptSet):
+    """
+    Attempt set of the regular battlefields, see AttemptSet, stored as a
+    bitset with bit (row * size + col) set per cell.
+
+    Attributes:
+        mask (int): The bitset.
+    """
+
+    __slots__ = ("mask",)
+
+    def __init__(self, size):
+        super().__init__(size)
+        self.mask = 0
+
+    def __contains__(self, target):
+        row, col = target
+        return bool(self.mask >> (row * self.size + col) & 1)
+
+    def __iter__(self):
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            yield divmod(low.bit_length() - 1, self.size)
+            mask ^= low
+
+    def __len__(self):
+        return bin(self.mask).count("1")
+
+    def add(self, target):
+        """
+        See AttemptSet.add().
+        """
+        row, col = target
+        self.mask |= 1 << (row * self.size + col)
+
+    def clear(self):
+        """
+        See AttemptSet.clear().
+        """
+        self.mask = 0
+
+
+class SparseAttemptSet(AttemptSet):
+    """
+    Attempt set of a large battlefield, see AttemptSet. The cells are kept
+    as a sorted array of indices, 8 bytes per cell fired on. A bitset would
+    hold a bit for each of up to a million cells and be copied on every
+    shot.
+
+    Attributes:
+        cells (array of int): The cells, row * size + col, sorted.
+    """
+
+    __slots__ = ("cells",)
+
+    def __init__(self, size):
+        super().__init__(size)
+        self.cells = array("L")
+
+    def __contains__(self, target):
+        row, col = target
+        cell = row * self.size + col
+        index = bisect_left(self.cells, cell)
+        return index < len(self.cells) and self.cells[index] == cell
+
+    def __iter__(self):
+        for cell in self.cells:
+            yield divmod(cell, self.size)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def add(self, target):
+        """
+        See AttemptSet.add().
+        """
+        row, col = target
+        cell = row * self.size + col
+        index = bisect_left(self.cells, cell)
+        if index == len(self.cells) or self.cells[index] != cell:
+            self.cells.insert(index, cell)
+
+    def clear(self):
+        """
+        See AttemptSet.clear().
+        """
+        del self.cells[:]
+
+
+def create_attempt_set(size):
+    """
+    Creates an empty attempt set fitting the battlefield size.
+
+    Args:
+        size (int): Size of the targeted battlefield
+
+    Returns:
+        AttemptSet: A SparseAttemptSet for large battlefields, a
+            BitsetAttemptSet otherwise
+    """
+    if is_large_battlefield(size):
+        return SparseAttemptSet(size)
+    return BitsetAttemptSet(size)
+
+
+class TurnData:
+    """
+    Progress of a player firing on the other player's battlefield.
+
+    Args:
+        size (int): Size of the targeted battlefield
+
+    Attributes:
+        total_hits (int): Spaceship segments hit so far.
+        number_of_turns (int): Turns started so far, only counted for the
+            user.
+        previous_attempts (AttemptSet): Every cell fired on.
+        current_turn_attempts (list of tuples): Cells fired on in the
+            current turn, in the order they were fired on.
+    """
+
+    __slots__ = (
+        "total_hits",
+        "number_of_turns",
+        "previous_attempts",
+        "current_turn_attempts",
+    )
+
+    def __init__(self, size):
+        self.total_hits = 0
+        self.number_of_turns = 0
+        self.previous_attempts = create_attempt_set(size)
+        self.current_turn_attempts = []
+
+
+class TargetingStrategy:
+    """
+    Interface of the computer's targeting strategies. A strategy picks the
+    cells to fire on and learns from the result of every shot on the
+    battlefield it targets. Strategies are registered by name in
+    TARGETING_STRATEGIES.
+
+    Args:
+        size (int): Size of the targeted battlefield
+        rng (random.Random): Source of randomness, the random module if None
+
+    Attributes:
+        size (int): Size of the targeted battlefield.
+        rng (random.Random): Source of randomness.
+        depth (str): How far the search for the last target got, None for
+            strategies that do not search.
+        samples (int): Fleets sampled for the last target.
+        sample_counts (tuple of int): Fleets sampled by each worker for the
+            last target, None if the strategy did not sample for it. Games
+            log them, as sampling against a deadline draws a different
+            number of fleets every time.
+        planned_samples (collections.deque): sample_counts of the coming
+            targets, drawn instead of sampling against a deadline, see
+            plan_samples(). None if the strategy samples against deadlines.
+        fixed_samples (int): Fleets drawn for every target instead of
+            sampling against a deadline, see fix_samples(). None if the
+            strategy samples against deadlines.
+    """
+
+    depth = None
+    samples = 0
+    sample_counts = None
+    planned_samples = None
+    fixed_samples = None
+
+    def __init__(self, size, rng=None):
+        self.size = size
+        self.rng = rng or random
+
+    @classmethod
+    def create(cls, size, number_of_ships, rng=None):
+        """
+        Creates the strategy for a game.
+
+        Args:
+            size (int): Size of the targeted battlefield
+            number_of_ships (int): Number of spaceships of the targeted
+                fleet
+            rng (random.Random): Source of randomness
+
+        Returns:
+            TargetingStrategy: The new strategy
+        """
+        return cls(size, rng)
+
+    def choose_target(self, deadline=None):
+        """
+        Picks a cell that has not been fired upon yet. Strategies that search
+        for their target stop refining it at the deadline and return the
+        best target found by then.
+
+        Args:
+            deadline (float): time.perf_counter() value by which the target
+                is needed, None for no deadline
+
+        Returns:
+            tuple: Target coordinates (row, col).
+        """
+        raise NotImplementedError
+
+    def update(self, target, result):
+        """
+        Learns from the result of a shot.
+
+        Args:
+            target (tuple of int): Coordinates (row, col) fired upon.
+            result (str): 'hit' or 'miss', as returned by fire_missile().
+        """
+        raise NotImplementedError
+
+    def plan_samples(self, sample_counts):
+        """
+        Makes the coming targets draw exactly the logged numbers of fleets
+        instead of sampling against their deadlines, so a replay picks the
+        same targets as the logged game. Strategies that do not sample
+        ignore the plan.
+
+        Args:
+            sample_counts (iterable): sample_counts of each coming target,
+                in firing order
+        """
+        from collections import deque
+
+        self.planned_samples = deque(sample_counts)
+
+    def fix_samples(self, samples):
+        """
+        Makes every coming target draw the same number of fleets instead of
+        sampling against its deadline, so the strength of the strategy does
+        not depend on the speed or load of the machine, e.g. in
+        tournaments. Logged sample counts of plan_samples() take
+        precedence. Strategies that do not sample ignore the number.
+
+        Args:
+            samples (int): Fleets to draw per target
+        """
+        self.fixed_samples = samples
+
+
+class RandomTargeting(TargetingStrategy):
+    """
+    Targeting strategy that fires on random cells it has not fired on yet.
+
+    Args:
+        size (int): Size of the targeted battlefield
+        rng (random.Random): Source of randomness, the random module if None
+
+    Attributes:
+        fired (AttemptSet): Cells that have been fired on.
+    """
+
+    def __init__(self, size, rng=None):
+        super().__init__(size, rng)
+        self.fired = create_attempt_set(size)
+
+    def choose_target(self, deadline=None):
+        """
+        Draws random cells until one has not been fired upon.
+
+        Args:
+            deadline (float): Not used, random targets are picked at once
+
+        Returns:
+            tuple: Target coordinates (row, col).
+        """
+        while True:
+            target = (
+                self.rng.randint(0, self.size - 1),
+                self.rng.randint(0, self.size - 1),
+            )
+            if target not in self.fired:
+                return target
+
+    def update(self, target, result):
+        """
+        Remembers the cell fired on, see TargetingStrategy.update().
+        """
+        self.fired.add(target)
+
+
+class DensityTargeting(TargetingStrategy):
+    """
+    Targeting AI that fires on the cells covered by the most spaceship
+    placements still possible. Placements covering a miss are ruled out,
+    placements covering hits are weighted up by DENSITY_HIT_WEIGHT per hit.
+    The per-cell densities are updated incrementally after every shot.
+
+    Args:
+        size (int): Size of the targeted battlefield
+        rng (random.Random): Breaks ties between targets, the random module
+            if None
+
+    Attributes:
+        size (int): Size of the targeted battlefield.
+        rng (random.Random): Breaks ties between targets.
+        placements (tuple of tuples): All legal spaceship placements.
+        placement_weights (list of int): Weight of each placement, 0 once
+            the placement is ruled out.
+        cell_placements (tuple of tuples): Indices of the placements
+            covering each cell, row-major, shared between games.
+        density (list of int): Sum of the weights of the placements
+            covering each cell, row-major.
+        fired (bytearray): 1 for each cell that has been fired on,
+            row-major.
+    """
+
+    def __init__(self, size, rng=None):
+        super().__init__(size, rng)
+        self.placements = get_spaceship_placements(size)
+        self.placement_weights = [1] * len(self.placements)
+        self.cell_placements = get_cell_placements(size)
+        self.density = [len(indices) for indices in self.cell_placements]
+        self.fired = bytearray(size * size)
+
+    def choose_best(self, scores):
+        """
+        Picks one of the untargeted cells with the highest score, ties are
+        broken randomly.
+
+        Args:
+            scores (list of int): A score per cell, row-major
+
+        Returns:
+            tuple: Target coordinates (row, col).
+        """
+        best_score = -1
+        best_cells = []
+        for index, score in enumerate(scores):
+            if self.fired[index] or score < best_score:
+                continue
+            if score > best_score:
+                best_score = score
+                best_cells = []
+            best_cells.append(index)
+
+        return divmod(self.rng.choice(best_cells), self.size)
+
+    def choose_target(self, deadline=None):
+        """
+        Picks one of the untargeted cells with the highest density, ties are
+        broken randomly.
+
+        Args:
+            deadline (float): Not used, the densities are always up to date
+
+        Returns:
+            tuple: Target coordinates (row, col).
+        """
+        return self.choose_best(self.density)
+
+    def update(self, target, result):
+        """
+        Updates the weights of the placements covering the target, and the
+        densities of their cells, with the result of a shot.
+
+        Args:
+            target (tuple of int): Coordinates (row, col) fired upon.
+            result (str): 'hit' or 'miss', as returned by fire_missile().
+        """
+        row, col = target
+        self.fired[row * self.size + col] = 1
+
+        for index in self.cell_placements[row * self.size + col]:
+            weight = self.placement_weights[index]
+            if not weight:
+                continue
+            new_weight = weight * DENSITY_HIT_WEIGHT if result == "hit" else 0
+            self.placement_weights[index] = new_weight
+            for r, c in self.placements[index]:
+                self.density[r * self.size + c] += new_weight - weight
+
+
+class FleetTargeting(DensityTargeting):
+    """
+    Base of the targeting AIs that reason about whole fleets. Besides the
+    placement densities of DensityTargeting they keep the hits and misses
+    so far as bitmasks, which the fleet samplers and solvers take.
+
+    Args:
+        size (int): Size of the targeted battlefield
+        number_of_ships (int): Number of spaceships of the targeted fleet
+        rng (random.Random): Breaks ties between targets, the random module
+            if None
+
+    Attributes:
+        number_of_ships (int): Number of spaceships of the targeted fleet.
+        hits (int): Bitmask of the cells hit so far.
+        misses (int): Bitmask of the cells missed so far.
+    """
+
+    def __init__(self, size, number_of_ships, rng=None):
+        super().__init__(size, rng)
+        self.number_of_ships = number_of_ships
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def create(cls, size, number_of_ships, rng=None):
+        """
+        See TargetingStrategy.create().
+        """
+        return cls(size, number_of_ships, rng)
+
+    def update(self, target, result):
+        """
+        Records the result of a shot, see DensityTargeting.update().
+
+        Args:
+            target (tuple of int): Coordinates (row, col) fired upon.
+            result (str): 'hit' or 'miss', as returned by fire_missile().
+        """
+        super().update(target, result)
+        bit = 1 << (target[0] * self.size + target[1])
+        if result == "hit":
+            self.hits |= bit
+        else:
+            self.misses |= bit
+
+
+@lru_cache(maxsize=None)
+def get_sampler_pool():
+    """
+    Process pool shared by all games for sampling fleets, started on first
+    use with one worker per CPU.
+
+    Returns:
+        concurrent.futures.ProcessPoolExecutor: The pool
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(os.cpu_count() or 1)
+
+
+def sample_fleet_occupancy(
+    size, number_of_ships, hits, misses, max_samples, time_budget, seed
+):
+    """
+    Samples complete fleets that are consistent with the shots fired so far
+    and counts how often each cell is occupied. Every sample consists of
+    number_of_ships non-overlapping placements that cover every hit and no
+    miss. Placements are first drawn to cover the hits one by one, the
+    remaining spaceships are drawn at random from the free placements.
+    Samples that get stuck are dropped.
+
+    Runs in the worker processes of get_sampler_pool().
+
+    Args:
+        size (int): Size of the targeted battlefield
+        number_of_ships (int): Number of spaceships of the fleet
+        hits (int): Bitmask of the cells hit so far
+        misses (int): Bitmask of the cells missed so far
+        max_samples (int): Stop after this many consistent samples
+        time_budget (float): Stop after this many seconds, None for no limit
+        seed (int): Seed of the worker's random generator
+
+    Returns:
+        list of int: Number of samples occupying each cell, row-major
+        int: Number of consistent samples drawn
+    """
+    rng = random.Random(seed)
+    deadline = math.inf
+    if time_budget is not None:
+        deadline = time.perf_counter() + time_budget
+    masks = get_placement_masks(size)
+    placement_cells = [
+        tuple(r * size + c for r, c in coords)
+        for coords in get_spaceship_placements(size)
+    ]
+    candidates = [
+        index for index, mask in enumerate(masks) if not mask & misses
+    ]
+    covering = {
+        cell: [index for index in candidates if masks[index] >> cell & 1]
+        for cell in range(size * size)
+        if hits >> cell & 1
+    }
+    occupancy = [0] * (size * size)
+    samples = 0
+
+    while samples < max_samples and time.perf_counter() < deadline:
+        fleet = []
+        fleet_mask = 0
+        uncovered = hits
+        while uncovered and len(fleet) < number_of_ships:
+            # The hit with the fewest fitting placements is covered first
+            options = None
+            for cell, cell_options in covering.items():
+                if not uncovered >> cell & 1:
+                    continue
+                fitting = [
+                    index
+                    for index in cell_options
+                    if not masks[index] & fleet_mask
+                ]
+                if options is None or len(fitting) < len(options):
+                    options = fitting
+                    if not options:
+                        break
+            if not options:
+                break
+            index = rng.choice(options)
+            fleet.append(index)
+            fleet_mask |= masks[index]
+            uncovered &= ~masks[index]
+        if uncovered:
+            continue
+
+        while len(fleet) < number_of_ships:
+            for _ in range(POSTERIOR_FILL_DRAWS):
+                index = rng.choice(candidates)
+                if not masks[index] & fleet_mask:
+                    break
+            else:
+                break
+            fleet.append(index)
+            fleet_mask |= masks[index]
+        if len(fleet) < number_of_ships:
+            continue
+
+        for index in fleet:
+            for cell in placement_cells[index]:
+                occupancy[cell] += 1
+        samples += 1
+
+    return occupancy, samples
+
+
+def resample_fleet_occupancy(
+    size, number_of_ships, hits, misses, sample_counts, rng
+):
+    """
+    Draws the samples of a logged target again, in this process: every
+    worker's seed is taken from rng in the same order and the worker stops
+    after the logged number of samples instead of at a deadline, see
+    TargetingStrategy.plan_samples().
+
+    Args:
+        size (int): Size of the targeted battlefield
+        number_of_ships (int): Number of spaceships of the fleet
+        hits (int): Bitmask of the cells hit so far
+        misses (int): Bitmask of the cells missed so far
+        sample_counts (tuple of int): Samples each worker drew
+        rng (random.Random): Seeds the workers
+
+    Returns:
+        list of int: Number of samples occupying each cell, row-major
+        int: Number of consistent samples drawn
+    """
+    occupancy = [0] * (size * size)
+    total = 0
+    for count in sample_counts:
+        counts, samples = sample_fleet_occupancy(
+            size,
+            number_of_ships,
+            hits,
+            misses,
+            count,
+            None,
+            rng.getrandbits(32),
+        )
+        total += samples
+        for cell, cell_count in enumerate(counts):
+            occupancy[cell] += cell_count
+    return occupancy, total
+
+
+class PosteriorTargeting(FleetTargeting):
+    """
+    Targeting AI that samples complete fleets consistent with the hits and
+    misses so far, in parallel on get_sampler_pool(), and fires on the
+    untargeted cell occupied in the most samples. Falls back to the
+    placement densities of DensityTargeting when no consistent fleet is
+    found within the budget.
+
+    Args:
+        size (int): Size of the targeted battlefield
+        number_of_ships (int): Number of spaceships of the targeted fleet
+        rng (random.Random): Breaks ties and seeds the workers, the random
+            module if None
+        time_budget (float): Seconds of sampling per target when
+            choose_target() is called without a deadline
+        sample_budget (int): Consistent samples per target, split between
+            the workers
+
+    Attributes:
+        number_of_ships (int): Number of spaceships of the targeted fleet.
+        time_budget (float): Seconds per target without a deadline.
+        sample_budget (int): Consistent samples per target.
+        hits (int): Bitmask of the cells hit so far.
+        misses (int): Bitmask of the cells missed so far.
+        samples (int): Consistent samples behind the last target.
+    """
+
+    def __init__(
+        self,
+        size,
+        number_of_ships,
+        rng=None,
+        time_budget=TARGET_TIME_BUDGET,
+        sample_budget=POSTERIOR_SAMPLE_BUDGET,
+    ):
+        super().__init__(size, number_of_ships, rng)
+        self.time_budget = time_budget
+        self.sample_budget = sample_budget
+        self.samples = 0
+
+    def get_occupancy(self, time_budget):
+        """
+        Samples fleets on all workers of the pool and merges their counts,
+        or in this process when it is a worker process itself.
+
+        Args:
+            time_budget (float): Seconds of sampling
+
+        Returns:
+            list of int: Number of samples occupying each cell, row-major
+        """
+        import multiprocessing
+
+        if multiprocessing.parent_process():
+            # Already running in a worker, e.g. of a tournament, so the
+            # cores are busy and a nested pool would not be shut down
+            counts, self.samples = sample_fleet_occupancy(
+                self.size,
+                self.number_of_ships,
+                self.hits,
+                self.misses,
+                self.sample_budget,
+                time_budget,
+                self.rng.getrandbits(32),
+            )
+            self.sample_counts = (self.samples,)
+            return counts
+
+        pool = get_sampler_pool()
+        workers = os.cpu_count() or 1
+        futures = [
+            pool.submit(
+                sample_fleet_occupancy,
+                self.size,
+                self.number_of_ships,
+                self.hits,
+                self.misses,
+                -(-self.sample_budget // workers),
+                time_budget,
+                self.rng.getrandbits(32),
+            )
+            for _ in range(workers)
+        ]
+        occupancy = [0] * (self.size * self.size)
+        sample_counts = []
+        for future in futures:
+            counts, samples = future.result()
+            sample_counts.append(samples)
+            for cell, count in enumerate(counts):
+                occupancy[cell] += count
+        self.samples = sum(sample_counts)
+        self.sample_counts = tuple(sample_counts)
+        return occupancy
+
+    def choose_target(self, deadline=None):
+        """
+        Picks one of the untargeted cells occupied in the most samples, ties
+        are broken randomly.
+
+        Args:
+            deadline (float): time.perf_counter() value at which sampling
+                stops, time_budget from now if None
+
+        Returns:
+            tuple: Target coordinates (row, col).
+        """
+        if deadline is None:
+            deadline = time.perf_counter() + self.time_budget
+        time_budget = deadline - time.perf_counter()
+        self.samples = 0
+        self.sample_counts = None
+        planned = None
+        if self.planned_samples is not None:
+            if self.planned_samples:
+                planned = self.planned_samples.popleft()
+        elif self.fixed_samples:
+            planned = (self.fixed_samples,)
+        elif time_budget > 0:
+            occupancy = self.get_occupancy(time_budget)
+        if planned is not None:
+            self.sample_counts = planned
+            occupancy, self.samples = resample_fleet_occupancy(
+                self.size,
+                self.number_of_ships,
+                self.hits,
+                self.misses,
+                planned,
+                self.rng,
+            )
+        if not self.samples:
+            self.depth = "density"
+            return super().choose_target()
+        self.depth = "samples"
+        return self.choose_best(occupancy)
+
+
+@lru_cache(maxsize=None)
+def get_board_symmetries(size):
+    """
+    The 8 rotations and reflections of a square battlefield as cell
+    permutations. The set of spaceship placements is the same under each of
+    them. Cached per size.
+
+    Args:
+        size (int): Size of the square battlefield
+
+    Returns:
+        tuple of tuples: Per symmetry, the cell each cell is mapped to,
+            cells numbered row-major
+    """
+    last = size - 1
+    transforms = (
+        lambda r, c: (r, c),
+        lambda r, c: (c, last - r),
+        lambda r, c: (last - r, last - c),
+        lambda r, c: (last - c, r),
+        lambda r, c: (r, last - c),
+        lambda r, c: (c, r),
+        lambda r, c: (last - r, c),
+        lambda r, c: (last - c, last - r),
+    )
+    return tuple(
+        tuple(
+            row * size + col
+            for row, col in (
+                transform(r, c) for r in range(size) for c in range(size)
+            )
+        )
+        for transform in transforms
+    )
+
+
+def transform_mask(mask, permutation):
+    """
+    Maps the cells of a bitmask with a permutation of the cells.
+
+    Args:
+        mask (int): Bitmask of cells, bit (row * size + col) per cell
+        permutation (tuple of int): The cell each cell is mapped to
+
+    Returns:
+        int: The mapped bitmask
+    """
+    result = 0
+    while mask:
+        low = mask & -mask
+        result |= 1 << permutation[low.bit_length() - 1]
+        mask ^= low
+    return result
+
+
+def get_canonical_shots(size, hits, misses):
+    """
+    Brings the shots fired on a battlefield into a canonical orientation,
+    the smallest of their 8 symmetric images, so positions that are
+    rotations or reflections of each other have the same key.
+
+    Args:
+        size (int): Size of the targeted battlefield
+        hits (int): Bitmask of the cells hit so far
+        misses (int): Bitmask of the cells missed so far
+
+    Returns:
+        tuple of int: The symmetry used, cell of the canonical image per
+            cell of the battlefield
+        int: Canonical bitmask of the hits
+        int: Canonical bitmask of the misses
+    """
+    return min(
+        (
+            (
+                permutation,
+                transform_mask(hits, permutation),
+                transform_mask(misses, permutation),
+            )
+            for permutation in get_board_symmetries(size)
+        ),
+        key=lambda image: image[1:],
+    )
+
+
+def count_fleet_occupancy(
+    size, number_of_ships, hits, misses, deadline=None
+):
+    """
+    Counts exactly how many fleets of number_of_ships non-overlapping
+    placements cover every hit and no miss, and how many of them occupy
+    each cell. The placements are walked in order, each one included or
+    not, with a forward and a backward pass over the states (occupied
+    cells, spaceships placed). Placements are ordered by their corner, so
+    only the cells later placements can still cover are kept in a state
+    and the number of states stays small. Hits that no later placement can
+    cover must be occupied already, otherwise the state is dropped.
+
+    The deadline is checked after every placement of both passes, see
+    get_exact_occupancy() for the cached counts of canonical positions.
+
+    Args:
+        size (int): Size of the targeted battlefield
+        number_of_ships (int): Number of spaceships of the fleet
+        hits (int): Bitmask of the cells hit so far
+        misses (int): Bitmask of the cells missed so far
+        deadline (float): time.perf_counter() value at which the count is
+            given up, never if None
+
+    Returns:
+        tuple of int: Number of fleets occupying each cell, row-major, None
+            if the deadline passed first
+        int: Number of fleets, None if the deadline passed first
+    """
+    masks = [mask for mask in get_placement_masks(size) if not mask & misses]
+    coverable = [0] * (len(masks) + 1)
+    for index in range(len(masks) - 1, -1, -1):
+        coverable[index] = coverable[index + 1] | masks[index]
+    if hits & ~coverable[0]:
+        return (0,) * (size * size), 0
+
+    forward = [{(0, 0): 1}]
+    for index, mask in enumerate(masks):
+        keep = coverable[index + 1]
+        required = hits & coverable[index] & ~keep
+        states = {}
+        for (used, placed), ways in forward[index].items():
+            if not required & ~used:
+                key = (used & keep, placed)
+                states[key] = states.get(key, 0) + ways
+            if placed < number_of_ships and not mask & used:
+                used |= mask
+                if not required & ~used:
+                    key = (used & keep, placed + 1)
+                    states[key] = states.get(key, 0) + ways
+        forward.append(states)
+        if deadline is not None and time.perf_counter() > deadline:
+            return None, None
+
+    # completions[state] counts the ways to finish a fleet from a state
+    completions = {(0, number_of_ships): 1}
+    placement_counts = [0] * len(masks)
+    for index in range(len(masks) - 1, -1, -1):
+        mask = masks[index]
+        keep = coverable[index + 1]
+        required = hits & coverable[index] & ~keep
+        previous = {}
+        for (used, placed), ways in forward[index].items():
+            total = 0
+            if not required & ~used:
+                total = completions.get((used & keep, placed), 0)
+            if placed < number_of_ships and not mask & used:
+                included = used | mask
+                if not required & ~included:
+                    count = completions.get((included & keep, placed + 1), 0)
+                    placement_counts[index] += ways * count
+                    total += count
+            previous[(used, placed)] = total
+        completions = previous
+        if deadline is not None and time.perf_counter() > deadline:
+            return None, None
+
+    occupancy = [0] * (size * size)
+    for mask, count in zip(masks, placement_counts):
+        while mask:
+            low = mask & -mask
+            occupancy[low.bit_length() - 1] += count
+            mask ^= low
+    return tuple(occupancy), completions.get((0, 0), 0)
+
+
+class OccupancyCache:
+    """
+    Least recently used cache of complete fleet counts, keyed by canonical
+    position. Unlike functools.lru_cache it can be looked up without
+    computing the missing entry, so a count that runs out of time is never
+    stored. Computer turns of server games run in threads, so every access
+    holds a lock.
+
+    Args:
+        maxsize (int): Number of positions kept
+
+    Attributes:
+        maxsize (int): Number of positions kept.
+        entries (collections.OrderedDict): Counts by position, least
+            recently used first.
+        lock (threading.Lock): Held while the entries are read or updated.
+    """
+
+    def __init__(self, maxsize):
+        import threading
+        from collections import OrderedDict
+
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Looks up the counts of a position.
+
+        Args:
+            key (tuple): The position
+
+        Returns:
+            tuple: The cached counts, None if the position is not cached
+        """
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """
+        Stores the counts of a position, evicting the least recently used
+        position when the cache is full.
+
+        Args:
+            key (tuple): The position
+            value (tuple): Its counts
+        """
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+@lru_cache(maxsize=None)
+def get_occupancy_cache():
+    """
+    Cache of the exact fleet counts shared by every game of the process.
+
+    Returns:
+        OccupancyCache: The cache, holding up to EXACT_CACHE_SIZE positions
+    """
+    return OccupancyCache(EXACT_CACHE_SIZE)
+
+
+def get_exact_occupancy(size, number_of_ships, hits, misses, deadline=None):
+    """
+    Exact number of consistent fleets occupying each cell, see
+    count_fleet_occupancy(). The shots are first brought into their
+    canonical orientation, so positions that are rotations or reflections
+    of each other share a cache entry. Cached positions are answered even
+    after the deadline, counts given up at the deadline are not cached.
+
+    Args:
+        size (int): Size of the targeted battlefield
+        number_of_ships (int): Number of spaceships of the fleet
+        hits (int): Bitmask of the cells hit so far
+        misses (int): Bitmask of the cells missed so far
+        deadline (float): time.perf_counter() value at which an uncached
+            count is given up, never if None
+
+    Returns:
+        list of int: Number of fleets occupying each cell, row-major, None
+            if the count was given up
+        int: Number of fleets, None if the count was given up
+    """
+    permutation, hits, misses = get_canonical_shots(size, hits, misses)
+    key = (size, number_of_ships, hits, misses)
+    cache = get_occupancy_cache()
+    counts = cache.get(key)
+    if counts is None:
+        counts = count_fleet_occupancy(*key, deadline=deadline)
+        if counts[1] is None:
+            return None, None
+        cache.put(key, counts)
+    occupancy, fleets = counts
+    return [occupancy[cell] for cell in permutation], fleets
+
+
+class OpeningBook:
+    """
+    Read-only view of the opening book written by build_opening_book.py:
+    the hit probability of every cell for the early positions of the
+    expert AI, per battlefield size and number of spaceships. Positions
+    are stored in their canonical orientation, see get_canonical_shots().
+
+    The book starts with OPENING_BOOK_HEADER and one OPENING_BOOK_ENTRY
+    (size, number of spaceships, number of positions, offset) per table.
+    A table is a run of positions sorted by key, every position being the
+    canonical hits and misses as big-endian bitmasks followed by one
+    unsigned 16 bit probability per cell, in units of 1/OPENING_BOOK_SCALE.
+    Positions are found by binary search, so only the pages touched are
+    read.
+
+    Args:
+        data (bytes-like): The book, usually a memory map of the file
+
+    Attributes:
+        data (bytes-like): The book.
+        tables (dict): Number of positions and offset of each table, keyed
+            by (size, number_of_ships).
+
+    Raises:
+        ValueError: If the data is not an opening book of a supported
+            version.
+    """
+
+    def __init__(self, data):
+        try:
+            magic, version, number_of_tables = (
+                OPENING_BOOK_HEADER.unpack_from(data)
+            )
+            entries = [
+                OPENING_BOOK_ENTRY.unpack_from(
+                    data,
+                    OPENING_BOOK_HEADER.size + index * OPENING_BOOK_ENTRY.size,
+                )
+                for index in range(number_of_tables)
+            ]
+        except struct.error as error:
+            raise ValueError("Opening book is truncated.") from error
+        if magic != OPENING_BOOK_MAGIC or version != OPENING_BOOK_VERSION:
+            raise ValueError("Unsupported opening book format.")
+
+        self.data = data
+        self.tables = {
+            (size, number_of_ships): (positions, offset)
+            for size, number_of_ships, positions, offset in entries
+        }
+
+    def lookup(self, size, number_of_ships, hits, misses):
+        """
+        Looks up the hit probabilities of a position.
+
+        Args:
+            size (int): Size of the targeted battlefield
+            number_of_ships (int): Number of spaceships of the fleet
+            hits (int): Bitmask of the cells hit so far
+            misses (int): Bitmask of the cells missed so far
+
+        Returns:
+            list of int: Hit probability of each cell in units of
+                1/OPENING_BOOK_SCALE, row-major, None if the position is
+                not in the book
+        """
+        table = self.tables.get((size, number_of_ships))
+        if not table:
+            return None
+        positions, offset = table
+        permutation, hits, misses = get_canonical_shots(size, hits, misses)
+        mask_length = (size * size + 7) // 8
+        key = hits.to_bytes(mask_length, "big") + misses.to_bytes(
+            mask_length, "big"
+        )
+        entry_length = len(key) + 2 * size * size
+
+        low, high = 0, positions
+        while low < high:
+            middle = (low + high) // 2
+            start = offset + middle * entry_length
+            entry_key = self.data[start:start + len(key)]
+            if entry_key < key:
+                low = middle + 1
+            elif entry_key > key:
+                high = middle
+            else:
+                probabilities = struct.unpack_from(
+                    f"!{size * size}H", self.data, start + len(key)
+                )
+                return [probabilities[cell] for cell in permutation]
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_opening_book():
+    """
+    Memory maps the opening book at OPENING_BOOK_PATH on first use. The
+    pages of the file are shared by all game processes through the page
+    cache.
+
+    Returns:
+        OpeningBook: The book, None if it is missing or unreadable
+    """
+    import mmap
+
+    try:
+        with open(OPENING_BOOK_PATH, "rb") as book_file:
+            data = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return OpeningBook(data)
+    except (OSError, ValueError):
+        return None
+
+
+class ExactTargeting(FleetTargeting):
+    """
+    Expert targeting AI firing on the untargeted cell most likely to be
+    hit. The first shots are looked up in the opening book, see
+    get_opening_book(). On battlefields up to EXACT_SOLVER_MAX_SIZE the
+    later shots count every fleet consistent with the hits and misses so
+    far and pick the cell occupied by the most of them, positions seen
+    before are answered from the cache of get_exact_occupancy(). Larger
+    battlefields, and counts that cannot finish before the deadline of the
+    shot, continue with the densities of DensityTargeting.
+
+    A count given up at the deadline is reported as a sample count of 0,
+    so games log it and replays planning the logged counts give up the
+    same counts. With fixed samples, as in tournaments, counts are never
+    given up.
+
+    Args:
+        size (int): Size of the targeted battlefield
+        number_of_ships (int): Number of spaceships of the targeted fleet
+        rng (random.Random): Breaks ties between targets, the random module
+            if None
+
+    Attributes:
+        number_of_ships (int): Number of spaceships of the targeted fleet.
+        hits (int): Bitmask of the cells hit so far.
+        misses (int): Bitmask of the cells missed so far.
+    """
+
+    def get_hit_chances(self, deadline=None, count=True):
+        """
+        Hit chances of the cells from the opening book or the exact solver.
+
+        Args:
+            deadline (float): time.perf_counter() value at which an uncached
+                count is given up, never if None
+            count (bool): Counts the fleets of positions missing from the
+                book, False gives the count up right away
+
+        Returns:
+            list of int: A number per cell proportional to its chance to be
+                hit, row-major, None if neither knows the position in time
+        """
+        book = get_opening_book()
+        if book:
+            chances = book.lookup(
+                self.size, self.number_of_ships, self.hits, self.misses
+            )
+            if chances:
+                self.depth = "book"
+                return chances
+        if self.size > EXACT_SOLVER_MAX_SIZE:
+            return None
+        occupancy, fleets = None, None
+        if count:
+            occupancy, fleets = get_exact_occupancy(
+                self.size,
+                self.number_of_ships,
+                self.hits,
+                self.misses,
+                deadline,
+            )
+        if fleets is None:
+            self.sample_counts = (0,)
+            return None
+        self.depth = "exact"
+        return occupancy if fleets else None
+
+    def choose_target(self, deadline=None):
+        """
+        Picks one of the untargeted cells with the highest hit probability,
+        ties are broken randomly. When the exact count cannot finish before
+        the deadline, picks the cell with the highest density instead.
+
+        Args:
+            deadline (float): time.perf_counter() value at which the exact
+                count is given up, never if None
+
+        Returns:
+            tuple: Target coordinates (row, col).
+        """
+        self.sample_counts = None
+        count = True
+        if self.planned_samples is not None:
+            planned = None
+            if self.planned_samples:
+                planned = self.planned_samples.popleft()
+            count = planned is None
+            deadline = None
+        elif self.fixed_samples:
+            deadline = None
+        chances = self.get_hit_chances(deadline, count)
+        if not chances:
+            self.depth = "density"
+            return super().choose_target()
+        return self.choose_best(chances)
+
+
+class AnytimeTargeting(FleetTargeting):
+    """
+    Targeting AI that refines its target until a deadline and fires on the
+    best target found by then, so its turns take the same time on every
+    battlefield size and in every position. The placement densities of
+    DensityTargeting are always up to date and serve as the first answer.
+    Positions in the opening book are answered exactly from the book.
+    Otherwise complete fleets consistent with the hits and misses so far
+    are sampled in this process until the deadline, and once at least
+    ANYTIME_MIN_SAMPLES have been drawn, the cell occupied in the most
+    samples replaces the densities' answer. Fewer samples are too noisy,
+    a single sample would pick an arbitrary cell of one possible fleet.
+
+    Args:
+        size (int): Size of the targeted battlefield
+        number_of_ships (int): Number of spaceships of the targeted fleet
+        rng (random.Random): Breaks ties and seeds the sampling, the random
+            module if None
+        time_budget (float): Seconds per target when choose_target() is
+            called without a deadline
+
+    Attributes:
+        number_of_ships (int): Number of spaceships of the targeted fleet.
+        time_budget (float): Seconds per target without a deadline.
+        hits (int): Bitmask of the cells hit so far.
+        misses (int): Bitmask of the cells missed so far.
+        depth (str): How far the search for the last target got: 'book',
+            'samples' or 'density'.
+        samples (int): Consistent fleets sampled for the last target.
+    """
+
+    def __init__(
+        self, size, number_of_ships, rng=None, time_budget=TARGET_TIME_BUDGET
+    ):
+        super().__init__(size, number_of_ships, rng)
+        self.time_budget = time_budget
+
+    def choose_target(self, deadline=None):
+        """
+        Picks the best untargeted cell found before the deadline, ties are
+        broken randomly.
+
+        Args:
+            deadline (float): time.perf_counter() value by which the target
+                is needed, time_budget from now if None
+
+        Returns:
+            tuple: Target coordinates (row, col).
+        """
+        if deadline is None:
+            deadline = time.perf_counter() + self.time_budget
+        self.samples = 0
+        self.sample_counts = None
+        planned = None
+        if self.planned_samples:
+            planned = self.planned_samples.popleft()
+        elif self.planned_samples is None and self.fixed_samples:
+            planned = (self.fixed_samples,)
+
+        book = get_opening_book()
+        if book:
+            chances = book.lookup(
+                self.size, self.number_of_ships, self.hits, self.misses
+            )
+            if chances:
+                self.depth = "book"
+                return self.choose_best(chances)
+
+        time_budget = deadline - time.perf_counter()
+        if self.planned_samples is not None or self.fixed_samples:
+            self.sample_counts = planned
+            if planned is not None:
+                occupancy, self.samples = resample_fleet_occupancy(
+                    self.size,
+                    self.number_of_ships,
+                    self.hits,
+                    self.misses,
+                    planned,
+                    self.rng,
+                )
+        elif time_budget > 0:
+            occupancy, self.samples = sample_fleet_occupancy(
+                self.size,
+                self.number_of_ships,
+                self.hits,
+                self.misses,
+                ANYTIME_SAMPLE_BUDGET,
+                time_budget,
+                self.rng.getrandbits(32),
+            )
+            self.sample_counts = (self.samples,)
+        if self.samples >= ANYTIME_MIN_SAMPLES:
+            self.depth = "samples"
+            return self.choose_best(occupancy)
+
+        self.depth = "density"
+        return super().choose_target()
+
+
+class PlacementStrategy:
+    """
+    Interface of the strategies placing a fleet. A strategy picks one of the
+    free placements for every spaceship. Strategies are registered by name
+    in PLACEMENT_STRATEGIES.
+
+    Args:
+        size (int): Size of the battlefield the fleet is placed on
+        rng (random.Random): Source of randomness, the random module if None
+
+    Attributes:
+        size (int): Size of the battlefield the fleet is placed on.
+        rng (random.Random): Source of randomness.
+    """
+
+    def __init__(self, size, rng=None):
+        self.size = size
+        self.rng = rng or random
+
+    def choose_placement(self, battlefield, free_placements):
+        """
+        Picks the placement of the next spaceship.
+
+        Args:
+            battlefield (Battlefield): The battlefield with the spaceships
+                placed so far
+            free_placements (list of int): Indices of the placements that
+                do not overlap placed spaceships, see
+                get_spaceship_placements()
+
+        Returns:
+            int: One of the free placement indices
+        """
+        raise NotImplementedError
+
+
+class RandomPlacement(PlacementStrategy):
+    """
+    Placement strategy drawing every spaceship uniformly from the free
+    placements.
+    """
+
+    def choose_placement(self, battlefield, free_placements):
+        """
+        See PlacementStrategy.choose_placement().
+        """
+        return self.rng.choice(free_placements)
+
+
+class SpreadPlacement(PlacementStrategy):
+    """
+    Placement strategy keeping spaceships apart, every spaceship is drawn
+    from the free placements that do not touch another spaceship, not even
+    diagonally, if there are any. Hits then give away less about the
+    neighbouring cells.
+    """
+
+    def choose_placement(self, battlefield, free_placements):
+        """
+        See PlacementStrategy.choose_placement().
+        """
+        halos = get_placement_halo_masks(self.size)
+        apart = [
+            index
+            for index in free_placements
+            if not halos[index] & battlefield.ship_mask
+        ]
+        return self.rng.choice(apart or free_placements)
+
+
+TARGETING_STRATEGIES = {
+    AI_MODE_RANDOM: RandomTargeting,
+    AI_MODE_DENSITY: DensityTargeting,
+    AI_MODE_POSTERIOR: PosteriorTargeting,
+    AI_MODE_EXPERT: ExactTargeting,
+    AI_MODE_ANYTIME: AnytimeTargeting,
+}
+PLACEMENT_STRATEGIES = {
+    PLACEMENT_MODE_RANDOM: RandomPlacement,
+    PLACEMENT_MODE_SPREAD: SpreadPlacement,
+}
+
+
+@lru_cache(maxsize=None)
+def get_cell_segments(ship_style, hit_style, hide_ships):
+    """
+    Display strings of the cell states of a battlefield.
+
+    Args:
+        ship_style (str): Style string for coloring spaceships
+        hit_style (str): Style string for coloring hits on the spaceships
+        hide_ships (bool): Whether spaceships are rendered as empty fields
+
+    Returns:
+        tuple of str: The styled cell of every CELL_* state code
+    """
+    ship = "|" + ship_style + " o " + Style.RESET_ALL
+    # Indexed by the state codes CELL_EMPTY to CELL_MISS
+    return (
+        "| - ",
+        "| - " if hide_ships else ship,
+        "|" + hit_style + " x " + Style.RESET_ALL,
+        "| * ",
+    )
+
+
+class Battlefield:
+    """
+    Compact model of a single battlefield. Every cell is one byte of a flat
+    buffer, the low two bits hold the cell state (CELL_EMPTY, CELL_SHIP,
+    CELL_HIT or CELL_MISS), the remaining bits the id of the ship occupying
+    the cell. Styling is only applied when a cell is rendered.
+
+    Args:
+        size (int): Size of the square battlefield (number of rows and columns)
+        ship_style (str): Style string for coloring the owner's spaceships
+        hit_style (str): Style string for coloring hits on the spaceships
+
+    Attributes:
+        size (int): Size of the battlefield (both width and height).
+        cells (bytearray): Row-major buffer of encoded cells.
+        ship_mask (int): Bitmask of all cells occupied by spaceships.
+        ship_placements (list of int): Placement index of every spaceship,
+            see get_spaceship_placements(), in order of their ids.
+        ship_style (str): Style string for coloring the owner's spaceships
+        hit_style (str): Style string for coloring hits on the spaceships
+    """
+
+    __slots__ = (
+        "size",
+        "cells",
+        "ship_mask",
+        "ship_placements",
+        "ship_style",
+        "hit_style",
+    )
+
+    def __init__(self, size, ship_style, hit_style):
+        self.size = size
+        self.cells = bytearray(size * size)
+        self.ship_mask = 0
+        self.ship_placements = []
+        self.ship_style = ship_style
+        self.hit_style = hit_style
+
+    def __len__(self):
+        return self.size
+
+    def state(self, row, col):
+        """
+        Reads the state code of a single cell.
+
+        Args:
+            row (int): Row index of the cell.
+            col (int): Column index of the cell.
+
+        Returns:
+            int: One of the CELL_* state codes.
+        """
+        return self.cells[row * self.size + col] & CELL_STATE_MASK
+
+    def ship_id(self, row, col):
+        """
+        Reads the id of the spaceship occupying a single cell.
+
+        Args:
+            row (int): Row index of the cell.
+            col (int): Column index of the cell.
+
+        Returns:
+            int: Id of the spaceship, 0 if the cell holds no spaceship.
+        """
+        return self.cells[row * self.size + col] >> CELL_SHIP_ID_SHIFT
+
+    def set_cell(self, row, col, state, ship_id=0):
+        """
+        Stores a state code and ship id for the cell at (row, col).
+
+        Args:
+            row (int): Row index of the cell.
+            col (int): Column index of the cell.
+            state (int): One of the CELL_* state codes.
+            ship_id (int): Id of the spaceship occupying the cell.
+        """
+        self.cells[row * self.size + col] = (
+            ship_id << CELL_SHIP_ID_SHIFT
+        ) | state
+
+    def set_state(self, row, col, state):
+        """
+        Changes the state of the cell at (row, col), keeping its ship id.
+
+        Args:
+            row (int): Row index of the cell.
+            col (int): Column index of the cell.
+            state (int): One of the CELL_* state codes.
+        """
+        index = row * self.size + col
+        self.cells[index] = (self.cells[index] & ~CELL_STATE_MASK) | state
+
+    def to_rows(self, hide_ships, rows=None, cols=None):
+        """
+        Plain text snapshot of the battlefield, one character per cell
+        using the symbols of CELL_SYMBOLS.
+
+        Args:
+            hide_ships (bool): Whether to show spaceships as empty fields.
+            rows (range): Rows to include, all if None.
+            cols (range): Columns to include, all if None.
+
+        Returns:
+            list of str: One string per row.
+        """
+        rows = rows or range(self.size)
+        cols = cols or range(self.size)
+        symbols = dict(CELL_SYMBOLS)
+        if hide_ships:
+            symbols[CELL_SHIP] = symbols[CELL_EMPTY]
+        return [
+            "".join(
+                symbols[cell & CELL_STATE_MASK]
+                for cell in self.cells[
+                    row * self.size + cols.start:row * self.size + cols.stop
+                ]
+            )
+            for row in rows
+        ]
+
+    def to_bytes(self):
+        """
+        Canonical byte encoding of the battlefield, used for checksums.
+
+        Returns:
+            bytes: The encoded cells
+        """
+        return bytes(self.cells)
+
+    def fired_mask(self):
+        """
+        Bitmask of all cells that have been fired upon.
+
+        Returns:
+            int: Bit (row * size + col) is set for every hit or miss.
+        """
+        mask = 0
+        for index, cell in enumerate(self.cells):
+            if cell & CELL_STATE_MASK in (CELL_HIT, CELL_MISS):
+                mask |= 1 << index
+        return mask
+
+    def render_cell(self, row, col, hide_ships):
+        """
+        Builds the display string of a single cell.
+
+        Args:
+            row (int): Row index of the cell.
+            col (int): Column index of the cell.
+            hide_ships (bool): Whether to render spaceships as empty fields.
+
+        Returns:
+            str: The styled cell as it should be printed.
+        """
+        segments = get_cell_segments(
+            self.ship_style, self.hit_style, hide_ships
+        )
+        return segments[self.state(row, col)]
+
+    def render_cells(self, row, cols, hide_ships):
+        """
+        Builds the display strings of the cells of a row, see
+        render_cell().
+
+        Args:
+            row (int): Row index of the cells.
+            cols (range): Column indices of the cells, in steps of one.
+            hide_ships (bool): Whether to render spaceships as empty fields.
+
+        Returns:
+            tuple of str: The styled cells.
+        """
+        segments = get_cell_segments(
+            self.ship_style, self.hit_style, hide_ships
+        )
+        first = row * self.size + cols.start
+        states = self.cells[first:first + len(cols)].translate(CELL_STATES)
+        return tuple(map(segments.__getitem__, states))
+
+
+class SparseBattlefield(Battlefield):
+    """
+    Battlefield of the large battlefield mode. Only the cells holding a
+    spaceship or fired upon are stored, so memory grows with the number of
+    spaceships and shots instead of the area of the battlefield.
+
+    Args:
+        size (int): Size of the square battlefield (number of rows and columns)
+        ship_style (str): Style string for coloring the owner's spaceships
+        hit_style (str): Style string for coloring hits on the spaceships
+
+    Attributes:
+        size (int): Size of the battlefield (both width and height).
+        ship_cells (array of int): Sorted indices (row * size + col) of the
+            cells occupied by a spaceship.
+        ship_ids (array of int): Ship id of each cell in ship_cells.
+        shots (dict): CELL_HIT or CELL_MISS per cell index fired upon.
+        ship_placements (list of int): Placement of every spaceship encoded
+            as (row * size + col) * 4 + orientation - 1, in order of their
+            ids.
+        focus (tuple): Coordinates (row, col) the viewport is centered on,
+            follows the last shot.
+        ship_style (str): Style string for coloring the owner's spaceships
+        hit_style (str): Style string for coloring hits on the spaceships
+    """
+
+    # cells and ship_mask of Battlefield stay unset
+    __slots__ = ("ship_cells", "ship_ids", "shots", "focus")
+
+    def __init__(self, size, ship_style, hit_style):
+        self.size = size
+        self.ship_cells = array("L")
+        self.ship_ids = array("H")
+        self.shots = {}
+        self.ship_placements = []
+        self.focus = (0, 0)
+        self.ship_style = ship_style
+        self.hit_style = hit_style
+
+    def find_ship(self, index):
+        """
+        Looks up a cell in ship_cells.
+
+        Args:
+            index (int): The cell, row * size + col
+
+        Returns:
+            int: Position of the cell in ship_cells, -1 if no spaceship
+                occupies it
+        """
+        position = bisect_left(self.ship_cells, index)
+        if (
+            position < len(self.ship_cells)
+            and self.ship_cells[position] == index
+        ):
+            return position
+        return -1
+
+    def state(self, row, col):
+        """
+        See Battlefield.state().
+        """
+        index = row * self.size + col
+        shot = self.shots.get(index)
+        if shot:
+            return shot
+        return CELL_SHIP if self.find_ship(index) >= 0 else CELL_EMPTY
+
+    def render_cells(self, row, cols, hide_ships):
+        """
+        See Battlefield.render_cells().
+        """
+        return tuple(self.render_cell(row, col, hide_ships) for col in cols)
+
+    def ship_id(self, row, col):
+        """
+        See Battlefield.ship_id().
+        """
+        position = self.find_ship(row * self.size + col)
+        return self.ship_ids[position] if position >= 0 else 0
+
+    def set_cell(self, row, col, state, ship_id=0):
+        """
+        See Battlefield.set_cell().
+        """
+        index = row * self.size + col
+        position = self.find_ship(index)
+        if ship_id and position >= 0:
+            self.ship_ids[position] = ship_id
+        elif ship_id:
+            position = bisect_left(self.ship_cells, index)
+            self.ship_cells.insert(position, index)
+            self.ship_ids.insert(position, ship_id)
+        elif position >= 0:
+            del self.ship_cells[position]
+            del self.ship_ids[position]
+        self.set_state(row, col, state)
+
+    def set_state(self, row, col, state):
+        """
+        See Battlefield.set_state(), shots also move the focus.
+        """
+        index = row * self.size + col
+        if state in (CELL_HIT, CELL_MISS):
+            self.shots[index] = state
+            self.focus = (row, col)
+        else:
+            self.shots.pop(index, None)
+
+    def to_rows(self, hide_ships, rows=None, cols=None):
+        """
+        See Battlefield.to_rows(), callers should pass a viewport as the
+        whole battlefield is large.
+        """
+        rows = rows or range(self.size)
+        cols = cols or range(self.size)
+        symbols = dict(CELL_SYMBOLS)
+        if hide_ships:
+            symbols[CELL_SHIP] = symbols[CELL_EMPTY]
+        return [
+            "".join(symbols[self.state(row, col)] for col in cols)
+            for row in rows
+        ]
+
+    def to_bytes(self):
+        """
+        See Battlefield.to_bytes(), only stored cells are encoded.
+        """
+        return b"".join(
+            struct.pack(
+                "!IBH",
+                index,
+                self.state(*divmod(index, self.size)),
+                self.ship_id(*divmod(index, self.size)),
+            )
+            for index in sorted(self.shots.keys() | set(self.ship_cells))
+        )
+
+
+def visible_width(text):
+    """
+    Number of terminal columns a string occupies, ignoring ANSI escapes.
+
+    Args:
+        text (str): The string to measure
+
+    Returns:
+        int: The visible width of the string
+    """
+    return len(ANSI_ESCAPE.sub("", text))
+
+
+@lru_cache(maxsize=None)
+def apply_sgr(style, params):
+    """
+    The style after an SGR sequence. Styles are (intensity, foreground,
+    background) tuples of SGR codes, None for an attribute the output has
+    not set, which keeps whatever the terminal had before.
+
+    Args:
+        style (tuple): The style before the sequence
+        params (str): Parameters of the sequence, e.g. '37;44'
+
+    Returns:
+        tuple: The new style, None if the sequence sets attributes other
+            than intensity and colors
+    """
+    intensity, foreground, background = style
+    for code in params.split(";"):
+        value = int(code or 0)
+        if value == 0:
+            intensity, foreground, background = SGR_DEFAULT
+        elif value in (1, 2, 22):
+            intensity = str(value)
+        elif 30 <= value <= 37 or value == 39 or 90 <= value <= 97:
+            foreground = str(value)
+        elif 40 <= value <= 47 or value == 49 or 100 <= value <= 107:
+            background = str(value)
+        else:
+            return None
+    return intensity, foreground, background
+
+
+@lru_cache(maxsize=None)
+def format_sgr(current, style):
+    """
+    The shortest SGR sequence changing the terminal from one style to
+    another, either the changed attributes or a reset followed by the
+    attributes that differ from the defaults.
+
+    Args:
+        current (tuple): Style of the terminal, see apply_sgr()
+        style (tuple): Style to change to
+
+    Returns:
+        str: The escape sequence
+    """
+    changes = ";".join(
+        code for old, code in zip(current, style) if code != old
+    )
+    if None not in style:
+        reset = ";".join(code for code in style if code not in SGR_DEFAULT)
+        reset = "0;" + reset if reset else ""
+        if len(reset) < len(changes):
+            changes = reset
+    return f"\x1b[{changes}m"
+
+
+@lru_cache(maxsize=COALESCE_CACHE_SIZE)
+def coalesce_segment(segment, current, pending):
+    """
+    Coalesces the escapes of a styled segment, see StyledOutput. Frames are
+    built from a small set of segments, e.g. one per cell state, so the
+    results are cached.
+
+    Args:
+        segment (str): Text and SGR escapes, without line breaks
+        current (tuple): Style of the terminal, see apply_sgr()
+        pending (tuple): Style set by escapes already seen but not yet
+            written
+
+    Returns:
+        tuple: The segment with coalesced escapes, followed by the current
+            and the pending style after it
+    """
+    parts = ESCAPE_SPLIT.split(segment)
+    output = []
+    style = pending
+    written = current
+    for index, part in enumerate(parts):
+        if index % 2 and part[-1] == "m":
+            style = apply_sgr(style, part[2:-1])
+            if style is None:
+                # Attributes other than intensity and colors are written as
+                # they are, the style is unknown afterwards
+                if pending != current:
+                    segment = format_sgr(current, pending) + segment
+                return segment, SGR_UNSET, SGR_UNSET
+        elif part:
+            if style != written:
+                output.append(format_sgr(written, style))
+                written = style
+            output.append(part)
+    return "".join(output), written, style
+
+
+@lru_cache(maxsize=COALESCE_CACHE_SIZE)
+def coalesce_line(segments, current, pending):
+    """
+    Coalesces the escapes of the segments of a line, see
+    coalesce_segment(). Most lines repeat from frame to frame, so the
+    results are cached as well.
+
+    Args:
+        segments (tuple of str): The styled segments
+        current (tuple): Style of the terminal, see apply_sgr()
+        pending (tuple): Style set by escapes already seen but not yet
+            written
+
+    Returns:
+        tuple: The segments with coalesced escapes as a single string,
+            followed by the current and the pending style after them
+    """
+    output = []
+    for segment in segments:
+        text, current, pending = coalesce_segment(segment, current, pending)
+        output.append(text)
+    return "".join(output), current, pending
+
+
+class StyledOutput:
+    """
+    Builds terminal output from styled segments, writing an SGR escape only
+    where the style of the visible text changes. Consecutive escapes are
+    merged into one and escapes repeating the current style are dropped,
+    e.g. a run of cells sharing a style only sets it once. The style is
+    tracked from segment to segment, from the style the terminal had
+    before, which is left untouched until the output sets it. Before every
+    line break and every escape erasing or saving the cursor the style is
+    brought up to date, so the terminal ends up in the same style as with
+    the segments written as they are. Segments using SGR attributes other
+    than intensity and colors are written unchanged.
+
+    Args:
+        coalesce (bool): Whether the escapes are coalesced
+        keep_original (bool): Whether the output is also kept as it would
+            be without coalescing
+
+    Attributes:
+        coalesce (bool): Whether the escapes are coalesced.
+        parts (list of str): The output written so far.
+        original (list of str): The output without coalescing, None if it
+            is not kept.
+        current (tuple): Style of the terminal, see apply_sgr().
+        pending (tuple): Style set by the segments but not yet written.
+        saved (tuple): Style saved with the cursor.
+    """
+
+    def __init__(self, coalesce=COALESCE_STYLES, keep_original=False):
+        self.coalesce = coalesce
+        self.parts = []
+        self.original = [] if keep_original and coalesce else None
+        self.current = self.pending = self.saved = SGR_UNSET
+
+    def write_line(self, segments):
+        """
+        Writes the segments of a line, see coalesce_line().
+
+        Args:
+            segments (tuple of str): The styled segments
+        """
+        if not self.coalesce:
+            self.parts.extend(segments)
+            return
+        if self.original is not None:
+            self.original.extend(segments)
+        text, self.current, self.pending = coalesce_line(
+            segments, self.current, self.pending
+        )
+        self.parts.append(text)
+
+    def write_lines(self, lines):
+        """
+        Writes lines of segments, separated by line breaks.
+
+        Args:
+            lines (iterable of tuples): The segments of each line
+        """
+        if not self.coalesce or self.original is not None:
+            for index, line in enumerate(lines):
+                if index:
+                    self.write_control("\n")
+                self.write_line(line)
+            return
+        # The line breaks are written like write_control() does
+        parts = self.parts
+        current = self.current
+        pending = self.pending
+        for index, line in enumerate(lines):
+            if index:
+                if pending != current:
+                    parts.append(format_sgr(current, pending))
+                    current = pending
+                parts.append("\n")
+            text, current, pending = coalesce_line(line, current, pending)
+            parts.append(text)
+        self.current = current
+        self.pending = pending
+
+    def write_control(self, control):
+        """
+        Writes a line break or an escape sequence other than SGR.
+
+        Args:
+            control (str): The line break or escape sequence
+        """
+        if not self.coalesce:
+            self.parts.append(control)
+            return
+        if self.original is not None:
+            self.original.append(control)
+        command = control[-1]
+        if command == "8":
+            # Restoring the cursor restores the saved style as well
+            self.current = self.pending = self.saved
+        elif command not in CURSOR_COMMANDS:
+            # Line breaks may scroll and erasing fills with the current
+            # background, saving the cursor saves the style
+            self.flush()
+        if command == "7":
+            self.saved = self.current
+        self.parts.append(control)
+
+    def flush(self):
+        """
+        Writes the pending style.
+        """
+        if self.pending != self.current:
+            self.parts.append(format_sgr(self.current, self.pending))
+            self.current = self.pending
+
+    def getvalue(self):
+        """
+        The output written so far, ending in the style of the segments.
+
+        Returns:
+            str: The output
+        """
+        if self.coalesce:
+            self.flush()
+        return "".join(self.parts)
+
+    def get_original(self):
+        """
+        The output written so far without coalescing.
+
+        Returns:
+            str: The output
+        """
+        if self.original is None:
+            return "".join(self.parts)
+        return "".join(self.original)
+
+
+def coalesce_styles(text):
+    """
+    Rewrites terminal output so an SGR escape is only written where the
+    style of the visible text changes, see StyledOutput.
+
+    Args:
+        text (str): The output to write
+
+    Returns:
+        str: The output with coalesced escapes
+    """
+    output = StyledOutput(coalesce=True)
+    lines = text.split("\n")
+    if not CONTROL_ESCAPE.search(text):
+        output.write_lines([(line,) for line in lines])
+        return output.getvalue()
+    for number, line in enumerate(lines):
+        if number:
+            output.write_control("\n")
+        parts = ESCAPE_SPLIT.split(line)
+        # Text and SGR escapes up to the next control form a segment
+        segment = parts[0]
+        for index in range(1, len(parts), 2):
+            if parts[index][-1] == "m":
+                segment += parts[index] + parts[index + 1]
+            else:
+                output.write_line((segment,))
+                output.write_control(parts[index])
+                segment = parts[index + 1]
+        output.write_line((segment,))
+    return output.getvalue()
+
+
+def get_terminal_rows():
+    """
+    Number of rows of the terminal. shutil is only imported once the first
+    frame is drawn, after the first prompt.
+
+    Returns:
+        int: The rows, 24 if the terminal size is unknown
+    """
+    import shutil
+
+    return shutil.get_terminal_size().lines
+
+
+class FrameRenderer:
+    """
+    Writes frames to the terminal, each frame in a single write. A frame is
+    a list of lines, each line a tuple of styled segments.
+
+    When cursor movement is available and the frame fits on the screen with
+    at least RENDER_MIN_MESSAGE_ROWS rows to spare, the frame is pinned to
+    the top of the screen and the rows below become the scroll region for
+    the game's messages. Later frames then only rewrite the segments that
+    changed. Otherwise every frame is written in full and scrolls like
+    normal output. Games draw a compact frame when the regular one would
+    leave fewer than RENDER_MESSAGE_ROWS rows, see is_cramped().
+
+    The escapes of each frame are coalesced, see StyledOutput, and
+    the bytes written per frame are reported to the stats as the counters
+    'frames', 'frame_bytes' and 'frame_bytes_uncoalesced'.
+
+    Args:
+        stream (file): Stream the frames are written to, sys.stdout if None
+        use_cursor (bool): Whether cursor positioning may be used
+        coalesce (bool): Whether the escapes of frames are coalesced
+        stats (PhaseStats): Receives the bytes written per frame, not
+            counted if None
+
+    Attributes:
+        stream (file): Stream the frames are written to.
+        use_cursor (bool): Whether cursor positioning may be used, only True
+            if the stream is a terminal.
+        coalesce (bool): Whether the escapes of frames are coalesced.
+        stats (PhaseStats): Receives the bytes written per frame.
+        previous_frame (list of tuples): The pinned frame currently on
+            screen, None if no frame is pinned.
+        frame_bytes (int): Bytes written for the last frame.
+    """
+
+    def __init__(
+        self,
+        stream=None,
+        use_cursor=USE_CURSOR_RENDERING,
+        coalesce=COALESCE_STYLES,
+        stats=None,
+    ):
+        self.stream = stream or sys.stdout
+        self.use_cursor = use_cursor and self.stream.isatty()
+        self.coalesce = coalesce
+        self.stats = stats
+        self.previous_frame = None
+        self.frame_bytes = 0
+
+    def write(self, data):
+        """
+        Writes and flushes data to the stream in a single call.
+
+        Args:
+            data (str): The data to write
+        """
+        self.stream.write(data)
+        self.stream.flush()
+
+    def draw(self, frame):
+        """
+        Draws a frame, redrawing only changed segments when possible.
+
+        Args:
+            frame (list of tuples): The lines of the frame
+        """
+        rows = get_terminal_rows()
+        output = StyledOutput(self.coalesce, keep_original=bool(self.stats))
+        if not self.use_cursor or len(frame) + RENDER_MIN_MESSAGE_ROWS > rows:
+            self.close()
+            output.write_lines(frame)
+            output.write_control("\n")
+        elif (
+            self.previous_frame is None
+            or len(self.previous_frame) != len(frame)
+        ):
+            self.full_redraw(frame, rows, output)
+        else:
+            self.diff_redraw(frame, output)
+            self.previous_frame = frame
+
+        data = output.getvalue()
+        self.frame_bytes = len(data.encode())
+        if self.stats:
+            self.stats.count("frames")
+            self.stats.count("frame_bytes", self.frame_bytes)
+            self.stats.count(
+                "frame_bytes_uncoalesced", len(output.get_original().encode())
+            )
+        self.write(data)
+
+    def is_cramped(self, frame):
+        """
+        Whether pinning a frame would leave fewer than RENDER_MESSAGE_ROWS
+        rows of the terminal for the game's messages.
+
+        Args:
+            frame (list of tuples): The lines of the frame
+
+        Returns:
+            bool: True if the frame is pinned and cramped, False if it has
+                room or is not pinned at all
+        """
+        if not self.use_cursor:
+            return False
+        rows = get_terminal_rows()
+        return len(frame) + RENDER_MESSAGE_ROWS > rows
+
+    def full_redraw(self, frame, rows, output):
+        """
+        Writes the output that clears the screen, pins the frame to the top
+        and makes the rows below it the scroll region.
+
+        Args:
+            frame (list of tuples): The lines of the frame
+            rows (int): Number of rows of the terminal
+            output (StyledOutput): Receives the escape sequences and content
+        """
+        self.previous_frame = frame
+        output.write_control("\x1b[r")
+        output.write_control("\x1b[2J")
+        output.write_control("\x1b[H")
+        output.write_lines(frame)
+        output.write_control(f"\x1b[{len(frame) + 1};{rows}r")
+        output.write_control(f"\x1b[{rows};1H")
+
+    def diff_redraw(self, frame, output):
+        """
+        Writes the output that rewrites only the segments that differ from
+        the pinned frame, the cursor is restored afterwards. Nothing is
+        written if the frames are equal.
+
+        Args:
+            frame (list of tuples): The lines of the frame
+            output (StyledOutput): Receives the escape sequences and changed
+                segments
+        """
+        changes = []
+        for row, (old_line, new_line) in enumerate(
+            zip(self.previous_frame, frame), start=1
+        ):
+            if old_line == new_line:
+                continue
+            if len(old_line) != len(new_line):
+                changes.append((row, 0, new_line))
+                continue
+            col = 1
+            for old_segment, new_segment in zip(old_line, new_line):
+                if old_segment != new_segment:
+                    changes.append((row, col, (new_segment,)))
+                col += visible_width(new_segment)
+
+        if not changes:
+            return
+        output.write_control("\x1b7")
+        for row, col, segments in changes:
+            output.write_control(f"\x1b[{row};{col or 1}H")
+            if not col:
+                output.write_control("\x1b[2K")
+            output.write_line(segments)
+        output.write_control("\x1b8")
+
+    def close(self):
+        """
+        Releases a pinned frame, restoring the full screen scroll region and
+        moving the cursor to the bottom row.
+        """
+        if self.previous_frame is not None:
+            rows = get_terminal_rows()
+            self.write(f"\x1b[r\x1b[{rows};1H\n")
+            self.previous_frame = None
+
+
+class PhaseStats:
+    """
+    Counts and latency histograms of the phases of a game, e.g. fleet
+    placement, waiting for input, the computer's turn and rendering. The
+    histogram buckets are powers of two in microseconds, bucket n counts
+    the latencies below 2**n microseconds.
+
+    Games only record into a PhaseStats when one is passed to them, so the
+    instrumentation costs a single check per phase when it is disabled.
+    The game server shares one PhaseStats between the event loop and the
+    threads playing the computer's turns, so every update holds a lock.
+
+    Attributes:
+        phases (dict): Per phase name, a dict with the count, the total and
+            maximum seconds and the histogram as a list of counts.
+        counters (dict): Plain event counts by name.
+        lock (threading.Lock): Held while the statistics are read or
+            updated.
+    """
+
+    def __init__(self):
+        import threading
+
+        self.phases = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def record(self, phase, seconds):
+        """
+        Records one latency of a phase.
+
+        Args:
+            phase (str): Name of the phase
+            seconds (float): The latency
+        """
+        bucket = min(
+            int(seconds * 1000000).bit_length(), STATS_HISTOGRAM_BUCKETS - 1
+        )
+        with self.lock:
+            entry = self.phases.get(phase)
+            if entry is None:
+                entry = self.phases[phase] = {
+                    "count": 0,
+                    "total": 0.0,
+                    "max": 0.0,
+                    "histogram": [0] * STATS_HISTOGRAM_BUCKETS,
+                }
+            entry["count"] += 1
+            entry["total"] += seconds
+            if seconds > entry["max"]:
+                entry["max"] = seconds
+            entry["histogram"][bucket] += 1
+
+    def count(self, name, amount=1):
+        """
+        Adds to a plain event counter.
+
+        Args:
+            name (str): Name of the counter
+            amount (int): Amount to add
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_dict(self):
+        """
+        Summary of the recorded phases, with empty histogram buckets left
+        out.
+
+        Returns:
+            dict: The counters and, per phase, the count, the mean and
+                maximum latency in milliseconds and the histogram as a dict
+                of bucket upper bounds in microseconds to counts.
+        """
+        with self.lock:
+            return {
+                "counters": dict(self.counters),
+                "phases": {
+                    phase: {
+                        "count": entry["count"],
+                        "mean_ms": entry["total"] * 1000 / entry["count"],
+                        "max_ms": entry["max"] * 1000,
+                        "histogram_us": {
+                            f"<{2 ** bucket}": count
+                            for bucket, count in enumerate(
+                                entry["histogram"]
+                            )
+                            if count
+                        },
+                    }
+                    for phase, entry in self.phases.items()
+                },
+            }
+
+    def dump(self, path):
+        """
+        Writes the summary as JSON, replacing the previous file atomically.
+
+        Args:
+            path (str): Path of the stats file
+        """
+        import json
+
+        with open(path + ".tmp", "w", encoding="utf-8") as stats_file:
+            json.dump(self.to_dict(), stats_file, indent=2)
+        os.replace(path + ".tmp", path)
+
+
+class SpaceShipsGame:
+    """
+    Initializes the SpaceShips game with specified battlefield size, number of
+    ships, and username.
+
+    Args:
+        size (int): Size of the square battlefield (number of rows and columns)
+        number_of_ships (int): Number of ships to be placed on the battlefield.
+        username (str): Username of the player.
+        ai_mode (str): How the computer picks its targets, a key of
+            TARGETING_STRATEGIES.
+        renderer (FrameRenderer): Draws the battlefields, writes to the
+            console if None.
+        fleets (tuple of lists): Placement indices of the user's and the
+            computer's spaceships, placed randomly if None.
+        seed (int): Seed of the game's random generator, random if None.
+        stats (PhaseStats): Records the latencies of the game's phases, no
+            instrumentation if None.
+        placement_mode (str): How the computer places its fleet, a key of
+            PLACEMENT_STRATEGIES.
+        user_placement_mode (str): How the user's fleet is placed, a key of
+            PLACEMENT_STRATEGIES.
+
+    Attributes:
+        size (int): Size of the battlefield (both width and height).
+        number_of_ships (int): Number of ships each player has.
+        number_of_ship_segments (int): Total num. of segments across all ships
+        user_battlefield (Battlefield): The user's battlefield grid.
+        computer_battlefield (Battlefield): The computer's battlefield grid.
+        username (str): The username of the player.
+        user_turn_data (TurnData): Hits, attempts and turns of the user.
+        computer_turn_data (TurnData): Hits and attempts of the computer.
+        ai_mode (str): How the computer picks its targets.
+        seed (int): Seed of the game's random generator.
+        rng (random.Random): Random generator for ship placement and the
+            computer's targets.
+        event_log (array of int): Every missile fired, packed into one
+            integer each, see encode_event(), each computer target preceded
+            by the fleets sampled for it, see encode_samples().
+        restored_events (int): Number of events at the start of the event
+            log that restored a snapshot, 0 for fleets passed in, None if
+            the game placed its fleets from its seed.
+        computer_targeting (TargetingStrategy): Targeting strategy of the
+            computer, always RandomTargeting on large battlefields.
+        user_placement (PlacementStrategy): Places the user's fleet.
+        computer_placement (PlacementStrategy): Places the computer's fleet.
+        renderer (FrameRenderer): Draws the battlefields every round.
+        missiles_left (int): Missiles the user has left in the current turn.
+        stats (PhaseStats): Records the latencies of the game's phases, None
+            if the game is not instrumented.
+    """
+
+    __slots__ = (
+        "size",
+        "number_of_ships",
+        "number_of_ship_segments",
+        "user_battlefield",
+        "computer_battlefield",
+        "username",
+        "user_turn_data",
+        "computer_turn_data",
+        "ai_mode",
+        "seed",
+        "rng",
+        "event_log",
+        "restored_events",
+        "computer_targeting",
+        "user_placement",
+        "computer_placement",
+        "renderer",
+        "missiles_left",
+        "stats",
+    )
+
+    def __init__(
+        self,
+        size,
+        number_of_ships,
+        username,
+        ai_mode=COMPUTER_AI_MODE,
+        renderer=None,
+        fleets=None,
+        seed=None,
+        stats=None,
+        placement_mode=COMPUTER_PLACEMENT_MODE,
+        user_placement_mode=PLACEMENT_MODE_RANDOM,
+    ):
+        self.size = size
+        self.number_of_ships = number_of_ships
+        self.number_of_ship_segments = (
+            NUMBER_OF_DEFAULT_SHIP_SEGMENTS * number_of_ships
+        )
+        self.user_battlefield = self.create_battlefield(
+            GREEN_WHITE_STYLE, RED_WHITE_STYLE
+        )
+        self.computer_battlefield = self.create_battlefield(
+            RED_WHITE_STYLE, GREEN_WHITE_STYLE
+        )
+        self.username = username
+        self.user_turn_data = TurnData(size)
+        self.computer_turn_data = TurnData(size)
+        self.ai_mode = ai_mode
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng = random.Random(self.seed)
+        self.event_log = array("L")
+        self.restored_events = None
+        # The other strategies enumerate every placement, which large
+        # battlefields have too many of
+        self.computer_targeting = TARGETING_STRATEGIES[
+            AI_MODE_RANDOM if is_large_battlefield(size) else ai_mode
+        ].create(size, number_of_ships, self.rng)
+        self.user_placement = PLACEMENT_STRATEGIES[user_placement_mode](
+            size, self.rng
+        )
+        self.computer_placement = PLACEMENT_STRATEGIES[placement_mode](
+            size, self.rng
+        )
+        self.renderer = renderer or FrameRenderer(stats=stats)
+        self.missiles_left = NUMBER_OF_MISSILES
+        self.stats = stats
+
+        if fleets:
+            self.restored_events = 0
+            for battlefield, fleet in zip(
+                (self.user_battlefield, self.computer_battlefield), fleets
+            ):
+                for ship_id, index in enumerate(fleet, start=1):
+                    self.place_spaceship_at(battlefield, ship_id, index)
+            return
+
+        for ship_id in range(1, number_of_ships + 1):
+            self.place_spaceship(self.user_battlefield, ship_id)
+            self.place_spaceship(self.computer_battlefield, ship_id)
+
+    def create_battlefield(self, ship_style, hit_style):
+        """
+        Creates an empty battlefield of a given size, with each cell
+        initialized to an empty state, a SparseBattlefield on large
+        battlefields.
+
+        Args:
+            ship_style (str): Style string for coloring the owner's spaceships
+            hit_style (str): Style string for coloring hits on the spaceships
+
+        Returns:
+        Battlefield: The empty battlefield
+        """
+        if is_large_battlefield(self.size):
+            return SparseBattlefield(self.size, ship_style, hit_style)
+        return Battlefield(self.size, ship_style, hit_style)
+
+    def get_spaceship_coordinates(self, row, col, orientation):
+        """
+        Helper function of place_spaceship(), handles generation of coordinates
+        for a correct placed spaceship.
+
+        Args:
+            row (int): The row coord. where the spaceship should be placed
+            col (int): The column coord. where the spaceship should be placed
+            orientation (int): Given orient. how the spaceship should placed
+
+        Returns:
+            list of tuples: Returns all segment coordinates of one spaceship
+        """
+        return spaceship_coordinates(self.size, row, col, orientation)
+
+    def place_spaceship(self, battlefield, ship_id):
+        """
+        Places an 'L' shaped spaceship on the battlefield. Each spaceship
+        occupies 3 fields, with one central and side fields forming the
+        'L' shape. The spaceship is picked by the placement strategy of the
+        battlefield's owner from the precomputed placements that fit within
+        the battlefield and do not overlap existing ships.
+        On large battlefields, which have too many placements to precompute,
+        random placements are drawn until a free one is found.
+
+        Args:
+            battlefield (Battlefield): The battlefield to place the ship on
+            ship_id (int): Id stored in every segment of the spaceship
+
+        Raises:
+            ValueError: If no free placement is left on the battlefield.
+        """
+        if is_large_battlefield(self.size):
+            self.place_large_spaceship(battlefield, ship_id)
+            return
+
+        if self.stats:
+            start = time.perf_counter()
+        masks = get_placement_masks(self.size)
+        free_placements = [
+            index
+            for index, mask in enumerate(masks)
+            if not mask & battlefield.ship_mask
+        ]
+        if not free_placements:
+            raise ValueError(
+                f"No free placement left for spaceship {ship_id} on a "
+                + f"{self.size}x{self.size} battlefield."
+            )
+
+        strategy = (
+            self.computer_placement
+            if battlefield is self.computer_battlefield
+            else self.user_placement
+        )
+        self.place_spaceship_at(
+            battlefield,
+            ship_id,
+            strategy.choose_placement(battlefield, free_placements),
+        )
+        if self.stats:
+            self.stats.record("placement", time.perf_counter() - start)
+
+    def place_large_spaceship(self, battlefield, ship_id):
+        """
+        Places a spaceship on a large battlefield, see place_spaceship().
+
+        Args:
+            battlefield (SparseBattlefield): The battlefield to place the
+                ship on
+            ship_id (int): Id stored in every segment of the spaceship
+
+        Raises:
+            ValueError: If no free placement is found within
+                LARGE_PLACEMENT_DRAWS draws.
+        """
+        if self.stats:
+            start = time.perf_counter()
+        for retries in range(LARGE_PLACEMENT_DRAWS):
+            row = self.rng.randrange(self.size)
+            col = self.rng.randrange(self.size)
+            orientation = self.rng.randint(1, 4)
+            coords = spaceship_coordinates(self.size, row, col, orientation)
+            if coords and all(
+                battlefield.state(r, c) == CELL_EMPTY for r, c in coords
+            ):
+                break
+        else:
+            raise ValueError(
+                f"No free placement found for spaceship {ship_id} on a "
+                + f"{self.size}x{self.size} battlefield."
+            )
+
+        self.place_spaceship_at(
+            battlefield,
+            ship_id,
+            (row * self.size + col) * 4 + orientation - 1,
+        )
+        if self.stats:
+            self.stats.record("placement", time.perf_counter() - start)
+            self.stats.count("placement_retries", retries)
+
+    def place_spaceship_at(self, battlefield, ship_id, index):
+        """
+        Places a spaceship at a known placement of the battlefield.
+
+        Args:
+            battlefield (Battlefield): The battlefield to place the ship on
+            ship_id (int): Id stored in every segment of the spaceship
+            index (int): Index of the placement, see
+                get_spaceship_placements(), or the encoded placement on
+                large battlefields, see SparseBattlefield
+        """
+        if is_large_battlefield(self.size):
+            cell, orientation = divmod(index, 4)
+            row, col = divmod(cell, self.size)
+            for r, c in spaceship_coordinates(
+                self.size, row, col, orientation + 1
+            ):
+                battlefield.set_cell(r, c, CELL_SHIP, ship_id)
+            battlefield.ship_placements.append(index)
+            return
+
+        for r, c in get_spaceship_placements(self.size)[index]:
+            battlefield.set_cell(r, c, CELL_SHIP, ship_id)
+        battlefield.ship_mask |= get_placement_masks(self.size)[index]
+        battlefield.ship_placements.append(index)
+
+    def fire_missile(self, battlefield, target):
+        """
+        Marks a field on the battlefield as hit or miss when a missile is fired
+        and appends the shot to the event log.
+
+        Args:
+            battlefield (Battlefield): The battlefield that is fired upon.
+            target (tuple of int): Coordinates (row, col) of the missile impact
+
+        Returns:
+            str: Returns 'hit' if a spaceship was hit, otherwise 'miss'.
+        """
+        row, col = target
+        state = battlefield.state(row, col)
+
+        if state == CELL_SHIP:
+            battlefield.set_state(row, col, CELL_HIT)
+            result = "hit"
+        else:
+            if state == CELL_EMPTY:
+                battlefield.set_state(row, col, CELL_MISS)
+            result = "miss"
+
+        player = "u" if battlefield is self.computer_battlefield else "c"
+        self.event_log.append(
+            encode_event(player, row * self.size + col, result)
+        )
+        return result
+
+    def parse_target_input(self, target_input):
+        """
+        Parses the user input and converts it into row and column indices.
+
+        Args:
+            target_input (str): The input string provided by the user,
+                representing target coordinates.
+
+        Returns:
+            tuple: A tuple (row, col) representing the parsed row and column
+                indices. Returns (None, None) if parsing fails.
+        """
+        match = TARGET_PATTERN.fullmatch(target_input)
+        if not match:
+            return None, None
+        return int(match[2]) - 1, get_column_index(match[1])
+
+    def is_valid_format(self, target_input):
+        """
+        Validates the format of the target input.
+
+        Args:
+            target_input (str): The input string provided by the user.
+
+        Returns:
+            bool: True if the input is in the correct format, False otherwise.
+        """
+        return bool(TARGET_PATTERN.fullmatch(target_input))
+
+    def is_within_range(self, row, col, battlefield):
+        """
+        Checks if the given row and column indices are within the range of
+        the battlefield.
+
+        Args:
+            row (int): Row index of the target.
+            col (int): Column index of the target.
+            battlefield (Battlefield): The battlefield that is targeted.
+
+        Returns:
+            bool: True if the target is within the range of the battlefield,
+                False otherwise.
+        """
+        return 0 <= row < battlefield.size and 0 <= col < battlefield.size
+
+    def is_unique_target(self, row, col, turn_data):
+        """
+        Checks if the target coordinates have not been previously attempted.
+
+        Args:
+            row (int): Row index of the target.
+            col (int): Column index of the target.
+            turn_data (dict): Dictionary containing data about the current
+                turn, including previously attempted targets.
+
+        Returns:
+            bool: True if the target has not been previously attempted,
+                False otherwise.
+        """
+        return (row, col) not in turn_data.previous_attempts
+
+    def get_target_error(self, target_input, battlefield, turn_data):
+        """
+        Validates target coordinates entered by the user.
+
+        Args:
+            target_input (str): The upper-cased input string of the user.
+            battlefield (Battlefield): The battlefield that is targeted.
+            turn_data (dict): Dictionary containing data about the current turn
+                        , including previously attempted targets.
+
+        Returns:
+            str: Message explaining why the target is invalid, None if the
+                target is valid.
+        """
+        if not self.is_valid_format(target_input):
+            return "Invalid format. Please enter coordinates like 'A1'."
+
+        row, col = self.parse_target_input(target_input)
+        if row is None or not self.is_within_range(row, col, battlefield):
+            return (
+                "Target out of range. Please choose a target within"
+                + " the battlefield."
+            )
+
+        if not self.is_unique_target(row, col, turn_data):
+            return "Field already targeted. Choose another target."
+        return None
+
+    def computer_turn(self, time_budget=COMPUTER_TIME_BUDGET):
+        """
+        Manages the computer's turn in the game, firing missiles at the user's
+        battlefield on the targets picked by its targeting strategy. The time
+        budget is shared by the missiles of the turn: each target is due
+        when its share of the time left has passed, strategies that search
+        return the best target found by then. This budget is the one that
+        applies in games, the time_budget of a strategy only applies when it
+        is asked for a target without a deadline. How far each search got is
+        counted in the phase statistics.
+
+        Args:
+            time_budget (float): Seconds the turn may take, None for targets
+                without a deadline
+
+        Returns:
+            list of tuples: The shots of the turn in firing order, each as
+                ((row, col), result).
+        """
+        if self.stats:
+            start = time.perf_counter()
+        turn_deadline = None
+        if time_budget is not None:
+            turn_deadline = time.perf_counter() + time_budget
+        missiles_fired = 0
+        shots = []
+        self.computer_turn_data.current_turn_attempts.clear()
+
+        while (
+            missiles_fired < NUMBER_OF_MISSILES
+            and self.computer_turn_data.total_hits
+            < self.number_of_ship_segments
+        ):
+            deadline = None
+            if turn_deadline is not None:
+                now = time.perf_counter()
+                deadline = now + (turn_deadline - now) / (
+                    NUMBER_OF_MISSILES - missiles_fired
+                )
+            row, col = self.computer_targeting.choose_target(deadline)
+            if self.computer_targeting.sample_counts:
+                self.event_log.extend(
+                    map(encode_samples, self.computer_targeting.sample_counts)
+                )
+            if self.stats and self.computer_targeting.depth:
+                self.stats.count(
+                    "search_depth_" + self.computer_targeting.depth
+                )
+                self.stats.count(
+                    "search_samples", self.computer_targeting.samples
+                )
+            self.computer_turn_data.previous_attempts.add((row, col))
+            self.computer_turn_data.current_turn_attempts.append((row, col))
+            result = self.fire_missile(self.user_battlefield, (row, col))
+            self.computer_targeting.update((row, col), result)
+            shots.append(((row, col), result))
+            missiles_fired += 1
+            if result == "hit":
+                self.computer_turn_data.total_hits += 1
+                if (
+                    self.computer_turn_data.total_hits
+                    == self.number_of_ship_segments
+                ):
+                    break
+        if self.stats:
+            self.stats.record("computer_turn", time.perf_counter() - start)
+        return shots
+
+    def start_user_turn(self):
+        """
+        Starts a new turn of the user, counting the turn and resetting the
+        attempts of the current turn.
+        """
+        self.user_turn_data.current_turn_attempts.clear()
+        self.user_turn_data.number_of_turns += 1
+
+    def fire_user_missile(self, target):
+        """
+        Fires one of the user's missiles on the computer's battlefield and
+        records the attempt in the user's turn data.
+
+        Args:
+            target (tuple of int): Validated coordinates (row, col).
+
+        Returns:
+            str: Returns 'hit' if a spaceship was hit, otherwise 'miss'.
+        """
+        self.user_turn_data.previous_attempts.add(target)
+        self.user_turn_data.current_turn_attempts.append(target)
+        result = self.fire_missile(self.computer_battlefield, target)
+        if result == "hit":
+            self.user_turn_data.total_hits += 1
+        return result
+
+    def new_outcome(self):
+        """
+        The outcome of a step before anything is fired, see submit_target().
+
+        Returns:
+            dict: The outcome
+        """
+        return {
+            "error": None,
+            "target": None,
+            "result": None,
+            "missiles_left": self.missiles_left,
+            "turn_over": False,
+            "computer_shots": [],
+            "winner": self.get_winner(),
+            "viewport_moved": False,
+        }
+
+    def submit_target(self, target_input):
+        """
+        Advances the game by one missile of the user, without any console
+        input or output. When the user's turn is over and nobody has won,
+        the computer's turn is played right away.
+
+        Target inputs starting with VIEWPORT_COMMAND, e.g. '@B120', move the
+        viewport of a large enemy battlefield instead of firing.
+
+        Args:
+            target_input (str): Target coordinates as entered, e.g. 'A1'.
+
+        Returns:
+            dict: The outcome of the step, with the keys
+                'error' (str): Why the target was rejected, None if fired.
+                'viewport_moved' (bool): Whether the input moved the
+                    viewport instead of firing.
+                'target' (tuple): The coordinates (row, col) fired on.
+                'result' (str): 'hit' or 'miss'.
+                'missiles_left' (int): Missiles left in the user's turn.
+                'turn_over' (bool): Whether the user's turn has ended.
+                'computer_shots' (list): The computer's shots as
+                    ((row, col), result) if it has fired in this step.
+                'winner' (str): 'user' or 'computer', None if undecided.
+        """
+        outcome = self.new_outcome()
+        if outcome["winner"]:
+            outcome["error"] = "The game is already over."
+            return outcome
+
+        target_input = target_input.strip().upper()
+        if target_input.startswith(VIEWPORT_COMMAND):
+            outcome["error"] = self.move_viewport(
+                self.computer_battlefield, target_input[1:]
+            )
+            outcome["viewport_moved"] = not outcome["error"]
+            return outcome
+        error = self.get_target_error(
+            target_input, self.computer_battlefield, self.user_turn_data
+        )
+        if error:
+            outcome["error"] = error
+            return outcome
+
+        if self.missiles_left == NUMBER_OF_MISSILES:
+            self.start_user_turn()
+        target = self.parse_target_input(target_input)
+        outcome["target"] = target
+        outcome["result"] = self.fire_user_missile(target)
+        self.missiles_left -= 1
+
+        if self.missiles_left == 0 or self.get_winner():
+            outcome["turn_over"] = True
+            self.missiles_left = NUMBER_OF_MISSILES
+            if not self.get_winner():
+                outcome["computer_shots"] = self.computer_turn()
+
+        outcome["missiles_left"] = self.missiles_left
+        outcome["winner"] = self.get_winner()
+        return outcome
+
+    def get_volley_error(self, target_inputs):
+        """
+        Validates all targets of a volley together, before any of them is
+        fired. Each target gets the checks of get_target_error(), and no
+        target may appear twice in the volley.
+
+        Args:
+            target_inputs (list of str): The upper-cased targets entered.
+
+        Returns:
+            str: Message explaining why the volley is invalid, None if all
+                targets are valid.
+        """
+        if len(target_inputs) > self.missiles_left:
+            return (
+                f"Only {self.missiles_left} missiles left this turn, enter"
+                + " at most that many targets."
+            )
+        targets = set()
+        for target_input in target_inputs:
+            error = self.get_target_error(
+                target_input, self.computer_battlefield, self.user_turn_data
+            )
+            target = None if error else self.parse_target_input(target_input)
+            if target in targets:
+                error = "Field already targeted. Choose another target."
+            if error:
+                return f"{target_input}: {error}"
+            targets.add(target)
+        return None
+
+    def submit_volley(self, volley_input):
+        """
+        Advances the game by several missiles of the user entered on one
+        line, e.g. 'A1 B3 C4'. The volley is only fired when all of its
+        targets are valid, see get_volley_error(). A single target is
+        submitted as with submit_target().
+
+        Args:
+            volley_input (str): Target coordinates as entered, separated by
+                spaces or commas.
+
+        Returns:
+            dict: The outcome of the last missile fired, see
+                submit_target(), with the additional key
+                'shots' (list): The user's shots as ((row, col), result).
+        """
+        # Separators before or after the targets, as in 'A1, B2,', leave
+        # empty tokens
+        target_inputs = [
+            target_input
+            for target_input in VOLLEY_SEPARATOR.split(volley_input.upper())
+            if target_input
+        ] or [""]
+        if len(target_inputs) == 1 or self.get_winner():
+            outcome = self.submit_target(target_inputs[0])
+            outcome["shots"] = []
+            if outcome["target"]:
+                outcome["shots"].append((outcome["target"], outcome["result"]))
+            return outcome
+
+        error = self.get_volley_error(target_inputs)
+        if error:
+            outcome = self.new_outcome()
+            outcome["error"] = error
+            outcome["shots"] = []
+            return outcome
+
+        shots = []
+        for target_input in target_inputs:
+            outcome = self.submit_target(target_input)
+            shots.append((outcome["target"], outcome["result"]))
+            if outcome["turn_over"]:
+                break
+        outcome["shots"] = shots
+        return outcome
+
+    def move_viewport(self, battlefield, target_input):
+        """
+        Centers the viewport of a large battlefield on the given coordinates.
+
+        Args:
+            battlefield (Battlefield): The battlefield to move the view of
+            target_input (str): The upper-cased coordinates, e.g. 'B120'
+
+        Returns:
+            str: Message explaining why the view was not moved, None if it
+                was moved.
+        """
+        if battlefield.size <= VIEWPORT_SIZE:
+            return "The whole battlefield is already in view."
+        row, col = self.parse_target_input(target_input)
+        if row is None or not self.is_within_range(row, col, battlefield):
+            return (
+                f"Invalid view. Enter '{VIEWPORT_COMMAND}' followed by"
+                + " coordinates on the battlefield, like "
+                + f"'{VIEWPORT_COMMAND}A1'."
+            )
+        battlefield.focus = (row, col)
+        return None
+
+    def get_viewport(self, battlefield):
+        """
+        The rows and columns of a battlefield that are shown. Large
+        battlefields show VIEWPORT_SIZE rows and columns around their focus,
+        smaller ones are shown whole.
+
+        Args:
+            battlefield (Battlefield): The battlefield to show
+
+        Returns:
+            range: The rows shown
+            range: The columns shown
+        """
+        if battlefield.size <= VIEWPORT_SIZE:
+            return range(battlefield.size), range(battlefield.size)
+        last = battlefield.size - VIEWPORT_SIZE
+        first_row, first_col = (
+            min(max(coord - VIEWPORT_SIZE // 2, 0), last)
+            for coord in battlefield.focus
+        )
+        return (
+            range(first_row, first_row + VIEWPORT_SIZE),
+            range(first_col, first_col + VIEWPORT_SIZE),
+        )
+
+    def get_state(self, hide_ships=HIDE_COMPUTER_SHIPS):
+        """
+        Snapshot of the game state, without any styling. Large battlefields
+        are only included within their viewports.
+
+        Args:
+            hide_ships (bool): Whether to hide the computer's spaceships.
+
+        Returns:
+            dict: The size, number of ships, username, number of turns,
+                missiles left, total hits of both players, the winner,
+                both battlefields as rows of CELL_SYMBOLS and the
+                coordinates (row, col) of the top left cell of both
+                viewports.
+        """
+        user_rows, user_cols = self.get_viewport(self.user_battlefield)
+        computer_rows, computer_cols = self.get_viewport(
+            self.computer_battlefield
+        )
+        return {
+            "size": self.size,
+            "number_of_ships": self.number_of_ships,
+            "username": self.username,
+            "number_of_turns": self.user_turn_data.number_of_turns,
+            "missiles_left": self.missiles_left,
+            "user_hits": self.user_turn_data.total_hits,
+            "computer_hits": self.computer_turn_data.total_hits,
+            "winner": self.get_winner(),
+            "user_battlefield": self.user_battlefield.to_rows(
+                False, user_rows, user_cols
+            ),
+            "computer_battlefield": self.computer_battlefield.to_rows(
+                hide_ships, computer_rows, computer_cols
+            ),
+            "user_viewport": (user_rows.start, user_cols.start),
+            "computer_viewport": (computer_rows.start, computer_cols.start),
+        }
+
+    def dump_snapshot(self):
+        """
+        Serializes the game state into a compact, versioned binary snapshot.
+        Spaceships are stored as placement indices and shots as a bitmask
+        per battlefield, so a 10x10 game takes less than 100 bytes.
+
+        Returns:
+            bytes: The snapshot, see load_snapshot()
+
+        Raises:
+            ValueError: If the game is played on a large battlefield or its
+                seed does not fit in 32 bits.
+        """
+        if is_large_battlefield(self.size):
+            raise ValueError(
+                "Snapshots are limited to battlefields up to "
+                + f"{BATTLEFIELD_MAX_SIZE}x{BATTLEFIELD_MAX_SIZE}."
+            )
+        if not 0 <= self.seed < 2**32:
+            raise ValueError("Snapshots are limited to 32 bit seeds.")
+        username = self.username.encode()
+        mask_length = (self.size * self.size + 7) // 8
+        parts = [
+            SNAPSHOT_HEADER.pack(
+                SNAPSHOT_MAGIC,
+                SNAPSHOT_VERSION,
+                self.size,
+                self.number_of_ships,
+                SNAPSHOT_AI_MODES.index(self.ai_mode),
+                self.missiles_left,
+                self.user_turn_data.number_of_turns,
+                self.seed,
+                len(username),
+            ),
+            username,
+        ]
+        for battlefield in (self.user_battlefield, self.computer_battlefield):
+            parts.append(
+                struct.pack(
+                    f"!{self.number_of_ships}H", *battlefield.ship_placements
+                )
+            )
+            parts.append(battlefield.fired_mask().to_bytes(mask_length, "big"))
+        for turn_data in (self.user_turn_data, self.computer_turn_data):
+            attempts = [
+                row * self.size + col
+                for row, col in turn_data.current_turn_attempts
+            ]
+            parts.append(
+                struct.pack(f"!B{len(attempts)}H", len(attempts), *attempts)
+            )
+        return b"".join(parts)
+
+    @classmethod
+    def load_snapshot(cls, data, renderer=None):
+        """
+        Restores a game from a snapshot created by dump_snapshot(). The
+        restored game keeps the seed of the saved one.
+
+        Args:
+            data (bytes): The snapshot
+            renderer (FrameRenderer): Draws the battlefields, writes to the
+                console if None.
+
+        Returns:
+            SpaceShipsGame: The restored game
+
+        Raises:
+            ValueError: If the data is not a snapshot of a supported version,
+                or is truncated or corrupt.
+        """
+        try:
+            (
+                magic,
+                version,
+                size,
+                number_of_ships,
+                ai_mode,
+                missiles_left,
+                number_of_turns,
+                seed,
+                username_length,
+            ) = SNAPSHOT_HEADER.unpack_from(data)
+        except struct.error as error:
+            raise ValueError("Snapshot is truncated.") from error
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError("Unsupported snapshot format.")
+        if (
+            not BATTLEFIELD_MIN_SIZE <= size <= BATTLEFIELD_MAX_SIZE
+            or not number_of_ships
+            or not 1 <= missiles_left <= NUMBER_OF_MISSILES
+            or ai_mode >= len(SNAPSHOT_AI_MODES)
+        ):
+            raise ValueError("Snapshot is corrupt.")
+
+        offset = SNAPSHOT_HEADER.size
+        mask_length = (size * size + 7) // 8
+        # The username and both fleets and fired masks, the attempts are
+        # checked when read
+        if len(data) < (
+            offset
+            + username_length
+            + 2 * (2 * number_of_ships + mask_length)
+        ):
+            raise ValueError("Snapshot is truncated.")
+        username = data[offset:offset + username_length].decode()
+        offset += username_length
+        masks = get_placement_masks(size)
+        fleets = []
+        fired_masks = []
+        for _ in range(2):
+            fleet = struct.unpack_from(f"!{number_of_ships}H", data, offset)
+            offset += 2 * number_of_ships
+            fleet_mask = 0
+            for index in fleet:
+                if index >= len(masks) or masks[index] & fleet_mask:
+                    raise ValueError("Snapshot is corrupt.")
+                fleet_mask |= masks[index]
+            fleets.append(list(fleet))
+            fired_mask = int.from_bytes(
+                data[offset:offset + mask_length], "big"
+            )
+            if fired_mask >> (size * size):
+                raise ValueError("Snapshot is corrupt.")
+            fired_masks.append(fired_mask)
+            offset += mask_length
+
+        attempts = []
+        for _ in range(2):
+            if len(data) <= offset:
+                raise ValueError("Snapshot is truncated.")
+            count = data[offset]
+            offset += 1
+            if count > NUMBER_OF_MISSILES or len(data) < offset + 2 * count:
+                raise ValueError("Snapshot is corrupt.")
+            indices = struct.unpack_from(f"!{count}H", data, offset)
+            offset += 2 * count
+            if any(index >= size * size for index in indices):
+                raise ValueError("Snapshot is corrupt.")
+            attempts.append(indices)
+        if offset != len(data):
+            raise ValueError("Snapshot is corrupt.")
+
+        game = cls(
+            size,
+            number_of_ships,
+            username,
+            SNAPSHOT_AI_MODES[ai_mode],
+            renderer,
+            fleets,
+            seed,
+        )
+        game.missiles_left = missiles_left
+        game.user_turn_data.number_of_turns = number_of_turns
+        shots = (
+            (game.user_battlefield, fired_masks[0]),
+            (game.computer_battlefield, fired_masks[1]),
+        )
+        for battlefield, fired_mask in shots:
+            for index in range(size * size):
+                if fired_mask >> index & 1:
+                    game.restore_shot(battlefield, divmod(index, size))
+
+        for turn_data, indices in zip(
+            (game.user_turn_data, game.computer_turn_data), attempts
+        ):
+            turn_data.current_turn_attempts.extend(
+                divmod(index, size) for index in indices
+            )
+        game.restored_events = len(game.event_log)
+        return game
+
+    def restore_shot(self, battlefield, target):
+        """
+        Fires a missile of a restored game on a battlefield, recording it
+        in the turn data of the player who fired it and teaching the
+        computer's targeting strategy about its own shots.
+
+        Args:
+            battlefield (Battlefield): The battlefield fired on
+            target (tuple of int): Coordinates (row, col) fired upon
+
+        Returns:
+            str: 'hit' or 'miss'
+        """
+        turn_data = self.user_turn_data
+        if battlefield is self.user_battlefield:
+            turn_data = self.computer_turn_data
+        result = self.fire_missile(battlefield, target)
+        turn_data.previous_attempts.add(target)
+        if result == "hit":
+            turn_data.total_hits += 1
+        if battlefield is self.user_battlefield:
+            self.computer_targeting.update(target, result)
+        return result
+
+    def get_state_digest(self):
+        """
+        Checksum of both battlefields, used to verify replays.
+
+        Returns:
+            int: CRC32 of the cells of both battlefields
+        """
+        import zlib
+
+        return zlib.crc32(
+            self.user_battlefield.to_bytes()
+            + self.computer_battlefield.to_bytes()
+        )
+
+    def format_event_log(self):
+        """
+        Builds the event log of the game: a JSON header with the setup
+        parameters, one line per missile fired, preceded by the fleets
+        sampled for each computer target, and a final line with the winner
+        and the state digest, see replay.py.
+
+        Returns:
+            str: The event log
+        """
+        import json
+
+        header = json.dumps(
+            {
+                "version": EVENT_LOG_VERSION,
+                "size": self.size,
+                "number_of_ships": self.number_of_ships,
+                "username": self.username,
+                "ai_mode": self.ai_mode,
+                "seed": self.seed,
+                "restored_events": self.restored_events,
+                "fleets": [
+                    self.user_battlefield.ship_placements,
+                    self.computer_battlefield.ship_placements,
+                ],
+            }
+        )
+        return "\n".join(
+            [header]
+            + [format_event(event) for event in self.event_log]
+            + [f"state {self.get_winner()} {self.get_state_digest()}", ""]
+        )
+
+    def user_turn(self):
+        """
+        Console adapter for the user's turn, prompts for targets and submits
+        them until the turn is over. Several targets can be entered on one
+        line, see submit_volley().
+
+        Returns:
+            dict: The outcome of the last missile, see submit_target().
+        """
+        while True:
+            if self.stats:
+                start = time.perf_counter()
+                target_input = input(TARGET_PROMPT)
+                self.stats.record("input_wait", time.perf_counter() - start)
+            else:
+                target_input = input(TARGET_PROMPT)
+            outcome = self.submit_volley(target_input)
+            if outcome["error"]:
+                if self.stats:
+                    self.stats.count("invalid_targets")
+                print(outcome["error"])
+            elif outcome["viewport_moved"]:
+                self.draw_battlefields()
+            elif outcome["turn_over"]:
+                return outcome
+
+    def render_battlefield_header(self, name, style, battlefield_length):
+        """
+        Builds the header lines for the battlefield.
+
+        Args:
+            name (str): The name to display above the battlefield.
+            style (str): Style string for coloring the output.
+            battlefield_length (int): Length of the battlefield to calculate
+                border length.
+
+        Returns:
+            list of tuples: The header lines, one segment each.
+        """
+        header_border = "##" * (
+            (battlefield_length - BATTLEFIELD_MIN_SIZE) * 2 + 11
+        )
+        border_l = "#" * math.ceil((len(header_border) - 12 - len(name)) / 2)
+        border_r = "#" * math.floor((len(header_border) - 12 - len(name)) / 2)
+        return [
+            ("",),
+            (header_border,),
+            (
+                f"{style}{border_l}{name.upper()}"
+                + f" BATTLEFIELD{border_r}{Style.RESET_ALL}",
+            ),
+            (header_border,),
+        ]
+
+    def get_row_label_width(self, battlefield):
+        """
+        Width of the row indices of a battlefield.
+
+        Args:
+            battlefield (Battlefield): The battlefield to print
+
+        Returns:
+            int: Number of characters of the widest row index
+        """
+        return max(2, len(str(battlefield.size)))
+
+    def render_battlefield_indices(self, battlefield, style, cols=None):
+        """
+        Builds the line of column indices for the battlefield.
+
+        Args:
+            battlefield (Battlefield): The battlefield to print indices for.
+            style (str): Style string for coloring the output.
+            cols (range): The columns shown, all if None.
+
+        Returns:
+            tuple: The indices line as a single segment.
+        """
+        cols = cols or range(battlefield.size)
+        top_indices = (
+            " " * (self.get_row_label_width(battlefield) + 1)
+            + "||"
+            + "|".join(f"{get_column_label(col):^3}" for col in cols)
+            + "||"
+        )
+        return (style + top_indices + Style.RESET_ALL,)
+
+    def render_battlefield_row(
+        self, battlefield, index, style, hide_ships, cols=None, width=None
+    ):
+        """
+        Builds a single row of the battlefield.
+
+        Args:
+            battlefield (Battlefield): The battlefield the row belongs to.
+            index (int): The index of the row to print.
+            style (str): Style string for coloring the output.
+            hide_ships (bool): Whether to hide the ships on the battlefield.
+            cols (range): The columns shown, all if None.
+            width (int): Width of the row index, see get_row_label_width().
+
+        Returns:
+            tuple: The row index, one segment per cell and the closing border
+        """
+        cols = cols or range(battlefield.size)
+        width = width or self.get_row_label_width(battlefield)
+        return (
+            (get_row_label(style, index, width),)
+            + battlefield.render_cells(index, cols, hide_ships)
+            + ("||",)
+        )
+
+    def render_battlefield(
+        self, battlefield, style, hide_ships, name, compact=False
+    ):
+        """
+        Builds the lines showing the current state of the battlefield, with
+        row and column indicators, each cell shows its current state. Large
+        battlefields are shown within their viewport, followed by a line
+        telling which part is shown.
+
+        Args:
+            battlefield (Battlefield): The battlefield to print
+            style (str): Style string for coloring the output
+            hide_ships (boolean): Bool to hide ships
+            name (str): Display name above battlefield grid
+            compact (bool): Whether the name is shown next to the column
+                indices instead of in a header of its own
+
+        Returns:
+            list of tuples: The lines of the battlefield, see FrameRenderer
+        """
+        rows, cols = self.get_viewport(battlefield)
+        width = self.get_row_label_width(battlefield)
+        indices = self.render_battlefield_indices(battlefield, style, cols)
+        if compact:
+            header = [
+                (
+                    indices[0]
+                    + f" {style}{name.upper()} BATTLEFIELD{Style.RESET_ALL}",
+                )
+            ]
+        else:
+            header = self.render_battlefield_header(
+                name, style, len(cols)
+            ) + [indices]
+        lines = (
+            header
+            + [
+                self.render_battlefield_row(
+                    battlefield, i, style, hide_ships, cols, width
+                )
+                for i in rows
+            ]
+        )
+        if len(rows) < battlefield.size:
+            view = (
+                f"Showing {format_target(rows[0], cols[0])} to "
+                + f"{format_target(rows[-1], cols[-1])} of "
+                + f"{battlefield.size}x{battlefield.size}"
+            )
+            if battlefield is self.computer_battlefield:
+                view += f", enter e.g. '{VIEWPORT_COMMAND}A1' to move the view"
+            lines.append((view + ".",))
+        return lines
+
+    def print_battlefield(self, battlefield, style, hide_ships, name):
+        """
+        Prints the current state of the battlefield in a single write.
+
+        Args:
+            battlefield (Battlefield): The battlefield to print
+            style (str): Style string for coloring the output
+            hide_ships (boolean): Bool to hide ships
+            name (str): Display name above battlefield grid
+        """
+        if self.stats:
+            start = time.perf_counter()
+        output = StyledOutput(self.renderer.coalesce)
+        output.write_lines(
+            self.render_battlefield(battlefield, style, hide_ships, name)
+        )
+        print(output.getvalue())
+        if self.stats:
+            self.stats.record("render", time.perf_counter() - start)
+
+    def format_turn_summary(self, style):
+        """
+        Generates a summary of the attempts and hits for both the user and
+        the computer.
+
+        Args:
+            style (str): Style string for coloring the output
+
+        Returns:
+            str: The styled summary
+        """
+
+        def format_attempts(attempts):
+            return ", ".join(
+                [format_target(row, col) for row, col in attempts]
+            )
+
+        user_attempts = format_attempts(
+            self.user_turn_data.current_turn_attempts
+        )
+        computer_attempts = format_attempts(
+            self.computer_turn_data.current_turn_attempts
+        )
+
+        user_hits = sum(
+            1
+            for row, col in self.user_turn_data.current_turn_attempts
+            if self.computer_battlefield.state(row, col) == CELL_HIT
+        )
+        computer_hits = sum(
+            1
+            for row, col in self.computer_turn_data.current_turn_attempts
+            if self.user_battlefield.state(row, col) == CELL_HIT
+        )
+
+        return (
+            f"{style}\nTurn Summary:"
+            + f"\nUser fired on fields {user_attempts}. Hits: {user_hits}."
+            + f"\nComputer fired on fields {computer_attempts}. "
+            + f"Hits: {computer_hits}"
+            + Style.RESET_ALL
+        )
+
+    def generate_turn_summary(self, style):
+        """
+        Prints a summary of the attempts and hits for both the user and the
+        computer.
+
+        Args:
+            style (str): Style string for coloring the output
+        """
+        summary = self.format_turn_summary(style)
+        print(coalesce_styles(summary) if self.renderer.coalesce else summary)
+
+    def play_round(self):
+        """
+        Executes a single round of the game, which involves both the user's and
+        computer's turns.The round starts with the user's turn, followed by the
+        computer's turn, unless the user has already won the game. The
+        battlefield status for both the user and computer is displayed.
+
+        The round progresses as follows:
+        - User's turn: User attempts to hit computer's ships.
+        - Computer's turn: Computer attempts to hit user's ships
+            (if user hasn't won yet).
+        - Round is finished, a summary is printed.
+        """
+        if self.stats:
+            start = time.perf_counter()
+            self.draw_battlefields()
+            self.stats.record("render", time.perf_counter() - start)
+        else:
+            self.draw_battlefields()
+        print("\nUser's turn to fire!")
+        outcome = self.user_turn()
+
+        if outcome["winner"] == "user":
+            print("All enemy ships have been hit!")
+            return
+
+        print("\nComputer's turn to fire!")
+        if outcome["winner"] == "computer":
+            print("All your ships have been hit! Computer wins!")
+
+        self.generate_turn_summary(MAGENTA_WHITE_STYLE)
+
+    def render_battlefields(self, compact=False):
+        """
+        Builds the frame shown every round, the user's battlefield above the
+        enemy battlefield.
+
+        Args:
+            compact (bool): Whether the battlefields are drawn without their
+                headers, see render_battlefield()
+
+        Returns:
+            list of tuples: The lines of the frame, see FrameRenderer
+        """
+        return self.render_battlefield(
+            self.user_battlefield,
+            BLUE_WHITE_STYLE,
+            False,
+            self.username,
+            compact,
+        ) + self.render_battlefield(
+            self.computer_battlefield,
+            RED_WHITE_STYLE,
+            HIDE_COMPUTER_SHIPS,
+            "Enemy",
+            compact,
+        )
+
+    def draw_battlefields(self):
+        """
+        Draws the frame of the round. Where the regular frame would leave
+        too few rows for the messages below it, e.g. from 5x5 on in an 80x24
+        terminal, the compact frame is drawn instead, so it can still be
+        pinned and redrawn in place.
+        """
+        frame = self.render_battlefields()
+        if self.renderer.is_cramped(frame):
+            frame = self.render_battlefields(compact=True)
+        self.renderer.draw(frame)
+
+    def get_winner(self):
+        """
+        Determines the winner based on the total hits recorded for each
+        player.
+
+        Returns:
+            str: 'user' or 'computer' if that player has hit all segments of
+                the opponent's spaceships, None while the game continues.
+        """
+        if self.user_turn_data.total_hits == self.number_of_ship_segments:
+            return "user"
+        elif (
+            self.computer_turn_data.total_hits
+            == self.number_of_ship_segments
+        ):
+            return "computer"
+        return None
+
+    def format_winner_message(self, style):
+        """
+        Builds the message announcing the winner of the game.
+
+        Args:
+            style (str): Style string for coloring the output
+
+        Returns:
+            str: The message, None while the game continues.
+        """
+        winner = self.get_winner()
+        if winner == "user":
+            return (
+                f"{style}"
+                + f"\n\nCongratulations {self.username.upper()}! All enemy "
+                + "spacecraft destroyed. You win!"
+                + Style.RESET_ALL
+            )
+        elif winner == "computer":
+            return "All your spacecraft destroyed. Computer wins!"
+        return None
+
+    def check_winner(self, style):
+        """
+        Checks if there is a winner in the game based on the total hits
+        recorded for each player.
+
+        Args:
+            style (str): Style string for coloring the output
+
+
+        Returns:
+            bool: Returns True if either the user or the computer has hit all
+                segments of the opponent's spaceships, indicating a win.
+                Otherwise, returns False, indicating the game continues.
+        """
+        message = self.format_winner_message(style)
+        if message:
+            print(message)
+            return True
+        return False
+
+    def play_game(self, checkpoint=None):
+        """
+        Starts and manages the gameplay loop. The game continues in rounds
+        until a winner is determined. Each round consists of both the user's
+        and computer's turns, with the game checking for a winner after each
+        round.
+
+        Args:
+            checkpoint (callable): Called with the game after every round,
+                e.g. to save a snapshot.
+        """
+        while not self.check_winner(MAGENTA_WHITE_STYLE):
+            self.play_round()
+            if checkpoint:
+                checkpoint(self)
+        self.renderer.close()
+
+
+class SnapshotStore:
+    """
+    Keeps one game snapshot per session id as a file, so an interrupted
+    session can be resumed by a new process.
+
+    Args:
+        directory (str): Directory of the snapshot files, taken from the
+            SPACESHIPS_SNAPSHOT_DIR environment variable or the temp
+            directory if None.
+
+    Attributes:
+        directory (str): Directory of the snapshot files.
+    """
+
+    def __init__(self, directory=None):
+        if directory is None:
+            import tempfile
+
+            directory = os.environ.get(
+                SNAPSHOT_DIR_VARIABLE,
+                os.path.join(tempfile.gettempdir(), "spaceships"),
+            )
+        self.directory = directory
+
+    def get_path(self, session_id):
+        """
+        Path of the snapshot file of a session.
+
+        Args:
+            session_id (str): The session id
+
+        Returns:
+            str: The path of the snapshot file
+
+        Raises:
+            ValueError: If the session id is not a valid file name.
+        """
+        if not SESSION_ID_PATTERN.fullmatch(session_id):
+            raise ValueError(f"Invalid session id {session_id!r}.")
+        return os.path.join(self.directory, session_id + ".ssg")
+
+    def save(self, session_id, game):
+        """
+        Saves the snapshot of a game, replacing the previous one atomically.
+
+        Args:
+            session_id (str): The session id
+            game (SpaceShipsGame): The game to save
+        """
+        path = self.get_path(session_id)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path + ".tmp", "wb") as snapshot_file:
+            snapshot_file.write(game.dump_snapshot())
+        os.replace(path + ".tmp", path)
+
+    def load(self, session_id, renderer=None):
+        """
+        Loads the game saved for a session.
+
+        Args:
+            session_id (str): The session id
+            renderer (FrameRenderer): Passed to the restored game
+
+        Returns:
+            SpaceShipsGame: The restored game, None if there is no valid
+                snapshot for the session.
+        """
+        try:
+            with open(self.get_path(session_id), "rb") as snapshot_file:
+                return SpaceShipsGame.load_snapshot(
+                    snapshot_file.read(), renderer
+                )
+        except (OSError, ValueError):
+            return None
+
+    def delete(self, session_id):
+        """
+        Removes the snapshot of a session, if there is one.
+
+        Args:
+            session_id (str): The session id
+        """
+        try:
+            os.remove(self.get_path(session_id))
+        except OSError:
+            pass
+
+
+class HistoryStore:
+    """
+    Keeps the finished games and a leaderboard per battlefield size in a
+    SQLite database. Results are queued and written by a background
+    thread, many per transaction, so recording a game never waits for the
+    disk. Players are ranked per size by their fastest win in turns. The
+    rank_counts table holds the number of players per fastest win, so a
+    rank is a sum over at most one row per possible number of turns,
+    however many players there are.
+
+    Args:
+        path (str): Path of the database, taken from the
+            SPACESHIPS_HISTORY_DB environment variable or the user's data
+            directory (XDG_DATA_HOME, ~/.local/share by default) if None.
+
+    Attributes:
+        path (str): Path of the database.
+        results (queue.Queue): Rows of the games waiting to be written,
+            None stops the writer.
+        ready (threading.Event): Set once the writer has set up the
+            database.
+        failed (bool): Whether the database could not be opened, the
+            history is then not kept.
+        writer (threading.Thread): Writes the queued results.
+        connection (sqlite3.Connection): Reads the leaderboard, opened on
+            first use.
+    """
+
+    def __init__(self, path=None):
+        import queue
+        import threading
+
+        if path is None:
+            # Each user keeps their own history, not one shared by all
+            # users of the machine
+            data_home = os.environ.get(DATA_HOME_VARIABLE) or os.path.join(
+                os.path.expanduser("~"), ".local", "share"
+            )
+            path = os.environ.get(
+                HISTORY_PATH_VARIABLE,
+                os.path.join(data_home, "spaceships", "history.db"),
+            )
+        self.path = path
+        self.results = queue.Queue()
+        self.ready = threading.Event()
+        self.failed = False
+        self.connection = None
+        self.writer = threading.Thread(
+            target=self.write_results, daemon=True
+        )
+        self.writer.start()
+
+    def connect(self):
+        """
+        Opens a connection to the database in WAL mode, so the leaderboard
+        can be read while results are written, also by other processes.
+
+        Returns:
+            sqlite3.Connection: The connection
+        """
+        import sqlite3
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=HISTORY_BUSY_TIMEOUT)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(f"PRAGMA cache_size=-{HISTORY_CACHE_KIB}")
+        return connection
+
+    def record(self, game):
+        """
+        Queues the result of a finished game, without waiting for it to be
+        written.
+
+        Args:
+            game (SpaceShipsGame): The finished game
+        """
+        self.results.put(
+            (
+                game.username,
+                game.size,
+                game.number_of_ships,
+                game.user_turn_data.number_of_turns,
+                game.user_turn_data.total_hits,
+                game.computer_turn_data.total_hits,
+                game.get_winner(),
+                time.time(),
+            )
+        )
+
+    def write_results(self):
+        """
+        Runs in the writer thread: sets up the database, then writes the
+        queued results, all results queued at once in one transaction.
+        """
+        import queue
+        import sqlite3
+
+        try:
+            connection = self.connect()
+            connection.executescript(HISTORY_SCHEMA)
+        except (OSError, sqlite3.Error):
+            connection = None
+            self.failed = True
+        self.ready.set()
+
+        while True:
+            batch = [self.results.get()]
+            while len(batch) < HISTORY_BATCH_SIZE and batch[-1] is not None:
+                try:
+                    batch.append(self.results.get_nowait())
+                except queue.Empty:
+                    break
+            results = [result for result in batch if result is not None]
+            try:
+                if connection and results:
+                    with connection:
+                        self.write_batch(connection, results)
+            except sqlite3.Error:
+                # The results are lost, the game goes on without them
+                pass
+            finally:
+                for _ in batch:
+                    self.results.task_done()
+            if batch[-1] is None:
+                if connection:
+                    connection.close()
+                return
+
+    @staticmethod
+    def write_batch(connection, results):
+        """
+        Adds games to the history and updates the statistics of their
+        players, within the caller's transaction. The triggers of the
+        schema keep the rank counts up to date.
+
+        Args:
+            connection (sqlite3.Connection): Connection of the writer
+            results (list of tuples): Rows of the games, see record()
+        """
+        connection.executemany(
+            "INSERT INTO games (username, size, number_of_ships, "
+            + "number_of_turns, user_hits, computer_hits, winner, "
+            + "finished_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            results,
+        )
+        players = []
+        for username, size, _, turns, _, _, winner, _ in results:
+            won = winner == "user"
+            players.append((username, size, won, turns if won else None))
+        connection.executemany(
+            "INSERT INTO players VALUES (?, ?, 1, ?, ?) "
+            + "ON CONFLICT DO UPDATE SET games = games + 1, "
+            + "wins = wins + excluded.wins, "
+            + "best_turns = COALESCE(MIN(best_turns, excluded.best_turns), "
+            + "best_turns, excluded.best_turns)",
+            players,
+        )
+
+    def get_connection(self):
+        """
+        Waits until the queued results are written and returns the
+        connection for reading.
+
+        Returns:
+            sqlite3.Connection: The reading connection, None if the
+                history is not kept.
+        """
+        self.ready.wait()
+        if self.failed:
+            return None
+        self.results.join()
+        if self.connection is None:
+            self.connection = self.connect()
+        return self.connection
+
+    def get_rank(self, username, size):
+        """
+        The rank of a player on the leaderboard of a battlefield size,
+        including the games recorded so far. Players with the same fastest
+        win share a rank.
+
+        Args:
+            username (str): Username of the player
+            size (int): Size of the battlefield
+
+        Returns:
+            tuple: The rank, the fastest win in turns and the number of
+                ranked players, None if the player has not won on this size
+                yet or the history is not kept.
+        """
+        connection = self.get_connection()
+        if connection is None:
+            return None
+        row = connection.execute(
+            "SELECT best_turns FROM players WHERE username = ? AND size = ?",
+            (username, size),
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        best_turns = row[0]
+        ahead, ranked = connection.execute(
+            "SELECT TOTAL(CASE WHEN best_turns < ? THEN players END), "
+            + "TOTAL(players) FROM rank_counts WHERE size = ?",
+            (best_turns, size),
+        ).fetchone()
+        return int(ahead) + 1, best_turns, int(ranked)
+
+    def get_leaderboard(self, size, limit=LEADERBOARD_SIZE):
+        """
+        The fastest players on a battlefield size.
+
+        Args:
+            size (int): Size of the battlefield
+            limit (int): Maximum number of players
+
+        Returns:
+            list of tuples: Username, fastest win in turns, wins and games
+                of each player, fastest first, empty if the history is not
+                kept.
+        """
+        connection = self.get_connection()
+        if connection is None:
+            return []
+        return connection.execute(
+            "SELECT username, best_turns, wins, games FROM players "
+            + "WHERE size = ? AND best_turns IS NOT NULL "
+            + "ORDER BY best_turns, wins DESC LIMIT ?",
+            (size, limit),
+        ).fetchall()
+
+    def get_player_stats(self, username):
+        """
+        The statistics of a player on every battlefield size played.
+
+        Args:
+            username (str): Username of the player
+
+        Returns:
+            list of tuples: Size, games, wins and fastest win in turns per
+                size, None for the latter without a win.
+        """
+        connection = self.get_connection()
+        if connection is None:
+            return []
+        return connection.execute(
+            "SELECT size, games, wins, best_turns FROM players "
+            + "WHERE username = ? ORDER BY size",
+            (username,),
+        ).fetchall()
+
+    def close(self):
+        """
+        Writes the queued results and stops the writer.
+        """
+        self.results.put(None)
+        self.writer.join()
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+
+
+def open_history():
+    """
+    Opens the game history of the console and the game server, unless the
+    SPACESHIPS_HISTORY_DB environment variable is set to an empty string.
+
+    Returns:
+        HistoryStore: The history, None if no history is kept
+    """
+    if os.environ.get(HISTORY_PATH_VARIABLE) == "":
+        return None
+    return HistoryStore()
+
+
+def format_rank(size, rank):
+    """
+    Builds the line of the end screen showing the player's rank.
+
+    Args:
+        size (int): Size of the battlefield
+        rank (tuple): The player's rank, see HistoryStore.get_rank()
+
+    Returns:
+        str: The message
+    """
+    if rank is None:
+        return f"Win a game on {size}x{size} to enter its leaderboard."
+    position, best_turns, ranked = rank
+    return (
+        f"Your fastest win on {size}x{size}: {best_turns} turns, "
+        + f"rank {position} of {ranked}."
+    )
+
+
+def get_username_error(username):
+    """
+    Validates a username against the length criteria defined by
+    USERNAME_LENGTH_FLOOR and USERNAME_LENGTH_CEIL.
+
+    Args:
+        username (str): The username entered by the user.
+
+    Returns:
+        str: Message explaining why the username is invalid, None if the
+            username is valid.
+    """
+    if (
+        len(username) < USERNAME_LENGTH_FLOOR
+        or len(username) > USERNAME_LENGTH_CEIL
+    ):
+        return "Your username does not meet the length requirement"
+    elif username.isspace():
+        return "Your username contains only whitespaces, try again."
+    return None
+
+
+def get_valid_username(style):
+    """
+    Prompts the user to enter a username that meets the length criteria
+
+    The function continuously requests input until the user provides a username
+    that meets the length requirements defined by USERNAME_LENGTH_FLOOR
+    and USERNAME_LENGTH_CEIL.
+
+    Args:
+        style (str): Style string for coloring the output
+    Returns:
+        str: The validated username that meets the length requirements.
+    """
+    while True:
+        username = input(style + USERNAME_PROMPT + Style.RESET_ALL)
+        error = get_username_error(username)
+        if error:
+            print(error)
+        else:
+            return username
+
+
+def get_game_size_error(size_input):
+    """
+    Validates a battlefield size entered by the user, it must be an integer
+    between BATTLEFIELD_MIN_SIZE and BATTLEFIELD_MAX_SIZE, or between
+    LARGE_BATTLEFIELD_MIN_SIZE and LARGE_BATTLEFIELD_MAX_SIZE for a large
+    battlefield.
+
+    Args:
+        size_input (str): The input string provided by the user.
+
+    Returns:
+        str: Message explaining why the size is invalid, None if the size
+            is valid.
+    """
+    try:
+        size = int(size_input)
+    except ValueError:
+        return "Invalid input. Please enter a valid integer size."
+    if not (
+        BATTLEFIELD_MIN_SIZE <= size <= BATTLEFIELD_MAX_SIZE
+        or LARGE_BATTLEFIELD_MIN_SIZE <= size <= LARGE_BATTLEFIELD_MAX_SIZE
+    ):
+        return (
+            f"Invalid input, please enter a natural number between"
+            f" {BATTLEFIELD_MIN_SIZE} and {BATTLEFIELD_MAX_SIZE}, or between"
+            f" {LARGE_BATTLEFIELD_MIN_SIZE} and {LARGE_BATTLEFIELD_MAX_SIZE}."
+        )
+    return None
+
+
+def get_valid_game_size():
+    """
+    Prompts user to enter a valid battlefield size, must be within a specified
+    range. Continuously asks for input until a valid size is entered
+
+    Returns:
+        int: The validated size of the battlefield entered by the user
+        int: Number of spaceships participating for each player
+    """
+    while True:
+        size_input = input(GAME_SIZE_PROMPT)
+        error = get_game_size_error(size_input)
+        if error:
+            print(error)
+        else:
+            size = int(size_input)
+            return size, get_number_of_ships(size)
+
+
+def format_rules(style, username):
+    """
+    Builds an introduction and rules how the game should be played.
+
+    Args:
+        style (str): Style string for coloring the output
+        username (str): Username of the player.
+
+    Return:
+        str: The styled introduction and rules.
+    """
+    return (
+        "\n\n"
+        + style
+        + "Welcome to SpaceShips, a variant of the classic BattleShip game."
+        + f"\n\nCaptain {username} you'll be tasked to defend your SpaceShips"
+        + " crossing \nenemy territory against the enemy forces. "
+        + f"You're convoy are {L_SHIP}-class spaceships."
+        + "\nMost likely, your enemy uses the same"
+        + "\nThere will also be no intel on their orientation!"
+        + "\nBe aware, the number of SpaceShips increases with the "
+        + "size of the battlefield."
+        + "\nPer round, you'll have three attempts to disable enemy spaceships"
+        + "\nby firing missiles on the enemy battlefield, hit them before they"
+        + " do!"
+        + "\nEnter one target at a time, or all of them at once like A1 B3 C4."
+        + "\n\nGOOD LUCK Captain!"
+        + Style.RESET_ALL
+        + "\n\n"
+    )
+
+
+def display_rules(style, username):
+    """
+    Display an introduction and rules how the game should be played.
+
+    Args:
+        style (str): Style string for coloring the output
+        username (str): Username of the player.
+
+    Return:
+        No return, outputs game information on the console.
+    """
+    print(format_rules(style, username))
+
+
+def get_title():
+    """
+    Returns the ASCII art title of the game. The title is read from the
+    cache at TITLE_CACHE_PATH, pyfiglet is only imported to render and cache
+    the title when the cache is missing.
+
+    Returns:
+        str: The rendered title
+    """
+    try:
+        with open(TITLE_CACHE_PATH, encoding="utf-8") as title_file:
+            return title_file.read()
+    except OSError:
+        pass
+
+    import pyfiglet
+
+    title = pyfiglet.figlet_format("SpaceShips", font=TITLE_FONT)
+    try:
+        with open(TITLE_CACHE_PATH, "w", encoding="utf-8") as title_file:
+            title_file.write(title)
+    except OSError:
+        pass
+    return title
+
+
+def save_event_log(game):
+    """
+    Writes the event log of a game to the directory named by the
+    SPACESHIPS_EVENT_LOG_DIR environment variable, if it is set.
+
+    Args:
+        game (SpaceShipsGame): The game to save the event log of
+    """
+    directory = os.environ.get(EVENT_LOG_DIR_VARIABLE)
+    if not directory:
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{time.time_ns()}-{game.seed}.log")
+    with open(path, "w", encoding="utf-8") as log_file:
+        log_file.write(game.format_event_log())
+
+
+class ProtocolSession:
+    """
+    Plays games over a machine-readable protocol instead of the console:
+    every input line is a JSON command and every command is answered with
+    one JSON event on its own output line, without styling or prompts.
+
+    Commands are objects with a 'command' key:
+        {"command": "new_game", "size": 6, "username": "bot", "seed": 1,
+         "ai_mode": "density"} starts a game, all keys but size optional.
+        {"command": "fire", "targets": "A1 B3 C4"} fires a volley, see
+            SpaceShipsGame.submit_volley().
+        {"command": "state"} queries the state, see
+            SpaceShipsGame.get_state().
+    An 'id' given with a command is copied into its event. Events are
+    objects with an 'event' key, 'error' events carry a 'message'.
+
+    Args:
+        output (file): Receives the events, sys.stdout if None
+        stats (PhaseStats): Records the latencies of the games, no
+            instrumentation if None
+
+    Attributes:
+        output (file): Receives the events.
+        stats (PhaseStats): Records the latencies of the games.
+        game (SpaceShipsGame): The current game, None before the first
+            new_game command.
+    """
+
+    def __init__(self, output=None, stats=None):
+        self.output = output or sys.stdout
+        self.stats = stats
+        self.game = None
+
+    def send(self, event):
+        """
+        Writes an event as a single line and flushes it.
+
+        Args:
+            event (dict): The event
+        """
+        import json
+
+        self.output.write(json.dumps(event, separators=(",", ":")) + "\n")
+        self.output.flush()
+
+    def new_game(self, command):
+        """
+        Starts a new game, see ProtocolSession.
+
+        Args:
+            command (dict): The new_game command
+
+        Returns:
+            dict: The 'new_game' event with the seed and state of the game
+        """
+        username = str(command.get("username", "bot"))
+        error = get_username_error(username) or get_game_size_error(
+            str(command.get("size"))
+        )
+        ai_mode = command.get("ai_mode", COMPUTER_AI_MODE)
+        if not error and (
+            not isinstance(ai_mode, str) or ai_mode not in TARGETING_STRATEGIES
+        ):
+            error = f"Unknown AI mode {ai_mode!r}."
+        seed = command.get("seed")
+        if not error and seed is not None and not isinstance(seed, int):
+            error = "The seed must be an integer."
+        if error:
+            return {"event": "error", "message": error}
+
+        if self.game:
+            save_event_log(self.game)
+        size = int(command["size"])
+        self.game = SpaceShipsGame(
+            size,
+            get_number_of_ships(size),
+            username,
+            ai_mode,
+            seed=seed,
+            stats=self.stats,
+        )
+        return {
+            "event": "new_game",
+            "seed": self.game.seed,
+            **self.game.get_state(),
+        }
+
+    def fire(self, command):
+        """
+        Fires a volley of the user, see ProtocolSession.
+
+        Args:
+            command (dict): The fire command
+
+        Returns:
+            dict: The 'fired' event with the shots of both players as
+                target and result, the missiles left, whether the turn is
+                over and the winner
+        """
+        if not self.game:
+            return {"event": "error", "message": "No game started."}
+        outcome = self.game.submit_volley(str(command.get("targets", "")))
+        if outcome["error"]:
+            return {"event": "error", "message": outcome["error"]}
+        if outcome["winner"]:
+            save_event_log(self.game)
+        return {
+            "event": "fired",
+            "shots": [
+                {"target": format_target(*target), "result": result}
+                for target, result in outcome["shots"]
+            ],
+            "viewport_moved": outcome["viewport_moved"],
+            "missiles_left": outcome["missiles_left"],
+            "turn_over": outcome["turn_over"],
+            "computer_shots": [
+                {"target": format_target(*target), "result": result}
+                for target, result in outcome["computer_shots"]
+            ],
+            "winner": outcome["winner"],
+        }
+
+    def query_state(self, command):
+        """
+        Describes the current game, see ProtocolSession.
+
+        Args:
+            command (dict): The state command
+
+        Returns:
+            dict: The 'state' event with the keys of
+                SpaceShipsGame.get_state()
+        """
+        if not self.game:
+            return {"event": "error", "message": "No game started."}
+        return {"event": "state", **self.game.get_state()}
+
+    def handle(self, line):
+        """
+        Answers a single input line.
+
+        Args:
+            line (str): A JSON command
+
+        Returns:
+            dict: The event answering the command
+        """
+        import json
+
+        try:
+            command = json.loads(line)
+        except ValueError:
+            return {"event": "error", "message": "Invalid JSON."}
+        if not isinstance(command, dict):
+            return {"event": "error", "message": "Commands are objects."}
+
+        handlers = {
+            "new_game": self.new_game,
+            "fire": self.fire,
+            "state": self.query_state,
+        }
+        name = command.get("command")
+        # Only strings name commands, lists and objects are not hashable
+        handler = handlers.get(name) if isinstance(name, str) else None
+        if handler:
+            event = handler(command)
+        else:
+            event = {
+                "event": "error",
+                "message": f"Unknown command {name!r}.",
+            }
+        if "id" in command:
+            event["id"] = command["id"]
+        return event
+
+    def run(self, input_stream=None):
+        """
+        Answers commands until the input ends. A 'ready' event with the
+        protocol version is sent first.
+
+        Args:
+            input_stream (file): Provides the commands, sys.stdin if None
+        """
+        self.send({"event": "ready", "version": PROTOCOL_VERSION})
+        for line in input_stream or sys.stdin:
+            if line.strip():
+                self.send(self.handle(line))
+
+
+def main():
+    """
+    The main function that initiates the game. It displays the game title,
+    welcomes the player, and guides them through the process of setting up the
+    game. This includes getting a valid username, determining the size of the
+    battlefield, and initializing the game with these parameters.
+
+    With SPACESHIPS_PROTOCOL set to 'jsonl' games are played over the JSON
+    lines protocol of ProtocolSession instead.
+    """
+    stats_path = os.environ.get(STATS_FILE_VARIABLE)
+    stats = PhaseStats() if stats_path else None
+
+    if os.environ.get(PROTOCOL_VARIABLE) == PROTOCOL_JSON_LINES:
+        try:
+            ProtocolSession(stats=stats).run()
+        finally:
+            if stats:
+                stats.dump(stats_path)
+        return
+
+    print(
+        MAGENTA_CYAN_STYLE + "\n" + "\n" + "\n" + get_title() + Style.RESET_ALL
+    )
+
+    session_id = os.environ.get(SESSION_ID_VARIABLE)
+    store = None
+    game = None
+    if session_id and SESSION_ID_PATTERN.fullmatch(session_id):
+        store = SnapshotStore()
+        game = store.load(session_id, FrameRenderer(stats=stats))
+        if game and input(RESUME_PROMPT).lower() != "yes":
+            game = None
+        elif game:
+            game.stats = stats
+
+    history = None
+    play_again = True
+    while play_again:
+        if game is None:
+            username = get_valid_username(MAGENTA_WHITE_STYLE)
+            display_rules(MAGENTA_WHITE_STYLE, username)
+            size, number_of_ships = get_valid_game_size()
+            game = SpaceShipsGame(
+                size, number_of_ships, username, stats=stats
+            )
+        # The history is opened in the background while the game is played
+        if history is None:
+            history = open_history()
+        try:
+            if store and not is_large_battlefield(game.size):
+                game.play_game(
+                    lambda current: store.save(session_id, current)
+                )
+                store.delete(session_id)
+            else:
+                game.play_game()
+            if history:
+                start = time.perf_counter()
+                history.record(game)
+                rank = history.get_rank(game.username, game.size)
+                if stats:
+                    stats.record("leaderboard", time.perf_counter() - start)
+                if not history.failed:
+                    print(format_rank(game.size, rank))
+        finally:
+            save_event_log(game)
+            if stats:
+                stats.dump(stats_path)
+        game = None
+
+        response = input(PLAY_AGAIN_PROMPT).lower()
+        play_again = response == "yes"
+
+        if play_again:
+            print("\nStarting a new game...\n")
+        else:
+            print("\nThank you for playing! See you next time.\n")
+    if history:
+        history.close()
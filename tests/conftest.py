@@ -0,0 +1,6 @@
+# Imports
+import os
+import sys
+
+# The game and its tools are top-level scripts, not a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,16 @@
+# Imports
+import pytest
+
+from check_memory import (
+    DEFAULT_NUMBER_OF_GAMES,
+    GAME_MEMORY_LIMITS,
+    measure_game_memory,
+)
+from spaceships import BATTLEFIELD_MAX_SIZE, COMPUTER_AI_MODE
+
+
+@pytest.mark.parametrize("size", sorted(GAME_MEMORY_LIMITS))
+def test_games_stay_within_their_memory_limit(size):
+    games = DEFAULT_NUMBER_OF_GAMES if size <= BATTLEFIELD_MAX_SIZE else 2
+    allocated = measure_game_memory(size, games, COMPUTER_AI_MODE)
+    assert allocated <= GAME_MEMORY_LIMITS[size]
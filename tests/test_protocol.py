@@ -0,0 +1,57 @@
+# Imports
+import io
+import json
+
+from spaceships import ProtocolSession
+
+
+def handle(line):
+    """
+    Answers a single line with a fresh protocol session.
+    """
+    return ProtocolSession(output=io.StringIO()).handle(line)
+
+
+def test_command_that_is_not_a_string_is_an_error():
+    for command in ([], {}, ["fire"], 1):
+        event = handle(json.dumps({"command": command, "id": 7}))
+        assert event["event"] == "error"
+        assert event["id"] == 7
+
+
+def test_ai_mode_that_is_not_a_string_is_an_error():
+    for ai_mode in ([], {"mode": "density"}):
+        event = handle(
+            json.dumps({"command": "new_game", "size": 6, "ai_mode": ai_mode})
+        )
+        assert event["event"] == "error"
+        assert "AI mode" in event["message"]
+
+
+def test_session_survives_malformed_commands():
+    output = io.StringIO()
+    ProtocolSession(output=output).run(
+        io.StringIO(
+            '{"command": ["fire"]}\n'
+            '{"command": "new_game", "size": 6, "ai_mode": {}}\n'
+            '{"command": "new_game", "size": 6, "seed": 1}\n'
+        )
+    )
+    events = [
+        json.loads(line)["event"] for line in output.getvalue().splitlines()
+    ]
+    assert events == ["ready", "error", "error", "new_game"]
+
+
+def test_volley_ignores_surrounding_separators():
+    session = ProtocolSession(output=io.StringIO())
+    session.handle(json.dumps({"command": "new_game", "size": 6, "seed": 1}))
+    event = session.handle(
+        json.dumps({"command": "fire", "targets": "A1,B2,"})
+    )
+    assert event["event"] != "error"
+    assert len(event["shots"]) == 2
+
+    event = session.handle(json.dumps({"command": "fire", "targets": " , "}))
+    assert event["event"] == "error"
+    assert not event["message"].startswith(":")
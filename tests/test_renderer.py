@@ -0,0 +1,112 @@
+# Imports
+import io
+
+import pytest
+
+from spaceships import (
+    BATTLEFIELD_MAX_SIZE,
+    AI_MODE_DENSITY,
+    ESCAPE_SPLIT,
+    SGR_UNSET,
+    FrameRenderer,
+    SpaceShipsGame,
+    apply_sgr,
+    format_target,
+    get_number_of_ships,
+    visible_width,
+)
+
+# Constants
+FULL_REDRAW = "\x1b[2J"
+
+
+class TerminalStream(io.StringIO):
+    """
+    Captures the output of a renderer as if it were a terminal.
+    """
+
+    def isatty(self):
+        return True
+
+
+def get_styled_characters(output):
+    """
+    Every visible character of output written without cursor movement,
+    with the style it is shown in.
+    """
+    characters = []
+    style = SGR_UNSET
+    for index, part in enumerate(ESCAPE_SPLIT.split(output)):
+        if index % 2:
+            style = apply_sgr(style, part[2:-1])
+        else:
+            characters.extend((character, style) for character in part)
+    return characters, style
+
+
+@pytest.fixture
+def terminal_80x24(monkeypatch):
+    # shutil.get_terminal_size() reads the size from the environment first
+    monkeypatch.setenv("COLUMNS", "80")
+    monkeypatch.setenv("LINES", "24")
+
+
+@pytest.mark.parametrize("size", range(6, BATTLEFIELD_MAX_SIZE + 1))
+def test_rounds_are_redrawn_in_place_at_80x24(terminal_80x24, size):
+    stream = TerminalStream()
+    game = SpaceShipsGame(
+        size,
+        get_number_of_ships(size),
+        "bob",
+        AI_MODE_DENSITY,
+        FrameRenderer(stream),
+        seed=size,
+    )
+    assert game.renderer.is_cramped(game.render_battlefields())
+
+    game.draw_battlefields()
+    assert FULL_REDRAW in stream.getvalue()
+    for round_number in range(3):
+        for col in range(3):
+            game.submit_target(format_target(round_number, col))
+        stream.seek(0)
+        stream.truncate()
+        game.draw_battlefields()
+        frame = stream.getvalue()
+        assert frame, "the round changed cells, so the frame is redrawn"
+        assert FULL_REDRAW not in frame
+        assert frame.startswith("\x1b7") and frame.endswith("\x1b8")
+
+
+def test_compact_frame_fits_80x24(terminal_80x24):
+    size = BATTLEFIELD_MAX_SIZE
+    game = SpaceShipsGame(
+        size, get_number_of_ships(size), "bob", renderer=FrameRenderer()
+    )
+    frame = game.render_battlefields(compact=True)
+    assert len(frame) <= 22
+    assert all(visible_width("".join(line)) <= 80 for line in frame)
+
+
+def test_coalesced_frames_keep_every_style():
+    streams = {}
+    for coalesce in (True, False):
+        streams[coalesce] = io.StringIO()
+        game = SpaceShipsGame(
+            6,
+            get_number_of_ships(6),
+            "bob",
+            renderer=FrameRenderer(streams[coalesce], coalesce=coalesce),
+            seed=6,
+        )
+        for row in range(6):
+            for col in range(3):
+                game.submit_target(format_target(row, col))
+            game.draw_battlefields()
+
+    coalesced = streams[True].getvalue()
+    original = streams[False].getvalue()
+    assert len(coalesced) < len(original)
+    assert get_styled_characters(coalesced) == get_styled_characters(
+        original
+    )
@@ -0,0 +1,79 @@
+# Imports
+import io
+
+import pytest
+
+import spaceships
+from replay import ReplayDivergence, replay_event_log
+from spaceships import (
+    AI_MODE_ANYTIME,
+    AI_MODE_DENSITY,
+    AI_MODE_EXPERT,
+    FrameRenderer,
+    SpaceShipsGame,
+    format_target,
+    get_number_of_ships,
+)
+
+
+def play_game(ai_mode, seed, size=6):
+    """
+    Plays a seeded game to its end, the user firing row by row.
+    """
+    game = SpaceShipsGame(
+        size,
+        get_number_of_ships(size),
+        "bob",
+        ai_mode,
+        FrameRenderer(io.StringIO(), use_cursor=False),
+        seed=seed,
+    )
+    targets = iter(range(size * size))
+    while not game.get_winner():
+        game.submit_target(format_target(*divmod(next(targets), size)))
+    return game
+
+
+@pytest.mark.parametrize("verify_ai", [False, True])
+@pytest.mark.parametrize("ai_mode", [AI_MODE_DENSITY, AI_MODE_ANYTIME])
+def test_replay_rebuilds_the_game(ai_mode, verify_ai):
+    game = play_game(ai_mode, seed=4)
+    replayed = replay_event_log(game.format_event_log(), verify_ai)
+    assert list(replayed.event_log) == list(game.event_log)
+    assert replayed.get_state_digest() == game.get_state_digest()
+
+
+def test_replay_gives_up_the_logged_exact_counts(monkeypatch):
+    # Without the book the first counts cannot finish in time
+    monkeypatch.setattr(spaceships, "get_opening_book", lambda: None)
+    spaceships.get_occupancy_cache.cache_clear()
+    game = play_game(AI_MODE_EXPERT, seed=4)
+    log = game.format_event_log()
+    assert "\ns 0\n" in log
+    replayed = replay_event_log(log, verify_ai=True)
+    assert list(replayed.event_log) == list(game.event_log)
+
+
+def test_replay_reports_a_changed_computer_shot():
+    lines = play_game(AI_MODE_ANYTIME, seed=4).format_event_log().split("\n")
+    index = next(i for i, line in enumerate(lines) if line.startswith("c "))
+    _, cell, result = lines[index].split()
+    lines[index] = f"c {(int(cell) + 1) % 36} {result}"
+    with pytest.raises(ReplayDivergence) as divergence:
+        replay_event_log("\n".join(lines), verify_ai=True)
+    assert divergence.value.line_number == index + 1
+
+
+@pytest.mark.parametrize("player", ["u", "c"])
+def test_replay_reports_a_changed_result(player):
+    lines = play_game(AI_MODE_DENSITY, seed=4).format_event_log().split("\n")
+    index = next(
+        i for i, line in enumerate(lines) if line.startswith(f"{player} ")
+    )
+    _, cell, result = lines[index].split()
+    changed = "miss" if result == "hit" else "hit"
+    lines[index] = f"{player} {cell} {changed}"
+    with pytest.raises(ReplayDivergence) as divergence:
+        replay_event_log("\n".join(lines))
+    assert divergence.value.line_number == index + 1
+    assert str(divergence.value).endswith(f"log has {changed}")
@@ -0,0 +1,57 @@
+# Imports
+import io
+import random
+
+from spaceships import (
+    AI_MODE_DENSITY,
+    FrameRenderer,
+    SnapshotStore,
+    SpaceShipsGame,
+    format_target,
+    get_number_of_ships,
+)
+
+
+def play_rounds(rounds, seed=7, size=8):
+    """
+    Plays a few rounds of a seeded game, the user firing row by row.
+    """
+    game = SpaceShipsGame(
+        size,
+        get_number_of_ships(size),
+        "bob",
+        AI_MODE_DENSITY,
+        FrameRenderer(io.StringIO(), use_cursor=False),
+        seed=seed,
+    )
+    for cell in range(rounds * 3 + 1):
+        game.submit_target(format_target(*divmod(cell, size)))
+    return game
+
+
+def test_snapshot_keeps_the_seed_and_shots():
+    game = play_rounds(4)
+    restored = SpaceShipsGame.load_snapshot(game.dump_snapshot())
+    assert restored.seed == game.seed
+    assert restored.get_state_digest() == game.get_state_digest()
+    assert restored.dump_snapshot() == game.dump_snapshot()
+
+
+def test_damaged_snapshots_are_rejected(tmp_path):
+    snapshot = play_rounds(4).dump_snapshot()
+    rng = random.Random(1)
+    damaged = [snapshot[:length] for length in range(len(snapshot))]
+    damaged.append(snapshot + b"\0")
+    for _ in range(2000):
+        data = bytearray(snapshot)
+        data[rng.randrange(len(data))] = rng.randrange(256)
+        damaged.append(bytes(data))
+
+    store = SnapshotStore(str(tmp_path))
+    for data in damaged:
+        try:
+            SpaceShipsGame.load_snapshot(data)
+        except ValueError:
+            # A damaged snapshot is absent for a resuming session
+            (tmp_path / "s1.ssg").write_bytes(data)
+            assert store.load("s1") is None
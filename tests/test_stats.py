@@ -0,0 +1,30 @@
+# Imports
+import sys
+import threading
+
+from spaceships import PhaseStats
+
+
+def test_updates_from_threads_are_not_lost():
+    stats = PhaseStats()
+
+    def play():
+        for _ in range(20000):
+            stats.count("shots")
+            stats.record("computer_turn", 0.001)
+
+    # Switch threads as often as possible to provoke lost updates
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=play) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    summary = stats.to_dict()
+    assert summary["counters"]["shots"] == 80000
+    assert summary["phases"]["computer_turn"]["count"] == 80000
@@ -0,0 +1,117 @@
+# Imports
+import io
+import itertools
+import random
+import time
+
+import pytest
+
+import spaceships
+from spaceships import (
+    AI_MODE_EXPERT,
+    COMPUTER_TIME_BUDGET,
+    AnytimeTargeting,
+    FrameRenderer,
+    SpaceShipsGame,
+    count_fleet_occupancy,
+    get_number_of_ships,
+    get_placement_masks,
+)
+
+
+@pytest.mark.parametrize("samples", [1, 2])
+@pytest.mark.parametrize("seed", range(5))
+def test_anytime_keeps_the_densities_with_few_samples(samples, seed):
+    size = 10
+    strategy = AnytimeTargeting(
+        size, get_number_of_ships(size), random.Random(seed)
+    )
+    # A position past the opening book, with a few hits to chase
+    rng = random.Random(seed)
+    for cell in rng.sample(range(size * size), 12):
+        strategy.update(divmod(cell, size), rng.choice(("hit", "miss")))
+
+    # As if the deadline only left time for this many samples
+    strategy.plan_samples([(samples,)])
+    row, col = strategy.choose_target()
+
+    assert strategy.samples == samples
+    assert strategy.depth == "density"
+    best = max(
+        density
+        for density, fired in zip(strategy.density, strategy.fired)
+        if not fired
+    )
+    assert strategy.density[row * size + col] == best
+
+
+def enumerate_fleet_occupancy(size, number_of_ships, hits, misses):
+    """
+    Counts the fleets consistent with the shots one fleet at a time.
+    """
+    occupancy = [0] * (size * size)
+    fleets = 0
+    masks = [mask for mask in get_placement_masks(size) if not mask & misses]
+    for fleet in itertools.combinations(masks, number_of_ships):
+        occupied = 0
+        for mask in fleet:
+            if occupied & mask:
+                break
+            occupied |= mask
+        else:
+            if not hits & ~occupied:
+                fleets += 1
+                for cell in range(size * size):
+                    occupancy[cell] += occupied >> cell & 1
+    return tuple(occupancy), fleets
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_exact_counts_match_the_enumerated_fleets(seed):
+    size = 4
+    number_of_ships = get_number_of_ships(size)
+    rng = random.Random(seed)
+    fleet = rng.choice(
+        [
+            fleet
+            for fleet in itertools.combinations(
+                get_placement_masks(size), number_of_ships
+            )
+            if not any(a & b for a, b in itertools.combinations(fleet, 2))
+        ]
+    )
+    occupied = sum(fleet)
+    hits = misses = 0
+    for cell in rng.sample(range(size * size), seed + 2):
+        if occupied >> cell & 1:
+            hits |= 1 << cell
+        else:
+            misses |= 1 << cell
+
+    expected = enumerate_fleet_occupancy(size, number_of_ships, hits, misses)
+    assert expected[1]
+    assert count_fleet_occupancy(size, number_of_ships, hits, misses) == (
+        expected
+    )
+
+
+def test_expert_turns_keep_to_the_time_budget(monkeypatch):
+    # Without the book every count starts cold, the slowest case
+    monkeypatch.setattr(spaceships, "get_opening_book", lambda: None)
+    spaceships.get_occupancy_cache.cache_clear()
+    size = spaceships.EXACT_SOLVER_MAX_SIZE
+    game = SpaceShipsGame(
+        size,
+        get_number_of_ships(size),
+        "bob",
+        AI_MODE_EXPERT,
+        FrameRenderer(io.StringIO(), use_cursor=False),
+        seed=3,
+    )
+    slowest = 0
+    while not game.get_winner():
+        start = time.perf_counter()
+        game.computer_turn()
+        slowest = max(slowest, time.perf_counter() - start)
+    # Leaves room for the last placement of a count given up at its deadline
+    assert slowest < 2 * COMPUTER_TIME_BUDGET
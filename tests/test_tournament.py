@@ -0,0 +1,20 @@
+# Imports
+import tournament
+from tournament import Standings, get_tasks, play_match, play_matches
+
+
+def test_sampling_players_play_the_same_match_every_time():
+    results = [play_match(6, "anytime", "posterior/spread", 5) for _ in "ab"]
+    assert results[0] == results[1]
+
+
+def test_ratings_follow_the_order_of_the_games(monkeypatch):
+    monkeypatch.setattr(tournament, "GAMES_PER_TASK", 1)
+    players = ["random", "density"]
+    expected = Standings()
+    for task in get_tasks(players, [6], 8, 0):
+        for result in play_matches(*task):
+            expected.add(result)
+
+    standings = tournament.run_tournament(players, [6], 8, workers=2)
+    assert dict(standings.ratings) == dict(expected.ratings)
@@ -0,0 +1,368 @@
+# Imports
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from spaceships import (
+    AI_MODE_DENSITY,
+    AI_MODE_RANDOM,
+    BATTLEFIELD_MAX_SIZE,
+    BATTLEFIELD_MIN_SIZE,
+    PLACEMENT_MODE_RANDOM,
+    PLACEMENT_MODE_SPREAD,
+    PLACEMENT_STRATEGIES,
+    TARGETING_STRATEGIES,
+    FrameRenderer,
+    SpaceShipsGame,
+    format_target,
+    get_number_of_ships,
+)
+
+# Constants
+DEFAULT_PLAYERS = (
+    AI_MODE_RANDOM,
+    AI_MODE_DENSITY,
+    f"{AI_MODE_DENSITY}/{PLACEMENT_MODE_SPREAD}",
+)
+DEFAULT_GAMES = 100
+GAMES_PER_TASK = 50
+TASKS_PER_WORKER = 4
+ELO_INITIAL = 1500
+ELO_K_FACTOR = 16
+# Fleets sampled per target by the AIs that otherwise sample until a
+# deadline, so results do not depend on the speed or load of the machine
+TOURNAMENT_SAMPLES = 100
+RESULT_FIELDS = ("size", "seed", "first", "second", "winner", "turns")
+
+
+def parse_player(player):
+    """
+    Splits a player name into its targeting and placement strategy, e.g.
+    'density/spread'. The placement strategy defaults to random.
+
+    Args:
+        player (str): The player name
+
+    Returns:
+        str: Key of TARGETING_STRATEGIES
+        str: Key of PLACEMENT_STRATEGIES
+
+    Raises:
+        ValueError: If a strategy is unknown.
+    """
+    targeting, _, placement = player.partition("/")
+    placement = placement or PLACEMENT_MODE_RANDOM
+    if targeting not in TARGETING_STRATEGIES:
+        raise ValueError(f"Unknown targeting strategy {targeting!r}.")
+    if placement not in PLACEMENT_STRATEGIES:
+        raise ValueError(f"Unknown placement strategy {placement!r}.")
+    return targeting, placement
+
+
+def play_match(size, first, second, seed):
+    """
+    Plays one game between two players as a SpaceShipsGame: the first
+    player takes the user's side and starts every round, the second player
+    is the computer. Each places a fleet with its placement strategy and
+    picks its targets with its targeting strategy, those that sample
+    fleets draw TOURNAMENT_SAMPLES fleets per target.
+
+    Args:
+        size (int): Size of the battlefields
+        first (str): Name of the player starting every round
+        second (str): Name of the other player
+        seed (int): Seed of the game
+
+    Returns:
+        dict: The result with the keys of RESULT_FIELDS, the winner as a
+            player name and turns as the number of turns the winner needed
+    """
+    number_of_ships = get_number_of_ships(size)
+    first_targeting, first_placement = parse_player(first)
+    second_targeting, second_placement = parse_player(second)
+    game = SpaceShipsGame(
+        size,
+        number_of_ships,
+        first,
+        second_targeting,
+        FrameRenderer(io.StringIO(), use_cursor=False),
+        seed=seed,
+        placement_mode=second_placement,
+        user_placement_mode=first_placement,
+    )
+    game.computer_targeting.fix_samples(TOURNAMENT_SAMPLES)
+    strategy = TARGETING_STRATEGIES[first_targeting].create(
+        size, number_of_ships, game.rng
+    )
+    strategy.fix_samples(TOURNAMENT_SAMPLES)
+
+    # The computer's turn is played within the user's last missile
+    while not game.get_winner():
+        target = strategy.choose_target()
+        outcome = game.submit_target(format_target(*target))
+        strategy.update(target, outcome["result"])
+
+    return {
+        "size": size,
+        "seed": seed,
+        "first": first,
+        "second": second,
+        "winner": first if game.get_winner() == "user" else second,
+        "turns": game.user_turn_data.number_of_turns,
+    }
+
+
+def play_matches(size, first, second, seeds):
+    """
+    Plays a batch of games between two players, run in the workers of the
+    process pool. Players alternate as first player by seed parity.
+
+    Args:
+        size (int): Size of the battlefields
+        first (str): Name of one player
+        second (str): Name of the other player
+        seeds (range): Seeds of the games
+
+    Returns:
+        list of dict: The results, see play_match()
+    """
+    return [
+        play_match(size, first, second, seed)
+        if seed % 2 == 0
+        else play_match(size, second, first, seed)
+        for seed in seeds
+    ]
+
+
+def get_tasks(players, sizes, games, seed):
+    """
+    Splits the tournament into batches of games, every pairing of players
+    plays the given number of games on every size.
+
+    Args:
+        players (list of str): The player names
+        sizes (iterable of int): Battlefield sizes
+        games (int): Games per pairing and size
+        seed (int): Seed of the first game
+
+    Yields:
+        tuple: Arguments of play_matches()
+    """
+    next_seed = seed
+    for size in sizes:
+        for first, second in itertools.combinations(players, 2):
+            for start in range(0, games, GAMES_PER_TASK):
+                count = min(GAMES_PER_TASK, games - start)
+                yield size, first, second, range(next_seed, next_seed + count)
+                next_seed += count
+
+
+class ResultWriter:
+    """
+    Streams results to a CSV or, for paths ending in '.jsonl', a JSON lines
+    file as they come in.
+
+    Args:
+        path (str): Path of the results file
+
+    Attributes:
+        file (file): The open results file.
+        csv_writer (csv.DictWriter): Writes CSV rows, None for JSON lines.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.csv_writer = None
+        if not path.endswith(".jsonl"):
+            self.csv_writer = csv.DictWriter(self.file, RESULT_FIELDS)
+            self.csv_writer.writeheader()
+
+    def write(self, results):
+        """
+        Appends results and flushes them to disk.
+
+        Args:
+            results (list of dict): Results, see play_match()
+        """
+        if self.csv_writer:
+            self.csv_writer.writerows(results)
+        else:
+            self.file.writelines(
+                json.dumps(result) + "\n" for result in results
+            )
+        self.file.flush()
+
+    def close(self):
+        """
+        Closes the results file.
+        """
+        self.file.close()
+
+
+class Standings:
+    """
+    Elo ratings and turns to win of every player per battlefield size,
+    updated with each result in the order the games were scheduled.
+
+    Attributes:
+        ratings (dict): Elo rating per (size, player).
+        games (dict): Games played per (size, player).
+        wins (dict): Games won per (size, player).
+        turns_to_win (dict): Sum of the turns needed to win per
+            (size, player).
+    """
+
+    def __init__(self):
+        self.ratings = defaultdict(lambda: ELO_INITIAL)
+        self.games = defaultdict(int)
+        self.wins = defaultdict(int)
+        self.turns_to_win = defaultdict(int)
+
+    def add(self, result):
+        """
+        Updates the standings with the result of a game.
+
+        Args:
+            result (dict): The result, see play_match()
+        """
+        size = result["size"]
+        winner = (size, result["winner"])
+        loser = (
+            size,
+            result["second"]
+            if result["winner"] == result["first"]
+            else result["first"],
+        )
+        expected = 1 / (
+            1 + 10 ** ((self.ratings[loser] - self.ratings[winner]) / 400)
+        )
+        self.ratings[winner] += ELO_K_FACTOR * (1 - expected)
+        self.ratings[loser] -= ELO_K_FACTOR * (1 - expected)
+        self.games[winner] += 1
+        self.games[loser] += 1
+        self.wins[winner] += 1
+        self.turns_to_win[winner] += result["turns"]
+
+    def format_table(self):
+        """
+        Builds the standings table, per size ordered by rating.
+
+        Returns:
+            str: The table
+        """
+        lines = ["size  player                 elo  games  win rate  turns"]
+        for size, player in sorted(
+            self.ratings, key=lambda key: (key[0], -self.ratings[key])
+        ):
+            key = (size, player)
+            wins = self.wins[key]
+            turns = f"{self.turns_to_win[key] / wins:5.2f}" if wins else "-"
+            lines.append(
+                f"{size:4d}  {player:20s}  {self.ratings[key]:5.0f}"
+                + f"  {self.games[key]:5d}  {wins / self.games[key]:8.3f}"
+                + f"  {turns:>5s}"
+            )
+        return "\n".join(lines)
+
+
+def run_tournament(players, sizes, games, seed=0, workers=None, writer=None):
+    """
+    Plays every pairing of players on every size across a process pool.
+    Only a few batches per worker are in flight at a time, so memory stays
+    flat however many games are played. Results are written and rated in
+    the order of their games, whichever batch finishes first, so a seeded
+    tournament always ends with the same ratings.
+
+    Args:
+        players (list of str): The player names, see parse_player()
+        sizes (iterable of int): Battlefield sizes
+        games (int): Games per pairing and size
+        seed (int): Seed of the first game
+        workers (int): Number of worker processes, one per CPU if None
+        writer (ResultWriter): Receives the results as they come in
+
+    Returns:
+        Standings: The final standings
+    """
+    for player in players:
+        parse_player(player)
+    workers = workers or os.cpu_count() or 1
+    tasks = get_tasks(players, sizes, games, seed)
+    standings = Standings()
+
+    with ProcessPoolExecutor(workers) as pool:
+        # Batch number per running future, and the results of finished
+        # batches waiting for an earlier one
+        pending = {}
+        finished = {}
+        submitted = 0
+        next_batch = 0
+        while True:
+            in_flight = len(pending) + len(finished)
+            for task in itertools.islice(
+                tasks, workers * TASKS_PER_WORKER - in_flight
+            ):
+                pending[pool.submit(play_matches, *task)] = submitted
+                submitted += 1
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished[pending.pop(future)] = future.result()
+            while next_batch in finished:
+                results = finished.pop(next_batch)
+                next_batch += 1
+                if writer:
+                    writer.write(results)
+                for result in results:
+                    standings.add(result)
+    return standings
+
+
+def main():
+    """
+    Runs a tournament from the command line and prints the standings.
+    """
+    parser = argparse.ArgumentParser(
+        description="Plays SpaceShips strategies against each other."
+    )
+    parser.add_argument(
+        "--players",
+        nargs="+",
+        default=DEFAULT_PLAYERS,
+        help="targeting strategy with an optional placement strategy, "
+        + "e.g. density/spread",
+    )
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES)
+    parser.add_argument("--min-size", type=int, default=BATTLEFIELD_MIN_SIZE)
+    parser.add_argument("--max-size", type=int, default=BATTLEFIELD_MAX_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--output", help="stream results to this .csv or .jsonl file"
+    )
+    args = parser.parse_args()
+
+    writer = ResultWriter(args.output) if args.output else None
+    try:
+        standings = run_tournament(
+            args.players,
+            range(args.min_size, args.max_size + 1),
+            args.games,
+            args.seed,
+            args.workers,
+            writer,
+        )
+    finally:
+        if writer:
+            writer.close()
+    print(standings.format_table())
+
+
+if __name__ == "__main__":
+    main()